@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+# 레벨/JSON 출력을 지원하는 로깅 설정.
+# 핸들러는 QueueHandler 하나뿐이라 감시 루프 스레드에서는 큐에 넣기만 하고,
+# 실제 stdout/파일 쓰기는 QueueListener 스레드가 처리합니다.
+# 행마다 찍던 메시지는 DEBUG 레벨이라 기본(INFO) 설정에서는 포맷팅 비용도 들지 않습니다.
+#
+# 환경 변수
+#   GOLF_LOG_LEVEL : DEBUG / INFO / WARNING ... (기본 INFO)
+#   GOLF_LOG_JSON  : 1 이면 한 줄에 JSON 객체 하나씩 출력
+#   GOLF_LOG_FILE  : 지정하면 stdout 대신 파일에 기록
+
+ROOT_LOGGER = "golf"
+
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_listener = None
+# 마지막 configure_logging() 인자 (benchmark 가 끝난 뒤 그대로 되돌릴 때 사용)
+_settings = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    기본 QueueHandler.prepare 는 호출한 스레드에서 메시지를 포맷팅합니다.
+    같은 프로세스 안의 리스너로만 넘기므로 레코드를 그대로 넣고 포맷팅은 리스너 스레드에 맡깁니다.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """로그 레코드를 JSON 한 줄로 출력 (extra 로 넘긴 필드도 포함)"""
+
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=None, json_output=None, stream=None, path=None):
+    """
+    golf.* 로거 설정. 여러 번 호출하면 이전 설정을 대체합니다.
+    """
+    global _listener, _settings
+    _settings = {"level": level, "json_output": json_output, "stream": stream, "path": path}
+    level = level or os.getenv("GOLF_LOG_LEVEL", "INFO")
+    if json_output is None:
+        json_output = os.getenv("GOLF_LOG_JSON", "") in ("1", "true", "yes")
+    path = path or os.getenv("GOLF_LOG_FILE")
+
+    if path:
+        target = logging.FileHandler(path, encoding="utf-8")
+    else:
+        target = logging.StreamHandler(stream or sys.stdout)
+    if json_output:
+        target.setFormatter(JsonFormatter())
+    else:
+        target.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s", "%H:%M:%S"))
+
+    shutdown_logging()
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, target)
+    _listener.start()
+    return root
+
+
+def shutdown_logging():
+    """큐에 남은 로그를 모두 쓰고 리스너 스레드를 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name):
+    """golf.<name> 로거. 아직 설정되지 않았으면 환경 변수 기준으로 설정합니다."""
+    if _listener is None:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def benchmark(count=5000, stream=None):
+    """
+    감시 루프 스레드 입장에서의 호출 비용 비교 (호출당 마이크로초).
+    - print: 기존 방식 (동기 출력)
+    - debug: DEBUG 가 꺼진 상태의 행 단위 로그
+    - info: 큐 기반 INFO 로그 (쓰기는 리스너 스레드에서)
+    끝나면 벤치마크 전의 로깅 설정으로 되돌립니다.
+    """
+    stream = stream or sys.stdout
+    previous = _settings
+    results = {}
+
+    started = time.perf_counter()
+    for i in range(count):
+        print(f"시간대 {i:04d}는 원하는 범위 내에 있습니다.", file=stream)
+    results["print"] = (time.perf_counter() - started) / count * 1e6
+
+    configure_logging(level="INFO", stream=stream)
+    log = logging.getLogger(f"{ROOT_LOGGER}.bench")
+    started = time.perf_counter()
+    for i in range(count):
+        log.debug("시간대 %04d는 원하는 범위 내에 있습니다.", i)
+    results["debug"] = (time.perf_counter() - started) / count * 1e6
+
+    started = time.perf_counter()
+    for i in range(count):
+        log.info("시간대 %04d는 원하는 범위 내에 있습니다.", i)
+    results["info"] = (time.perf_counter() - started) / count * 1e6
+    # 큐에 남은 벤치마크 로그를 쓰고, 이후 로그가 읽는 사람 없는 큐에 쌓이지 않도록 리스너를 다시 띄웁니다.
+    configure_logging(**(previous or {}))
+
+    for name, value in results.items():
+        print(f"{name:>6}: 호출당 {value:.2f}us", file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
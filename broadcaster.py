@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from slots import SlotFilter, Holes
+from botlog import get_logger
+
+log = get_logger("broadcaster")
+
+# 예약은 하지 않고 새로 열린 슬롯을 여러 구독자에게 알리는 방송기.
+# 사람마다 봇을 하나씩 돌리면 같은 사이트를 사람 수만큼 폴링하게 되므로,
+# 폴러 하나가 구독된 날짜의 시간표만 읽어 이전 슬롯 집합과 비교하고(SlotDiff),
+# 새 슬롯마다 (날짜, 시) 버킷 색인(SubscriptionIndex)으로 해당 구독만 찾아 확인합니다.
+# 이벤트당 비용은 전체 구독 수가 아니라 그 버킷에 걸린 구독 수(≈ 일치 수)에 비례합니다.
+# 일치한 구독자에게는 스레드 풀에서 동시에 카카오 메시지를 보냅니다 (kakao_send.send_kakao_text).
+#
+# 구독 파일(JSON 목록) 예:
+#   [{"name": "kim", "dates": ["20250507"], "start_hour": 7, "end_hour": 10, "holes": 9,
+#     "min_seats": 2, "max_seats": 4, "kakao_uuid": "..."}]
+# kakao_uuid 가 없으면 나에게 보내기로 전송합니다 (운영자가 받아서 전달).
+#
+# 읽기에 실패한 폴링은 비교(SlotDiff)에 반영하지 않습니다. 세션이 만료되어 로그인 페이지를 받으면
+# (conditional_fetch.LoginRequired) 다음 폴링 전에 다시 로그인하고, 그동안 슬롯이 사라졌다고 보지 않습니다.
+
+
+class Subscription:
+    """한 사람의 알림 조건. 조건 판정은 SlotFilter 를 그대로 씁니다."""
+    __slots__ = ("name", "dates", "start_hour", "end_hour", "filter", "kakao_uuid")
+
+    def __init__(self, name, dates, start_hour=0, end_hour=24, holes=None, min_seats=1, max_seats=4,
+                 kakao_uuid=None):
+        self.name = name
+        self.dates = {int(date) for date in dates}
+        self.start_hour = int(start_hour)
+        self.end_hour = int(end_hour)
+        self.filter = SlotFilter(self.start_hour, self.end_hour, holes=holes, min_seats=min_seats,
+                                 max_seats=max_seats)
+        self.kakao_uuid = kakao_uuid
+
+    @classmethod
+    def from_dict(cls, data):
+        holes = data.get("holes")
+        return cls(data["name"], data["dates"], data.get("start_hour", 0), data.get("end_hour", 24),
+                   Holes(int(holes)) if holes else None, data.get("min_seats", 1), data.get("max_seats", 4),
+                   data.get("kakao_uuid"))
+
+    def __repr__(self):
+        return f"Subscription({self.name} {sorted(self.dates)} {self.start_hour}~{self.end_hour}시)"
+
+
+def load_subscriptions(path):
+    with open(path, encoding="utf-8") as f:
+        return [Subscription.from_dict(item) for item in json.load(f)]
+
+
+class SubscriptionIndex:
+    """
+    (날짜, 시) → 구독 목록 색인.
+    구독은 자기 날짜 × [start_hour, end_hour) 시간 버킷마다 한 번씩 들어가므로,
+    슬롯 하나의 후보는 그 슬롯의 (날짜, 시) 버킷 하나로 정해지고 선형 탐색이 없습니다.
+    """
+
+    def __init__(self, subscriptions=()):
+        self._buckets = defaultdict(list)
+        self._date_counts = defaultdict(int)
+        self._names = {}
+        self._lock = threading.Lock()
+        for subscription in subscriptions:
+            self.add(subscription)
+
+    def add(self, subscription):
+        with self._lock:
+            if subscription.name in self._names:
+                self._remove(subscription.name)
+            self._names[subscription.name] = subscription
+            for date in subscription.dates:
+                self._date_counts[date] += 1
+                for hour in range(max(subscription.start_hour, 0), min(subscription.end_hour, 24)):
+                    self._buckets[(date, hour)].append(subscription)
+
+    def remove(self, name):
+        with self._lock:
+            return self._remove(name)
+
+    def _remove(self, name):
+        subscription = self._names.pop(name, None)
+        if subscription is None:
+            return None
+        for date in subscription.dates:
+            self._date_counts[date] -= 1
+            if not self._date_counts[date]:
+                del self._date_counts[date]
+            for hour in range(max(subscription.start_hour, 0), min(subscription.end_hour, 24)):
+                bucket = self._buckets[(date, hour)]
+                bucket.remove(subscription)
+                if not bucket:
+                    del self._buckets[(date, hour)]
+        return subscription
+
+    def dates(self):
+        """하나 이상의 구독이 걸린 날짜 (YYYYMMDD 문자열)"""
+        with self._lock:
+            return {f"{date:08d}" for date in self._date_counts}
+
+    def match(self, slot):
+        with self._lock:
+            bucket = self._buckets.get((slot.date, slot.minutes // 60), ())
+        return [subscription for subscription in bucket if subscription.filter.matches(slot)]
+
+    def __len__(self):
+        return len(self._names)
+
+
+class SlotDiff:
+    """
+    날짜별 직전 시간표와 비교해 새 슬롯을 찾습니다.
+    처음 보는 티타임이거나, 이미 있던 티타임의 남은 자리가 늘어난 경우(취소분)를 새 슬롯으로 봅니다.
+    """
+
+    def __init__(self):
+        self.previous = {}
+
+    def update(self, date, slots):
+        before = self.previous.get(date, {})
+        current = {slot.key: slot for slot in slots}
+        self.previous[date] = current
+        fresh = [slot for key, slot in current.items()
+                 if key not in before or slot.open_seats > before[key].open_seats]
+        return fresh, before.keys() - current.keys()
+
+
+def format_message(subscription, slots):
+    date = slots[0].date_text
+    lines = [f"골프장 빈 시간 알림 ({subscription.name})", "",
+             f"📅 날짜: {date[:4]}년 {date[4:6]}월 {date[6:8]}일"]
+    for slot in sorted(slots, key=lambda slot: slot.minutes):
+        lines.append(f"⏰ {slot.time_text} {slot.course_name}코스 {int(slot.holes)}홀 {slot.open_seats}명 가능")
+    return "\n".join(lines)
+
+
+def kakao_sender(subscription, text):
+    from kakao_send import send_kakao_text
+
+    return send_kakao_text(text, [subscription.kakao_uuid] if subscription.kakao_uuid else None)
+
+
+class Broadcaster:
+    """
+    page(read_calendar / read_tee_sheet 를 가진 페이지: conditional_fetch.HttpPage 등)를
+    interval 초마다 폴링해 새 슬롯을 구독자에게 알립니다. 신청(book)은 호출하지 않습니다.
+    같은 구독자에게 같은 티타임은 그 슬롯이 사라졌다 다시 열리기 전까지 한 번만 보냅니다.
+    login 은 세션이 만료됐을 때 부를 재로그인 함수입니다 (실패하면 예외).
+    """
+
+    def __init__(self, page, reservation_url, index, sender=kakao_sender, interval=2.0, workers=8,
+                 quiet_start=False, login=None):
+        self.page = page
+        self.login = login
+        self.needs_login = False
+        self.reservation_url = reservation_url
+        self.index = index
+        self.sender = sender
+        self.interval = interval
+        self.quiet_start = quiet_start
+        self.diff = SlotDiff()
+        self.notified = defaultdict(set)
+        self.sent = 0
+        self.failed = 0
+        self._count_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="broadcast")
+        self._stop = threading.Event()
+
+    def poll_once(self):
+        """
+        한 번 폴링. 이번에 보낸 알림 수를 반환합니다.
+        읽기 예외는 그대로 올려 보내며, 읽지 못한 날짜의 비교 상태는 바뀌지 않습니다.
+        """
+        watched = self.index.dates()
+        opened = {day.date_text for day in self.page.read_calendar(self.reservation_url)}
+        notifications = 0
+        for date in sorted(watched):
+            first = date not in self.diff.previous
+            slots = self.page.read_tee_sheet(self.reservation_url, date) if date in opened else []
+            # 읽기가 끝난 뒤에만 비교 (실패한 읽기를 빈 시간표로 보지 않음)
+            fresh, gone = self.diff.update(date, slots)
+            for key in gone:
+                self.notified.pop(key, None)
+            if first and self.quiet_start:
+                for slot in fresh:
+                    self.notified[slot.key].update(s.name for s in self.index.match(slot))
+                continue
+            notifications += self._dispatch(fresh)
+        return notifications
+
+    def _dispatch(self, slots):
+        """새 슬롯을 구독자별로 모아 구독자마다 메시지 하나씩 동시 전송"""
+        per_subscriber = defaultdict(list)
+        for slot in slots:
+            already = self.notified[slot.key]
+            for subscription in self.index.match(slot):
+                if subscription.name not in already:
+                    already.add(subscription.name)
+                    per_subscriber[subscription].append(slot)
+        for subscription, matched in per_subscriber.items():
+            self._executor.submit(self._send, subscription, format_message(subscription, matched))
+        return len(per_subscriber)
+
+    def _send(self, subscription, text):
+        try:
+            ok = self.sender(subscription, text)
+        except Exception as e:
+            log.warning(f"{subscription.name} 알림 전송 오류: {e}")
+            ok = False
+        with self._count_lock:
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+        return ok
+
+    def run(self):
+        log.info(f"방송 시작: 구독 {len(self.index)}명, 날짜 {sorted(self.index.dates())}, {self.interval}초 주기")
+        from conditional_fetch import LoginRequired
+
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                if self.needs_login:
+                    self.login()
+                    self.needs_login = False
+                    log.info("다시 로그인했습니다.")
+                count = self.poll_once()
+                if count:
+                    log.info(f"새 슬롯 알림 {count}건 전송 요청")
+            except LoginRequired as e:
+                log.warning(f"세션 만료: {e}")
+                # 재로그인 함수가 없으면 같은 경고만 반복됩니다 (비교 상태는 그대로 유지).
+                self.needs_login = self.login is not None
+            except Exception as e:
+                log.warning(f"폴링 오류: {e}")
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=True)
+
+
+def main(subscriptions_path, interval=2.0, workers=8, quiet_start=False, dry_run=False, test=False):
+    from dotenv import dotenv_values
+    from conditional_fetch import HttpPage
+
+    server = None
+    reservation_url = "http://www.ddgolf.co.kr/03reservation/reservation02.asp"
+    env_values = dotenv_values()
+    username = env_values.get("USERNAME") or os.getenv("GOLF_USERNAME")
+    password = env_values.get("PASSWORD") or os.getenv("GOLF_PASSWORD")
+    if test:
+        from fixture_server import FixtureServer
+
+        server = FixtureServer().start()
+        reservation_url = server.reservation_url
+        username, password = username or "fixture", password or "fixture"
+    sender = kakao_sender
+    if dry_run:
+        def sender(subscription, text):
+            print(f"[{subscription.name}]\n{text}\n")
+            return True
+    else:
+        from kakao_send import get_access_token
+
+        # 인증 코드 입력이 필요하면 전송 스레드가 아니라 여기(메인 스레드)에서 한 번만 묻습니다.
+        if not get_access_token():
+            log.error("카카오 인증에 실패해 알림을 보낼 수 없습니다.")
+            if server is not None:
+                server.stop()
+            return
+    page = HttpPage(reservation_url)
+
+    def login():
+        page.login(reservation_url, username, password)
+
+    login()
+    broadcaster = Broadcaster(page, reservation_url, SubscriptionIndex(load_subscriptions(subscriptions_path)),
+                              sender, interval, workers, quiet_start, login)
+    try:
+        broadcaster.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broadcaster.stop()
+        page.close()
+        if server is not None:
+            server.stop()
+
+
+def fixture_check():
+    """
+    로컬 픽스처 서버에 대고 한 번 폴링해 구독자에게 알림이 실제로 나가는지 확인 (카카오로는 보내지 않음).
+    로그인 판별이나 시간표 파싱이 깨지면 알림이 0건이 됩니다. 보낸 알림 수를 반환합니다.
+    """
+    from conditional_fetch import HttpPage
+    from fixture_server import FixtureServer
+
+    sent = []
+    with FixtureServer() as server:
+        page = HttpPage(server.reservation_url)
+        page.login(server.reservation_url, "fixture", "fixture")
+        dates = [day.date_text for day in page.read_calendar(server.reservation_url)]
+        broadcaster = Broadcaster(page, server.reservation_url, SubscriptionIndex([Subscription("fixture", dates)]),
+                                  lambda subscription, text: sent.append(text) or True, workers=1)
+        try:
+            broadcaster.poll_once()
+        finally:
+            broadcaster.stop()
+    for text in sent:
+        print(text)
+    print(f"픽스처 확인: 알림 {len(sent)}건 ({'정상' if sent else '실패'})")
+    return len(sent)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='새로 열린 슬롯을 구독자에게 카카오로 알림 (예약하지 않음)')
+    parser.add_argument('subscriptions', nargs='?', help='구독 목록 JSON 파일')
+    parser.add_argument('--interval', type=float, default=2.0, help='폴링 주기(초)')
+    parser.add_argument('--workers', type=int, default=8, help='동시 전송 스레드 수')
+    parser.add_argument('--quiet-start', action='store_true', help='시작 시 이미 열려 있던 슬롯은 알리지 않음')
+    parser.add_argument('--dry-run', action='store_true', help='전송하지 않고 메시지만 출력')
+    parser.add_argument('--test', action='store_true', help='로컬 픽스처 서버에서 실행')
+    parser.add_argument('--fixture-check', action='store_true', help='픽스처 서버에서 알림이 나가는지만 확인')
+    args = parser.parse_args()
+    if args.fixture_check:
+        raise SystemExit(0 if fixture_check() else 1)
+    if not args.subscriptions:
+        parser.error('구독 목록 JSON 파일이 필요합니다')
+    main(args.subscriptions, args.interval, args.workers, args.quiet_start, args.dry_run, args.test)
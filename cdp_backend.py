@@ -0,0 +1,467 @@
+import os
+import json
+import time
+import queue
+import shutil
+import tempfile
+import itertools
+import threading
+import subprocess
+from collections import defaultdict, deque
+from urllib.parse import urljoin
+from urllib.request import urlopen
+import websocket
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from slots import parse_calendar_html, parse_tee_sheet_html
+from page_fetch import (book_url, booking_succeeded, join_form_fields, open_tee_sheet, post_navigate_expression,
+                        submit_join_form, tee_sheet_url)
+from ledger import STATUS_BOOKED, STATUS_FAILED, STATUS_UNKNOWN
+from driver_pool import USER_AGENT, build_chrome_options
+from botlog import get_logger
+
+log = get_logger("cdp_backend")
+
+# chromedriver 를 거치지 않고 Chrome DevTools Protocol(CDP) 웹소켓에 직접 붙는 브라우저 백엔드.
+# Selenium 호출은 파이썬 → (HTTP) chromedriver → (CDP) Chrome 두 단계를 거치므로
+# find_element / click / alert 하나마다 chromedriver 왕복 시간이 더해집니다.
+# 여기서는 웹소켓 하나를 계속 열어 두고 명령을 보내며, 대화상자(Page.javascriptDialogOpening)와
+# 네트워크 응답(Network.responseReceived)은 폴링 대신 이벤트로 받습니다.
+#
+# 예약 흐름에 필요한 페이지 동작(로그인 / 달력 읽기 / 시간표 읽기 / 신청)을 같은 메서드 이름으로
+# SeleniumPage(기존 webdriver.Chrome 경로)와 CdpPage 두 구현에 맞춰 두었습니다.
+# python cdp_backend.py 로 픽스처 서버에서 두 경로의 지연을 비교할 수 있습니다.
+# 웹소켓 클라이언트는 Selenium 이 이미 의존하는 websocket-client 를 사용합니다.
+
+LOGIN_PAGE = "/08member/member01.asp"
+
+_CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+_LOGIN_SCRIPT = """
+(function (username, password) {
+    var form = document.LoginForm;
+    form.UserID.value = username;
+    form.Password.value = password;
+    form.submit();
+})(%s, %s)
+"""
+
+
+class CdpError(Exception):
+    pass
+
+
+class _Waiter:
+    """응답 또는 이벤트 하나를 기다리는 자리"""
+    __slots__ = ("event", "value", "predicate")
+
+    def __init__(self, predicate=None):
+        self.event = threading.Event()
+        self.value = None
+        self.predicate = predicate
+
+    def set(self, value):
+        self.value = value
+        self.event.set()
+
+    def wait(self, timeout):
+        if not self.event.wait(timeout):
+            raise TimeoutError(f"CDP 응답/이벤트를 {timeout}초 안에 받지 못했습니다")
+        return self.value
+
+
+class CdpConnection:
+    """
+    페이지 타깃 웹소켓 연결.
+    수신 스레드가 명령 응답은 id 로, 이벤트는 on() 으로 등록한 콜백과 expect() 대기자에게 나눠 줍니다.
+    콜백은 수신 스레드에서 불리므로 그 안에서 send() 로 응답을 기다리면 안 됩니다.
+    """
+
+    def __init__(self, ws_url, timeout=10):
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self.ws = websocket.create_connection(ws_url, suppress_origin=True, enable_multithread=True)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listeners = defaultdict(list)
+        self._expected = defaultdict(list)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def send(self, method, params=None, timeout=None):
+        message_id = next(self._ids)
+        waiter = _Waiter()
+        with self._lock:
+            self._pending[message_id] = waiter
+        self.ws.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+        try:
+            message = waiter.wait(self.timeout if timeout is None else timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(message_id, None)
+        if "error" in message:
+            raise CdpError(f"{method}: {message['error'].get('message')}")
+        return message.get("result", {})
+
+    def on(self, method, callback):
+        with self._lock:
+            self._listeners[method].append(callback)
+
+    def expect(self, method, predicate=None):
+        """다음 method 이벤트 하나를 기다리는 대기자. 이벤트를 일으킬 명령보다 먼저 만들어야 합니다."""
+        waiter = _Waiter(predicate)
+        with self._lock:
+            self._expected[method].append(waiter)
+        return waiter
+
+    def _dispatch(self, method, params):
+        with self._lock:
+            listeners = list(self._listeners.get(method, ()))
+            waiters = self._expected.get(method, [])
+            matched = [w for w in waiters if w.predicate is None or w.predicate(params)]
+            if matched:
+                self._expected[method] = [w for w in waiters if w not in matched]
+        for waiter in matched:
+            waiter.set(params)
+        for callback in listeners:
+            try:
+                callback(params)
+            except Exception as e:
+                log.warning(f"CDP 이벤트 콜백 오류 ({method}): {e}")
+
+    def _read(self):
+        while not self._closed:
+            try:
+                raw = self.ws.recv()
+            except Exception as e:
+                if not self._closed:
+                    log.warning(f"CDP 연결이 끊어졌습니다: {e}")
+                break
+            if not raw:
+                continue
+            message = json.loads(raw)
+            if "id" in message:
+                with self._lock:
+                    waiter = self._pending.get(message["id"])
+                if waiter is not None:
+                    waiter.set(message)
+            elif "method" in message:
+                self._dispatch(message["method"], message.get("params", {}))
+        # 끊어진 뒤 기다리는 명령은 바로 실패하도록
+        with self._lock:
+            pending = list(self._pending.values())
+        for waiter in pending:
+            waiter.set({"error": {"message": "연결 종료"}})
+
+    def close(self):
+        self._closed = True
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+
+def find_chrome_binary():
+    path = os.getenv("GOLF_CHROME_BINARY")
+    if path:
+        return path
+    for name in _CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise FileNotFoundError("Chrome 실행 파일을 찾을 수 없습니다 (GOLF_CHROME_BINARY 로 지정)")
+
+
+class ChromeProcess:
+    """--remote-debugging-port=0 으로 띄운 Chrome. 실제 포트는 DevToolsActivePort 파일에서 읽습니다."""
+
+    def __init__(self, headless=True, binary=None, startup_timeout=15):
+        self.user_data_dir = tempfile.mkdtemp(prefix="golf-cdp-")
+        args = [
+            binary or find_chrome_binary(),
+            "--remote-debugging-port=0",
+            "--remote-allow-origins=*",
+            f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-gpu",
+            "--no-sandbox",
+            "--disable-dev-shm-usage",
+            "--window-size=1920,1080",
+            f"--user-agent={USER_AGENT}",
+        ]
+        if headless:
+            args.append("--headless=new")
+        args.append("about:blank")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.port = self._wait_port(startup_timeout)
+
+    def _wait_port(self, timeout):
+        path = os.path.join(self.user_data_dir, "DevToolsActivePort")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CdpError(f"Chrome 이 바로 종료되었습니다 (exit {self.process.returncode})")
+            try:
+                with open(path, encoding="utf-8") as f:
+                    port = f.readline().strip()
+                if port:
+                    return int(port)
+            except OSError:
+                pass
+            time.sleep(0.05)
+        raise TimeoutError("Chrome DevTools 포트를 기다리다 시간 초과")
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.port}"
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+def page_websocket_url(address):
+    """debugger 주소(host:port)의 첫 번째 페이지 타깃 웹소켓 주소"""
+    with urlopen(f"http://{address}/json/list", timeout=5) as response:
+        targets = json.loads(response.read().decode("utf-8"))
+    for target in targets:
+        if target.get("type") == "page" and target.get("webSocketDebuggerUrl"):
+            return target["webSocketDebuggerUrl"]
+    raise CdpError(f"{address} 에 페이지 타깃이 없습니다")
+
+
+class CdpPage:
+    """
+    CDP 로 직접 조작하는 페이지.
+    launch() 로 Chrome 을 새로 띄우거나, attach(driver) 로 Selenium 이 띄운 Chrome 에 함께 붙을 수 있습니다.
+    """
+
+    def __init__(self, connection, process=None, timeout=10):
+        self.connection = connection
+        self.process = process
+        self.timeout = timeout
+        self.dialogs = queue.Queue()
+        self.responses = deque(maxlen=100)
+        connection.on("Page.javascriptDialogOpening", self.dialogs.put)
+        connection.on("Network.responseReceived", self._on_response)
+        for domain in ("Page", "Runtime", "Network"):
+            connection.send(f"{domain}.enable")
+
+    @classmethod
+    def launch(cls, headless=True, binary=None, timeout=10):
+        process = ChromeProcess(headless=headless, binary=binary)
+        try:
+            return cls(CdpConnection(page_websocket_url(process.address), timeout), process, timeout)
+        except Exception:
+            process.close()
+            raise
+
+    @classmethod
+    def attach(cls, driver, timeout=10):
+        """Selenium 드라이버의 Chrome 에 직접 연결 (드라이버는 그대로 사용 가능)"""
+        address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+        return cls(CdpConnection(page_websocket_url(address), timeout), timeout=timeout)
+
+    def _on_response(self, params):
+        response = params.get("response", {})
+        self.responses.append((response.get("url"), response.get("status"), time.time()))
+
+    # 기본 동작
+
+    def evaluate(self, expression, await_promise=False):
+        result = self.connection.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        })
+        if "exceptionDetails" in result:
+            raise CdpError(result["exceptionDetails"].get("text", "스크립트 오류"))
+        return result.get("result", {}).get("value")
+
+    def _loaded(self):
+        return self.connection.expect("Page.domContentEventFired")
+
+    def navigate(self, url):
+        waiter = self._loaded()
+        result = self.connection.send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            raise CdpError(f"{url} 이동 실패: {result['errorText']}")
+        waiter.wait(self.timeout)
+
+    def post_navigate(self, url, fields, wait=True):
+        waiter = self._loaded() if wait else None
+        self.evaluate(post_navigate_expression(url, fields))
+        if waiter is not None:
+            waiter.wait(self.timeout)
+
+    def wait_for(self, condition, timeout=2.0, interval=0.01):
+        """JS 조건식이 참이 될 때까지 기다립니다. 시간 안에 참이 되면 True"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.evaluate(condition):
+                    return True
+            except CdpError:
+                # 페이지가 바뀌는 중에는 실행 컨텍스트가 없어 실패할 수 있습니다.
+                pass
+            time.sleep(interval)
+        return False
+
+    def html(self):
+        return self.evaluate("document.documentElement.outerHTML")
+
+    def handle_dialog(self, accept=True, timeout=None):
+        """대화상자(alert/confirm)가 뜰 때까지 기다렸다가 처리하고 메시지를 반환. 없으면 None"""
+        try:
+            dialog = self.dialogs.get(timeout=self.timeout if timeout is None else timeout)
+        except queue.Empty:
+            return None
+        self.connection.send("Page.handleJavaScriptDialog", {"accept": accept})
+        return dialog.get("message", "")
+
+    def get_cookies(self):
+        return self.connection.send("Network.getCookies").get("cookies", [])
+
+    def set_cookies(self, cookies):
+        self.connection.send("Network.setCookies", {"cookies": cookies})
+
+    # 예약 흐름 (SeleniumPage 와 같은 이름)
+
+    def login(self, reservation_url, username, password):
+        self.navigate(urljoin(reservation_url, LOGIN_PAGE))
+        waiter = self._loaded()
+        self.evaluate(_LOGIN_SCRIPT % (json.dumps(username), json.dumps(password)))
+        waiter.wait(self.timeout)
+
+    def read_calendar(self, reservation_url):
+        self.navigate(reservation_url)
+        return parse_calendar_html(self.html())
+
+    def read_tee_sheet(self, reservation_url, date):
+        self.post_navigate(tee_sheet_url(reservation_url), {"submitDate": date})
+        return parse_tee_sheet_html(self.html())
+
+    def book(self, reservation_url, slot, party=2):
+        # 이전 화면에서 남은 대화상자는 버립니다.
+        while not self.dialogs.empty():
+            self.dialogs.get_nowait()
+        self.post_navigate(book_url(reservation_url), join_form_fields(slot, party), wait=False)
+        message = self.handle_dialog()
+        if message is None:
+            return STATUS_UNKNOWN
+        # 팝업 뒤 달력으로 돌아가는 이동이 끝나야 다음 navigate 가 이 페이지의 이벤트를 받지 않습니다.
+        self.wait_for("location.pathname.endsWith('reservation02.asp') && document.readyState !== 'loading'")
+        return STATUS_BOOKED if booking_succeeded(message) else STATUS_FAILED
+
+    def close(self):
+        self.connection.close()
+        if self.process is not None:
+            self.process.close()
+
+
+class SeleniumPage:
+    """기존 webdriver.Chrome 경로로 같은 동작을 수행 (비교 기준)"""
+
+    def __init__(self, driver, wait=None):
+        self.driver = driver
+        self.wait = wait or WebDriverWait(driver, 10)
+
+    @classmethod
+    def launch(cls, headless=True):
+        return cls(webdriver.Chrome(options=build_chrome_options(headless)))
+
+    def evaluate(self, expression):
+        return self.driver.execute_script(f"return {expression}")
+
+    def login(self, reservation_url, username, password):
+        login_url = urljoin(reservation_url, LOGIN_PAGE)
+        self.driver.get(login_url)
+        self.driver.find_element(By.NAME, "UserID").send_keys(username)
+        self.driver.find_element(By.NAME, "Password").send_keys(password)
+        self.driver.find_element(By.XPATH, "//img[@src='/image/btn_login.jpg']").click()
+        self.wait.until(lambda driver: driver.current_url != login_url)
+
+    def read_calendar(self, reservation_url):
+        self.driver.get(reservation_url)
+        return parse_calendar_html(self.driver.page_source)
+
+    def read_tee_sheet(self, reservation_url, date):
+        open_tee_sheet(self.driver, reservation_url, date)
+        self.wait.until(EC.presence_of_element_located((By.XPATH, "//table/tbody/tr[td[@class='gray']]")))
+        return parse_tee_sheet_html(self.driver.page_source)
+
+    def book(self, reservation_url, slot, party=2):
+        from main import _await_booking_result
+
+        submit_join_form(self.driver, reservation_url, slot, party)
+        return _await_booking_result(self.driver, self.wait, slot.time_text)
+
+    def close(self):
+        self.driver.quit()
+
+
+def _time(results, name, func, *args):
+    started = time.perf_counter()
+    value = func(*args)
+    results[name].append((time.perf_counter() - started) * 1000)
+    return value
+
+
+def _run_backend(page, reservation_url, date, rounds, evaluations):
+    results = defaultdict(list)
+    _time(results, "login", page.login, reservation_url, "fixture", "fixture")
+    for _ in range(rounds):
+        _time(results, "read_calendar", page.read_calendar, reservation_url)
+        slots = _time(results, "read_tee_sheet", page.read_tee_sheet, reservation_url, date)
+        if slots:
+            _time(results, "book", page.book, reservation_url, slots[0])
+        for _ in range(evaluations):
+            _time(results, "evaluate", page.evaluate, "1 + 1")
+    return results
+
+
+def benchmark(rounds=5, evaluations=20, headless=True):
+    """
+    픽스처 서버에서 SeleniumPage 와 CdpPage 의 동작별 지연(ms) 비교.
+    {백엔드: {동작: [ms, ...]}} 를 반환합니다.
+    """
+    from fixture_server import FixtureServer
+
+    results = {}
+    with FixtureServer() as server:
+        date = server.dates()[0]
+        for name, launch in (("selenium", SeleniumPage.launch), ("cdp", CdpPage.launch)):
+            page = launch(headless=headless)
+            try:
+                results[name] = _run_backend(page, server.reservation_url, date, rounds, evaluations)
+            finally:
+                page.close()
+
+    operations = list(results["selenium"])
+    print(f"{'동작':<16} {'selenium 평균ms':>15} {'cdp 평균ms':>11} {'배율':>6}")
+    for operation in operations:
+        s = results["selenium"][operation]
+        c = results["cdp"].get(operation) or [0.0]
+        s_avg, c_avg = sum(s) / len(s), sum(c) / len(c)
+        print(f"{operation:<16} {s_avg:>15.2f} {c_avg:>11.2f} {s_avg / c_avg if c_avg else 0:>5.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Selenium 과 CDP 직접 연결 백엔드 지연 비교 (픽스처 서버)')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--evaluations', type=int, default=20, help='라운드마다 스크립트 왕복 측정 횟수')
+    parser.add_argument('--show', action='store_true', help='브라우저 창 표시')
+    args = parser.parse_args()
+    benchmark(args.rounds, args.evaluations, headless=not args.show)
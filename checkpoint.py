@@ -0,0 +1,155 @@
+import os
+import gzip
+import json
+import time
+import tempfile
+from botlog import get_logger
+
+log = get_logger("checkpoint")
+
+# ReservationBot 상태 체크포인트.
+# 재시작(배포, 크래시)하면 봇은 예약한 날짜, 달력 지문, 세션 쿠키, 날짜별 시도 기록을 모두 잃고
+# 다시 로그인(perform_login 만 8초 이상)부터 시작합니다.
+# 여기서는 주기마다 상태를 gzip JSON 한 파일로 원자적으로(임시 파일 → fsync → os.replace) 저장해 두고,
+# 다시 시작할 때 복원해 로그인/예약 완료 날짜를 건너뛰고 바로 감시를 이어갑니다.
+# 감시 설정(날짜/시간대/주기)은 main() 에 설정한 값을 따릅니다. 체크포인트의 설정은 실행 중 제어 API 로
+# 바꾼 것이고 설정 값이 그때와 같을 때만 이어받습니다 (설정을 고쳐 재시작하면 새 설정이 이깁니다).
+
+CHECKPOINT_VERSION = 2
+
+
+def watch_settings(bot):
+    return {
+        "user_dates": list(bot.user_dates),
+        "start_hour": bot.start_hour,
+        "end_hour": bot.end_hour,
+        "monitor_interval": bot.monitor_interval,
+    }
+
+
+def write_atomic(path, data):
+    """같은 디렉터리의 임시 파일에 쓴 뒤 교체 (중간에 죽어도 이전 파일은 그대로 남습니다)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class BotCheckpoint:
+    """
+    interval 초마다 save() 가 실제로 기록합니다 (force=True 면 바로).
+    max_age 초보다 오래된 체크포인트는 무시하고, 쿠키는 cookie_max_age 초 안에 저장된 것만 복원합니다.
+    """
+
+    def __init__(self, path="bot_checkpoint.json.gz", interval=30, max_age=6 * 3600, cookie_max_age=1200):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.cookie_max_age = cookie_max_age
+        self._saved_at = 0.0
+        # 이번 실행에서 설정된 감시 설정 (restore 에서 기록)
+        self.configured = None
+
+    def capture(self, bot):
+        """현재 봇 상태 (드라이버 쿠키 포함, 감시 스레드에서 호출)"""
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "saved_at": time.time(),
+            "account": bot.username,
+            "reservation_url": bot.reservation_url,
+            "settings": watch_settings(bot),
+            "configured": self.configured or watch_settings(bot),
+            "booked": dict(bot.booked),
+            "attempts": {date: dict(record) for date, record in bot.attempts.items()},
+        }
+        if bot.calendar_poller is not None:
+            state["calendar"] = bot.calendar_poller.snapshot()
+        if bot.prefetcher is not None:
+            state["prefetch_done"] = sorted(bot.prefetcher.done)
+        try:
+            state["cookies"] = bot.driver.get_cookies()
+        except Exception as e:
+            log.debug("쿠키를 읽지 못했습니다: %s", e)
+        return state
+
+    def save(self, bot, force=False):
+        """저장했으면 True"""
+        now = time.monotonic()
+        if not force and now - self._saved_at < self.interval:
+            return False
+        data = gzip.compress(json.dumps(self.capture(bot), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        write_atomic(self.path, data)
+        self._saved_at = now
+        log.debug("체크포인트 저장: %s (%dB)", self.path, len(data))
+        return True
+
+    def load(self):
+        """저장된 상태. 없거나 읽을 수 없거나 오래됐으면 None"""
+        try:
+            with gzip.open(self.path, "rb") as f:
+                state = json.loads(f.read().decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning(f"체크포인트를 읽을 수 없어 무시합니다 ({self.path}): {e}")
+            return None
+        if state.get("version") != CHECKPOINT_VERSION:
+            return None
+        if time.time() - state.get("saved_at", 0) > self.max_age:
+            log.info("체크포인트가 오래되어 무시합니다.")
+            return None
+        return state
+
+    def restore(self, bot, state=None):
+        """
+        저장된 상태를 봇에 반영. 세션 쿠키로 로그인 상태까지 복원했으면 True (False 면 로그인 필요).
+        다른 계정/사이트의 체크포인트는 쓰지 않습니다.
+        """
+        configured = self.configured = watch_settings(bot)
+        state = state if state is not None else self.load()
+        if not state:
+            return False
+        if state.get("account") != bot.username or state.get("reservation_url") != bot.reservation_url:
+            log.info("다른 계정/사이트의 체크포인트라 무시합니다.")
+            return False
+
+        bot.booked.update(state.get("booked", {}))
+        bot.attempts.update(state.get("attempts", {}))
+        settings = state.get("settings")
+        if settings and settings != state.get("configured"):
+            if state.get("configured") == configured:
+                # 제어 API 로 바꾼 감시 설정 이어받기
+                bot.user_dates = settings["user_dates"]
+                bot.start_hour = settings["start_hour"]
+                bot.end_hour = settings["end_hour"]
+                bot.monitor_interval = settings["monitor_interval"]
+            else:
+                log.info("감시 설정이 바뀌어 체크포인트의 (제어 API 로 바꾼) 설정은 쓰지 않습니다.")
+        bot.user_dates = [date for date in bot.user_dates if date not in bot.booked]
+        if bot.calendar_poller is not None and state.get("calendar"):
+            bot.calendar_poller.restore(state["calendar"])
+        if bot.prefetcher is not None:
+            bot.prefetcher.done.update(state.get("prefetch_done", []))
+        age = time.time() - state["saved_at"]
+        log.info(f"체크포인트 복원 ({age:.0f}초 전): 감시 날짜 {bot.user_dates}, 예약 완료 {sorted(bot.booked)}")
+
+        cookies = state.get("cookies")
+        if not cookies or age > self.cookie_max_age:
+            return False
+        return bot.resume_session(cookies)
+
+    def clear(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,255 @@
+import time
+
+_STARTED = time.perf_counter()
+
+import os
+import sys
+import argparse
+
+# 하나로 합친 실행 진입점.
+# main.py(하드코딩된 main())와 main_test.py(--test/--visible)가 따로 자라면서, 카카오 테스트 메시지나
+# 픽스처 파싱처럼 브라우저가 필요 없는 명령도 selenium 부터 전부 import 했습니다.
+# 이 파일은 표준 라이브러리만 import 하고, 무거운 모듈(selenium, requests, websocket, 봇 본체)은
+# 각 하위 명령 함수 안에서 필요할 때만 import 합니다. cron/헬스체크에서 자주 부르는 notify, parse 는
+# 봇 모듈을 건드리지 않습니다. main_test.py 는 이제 이 파일의 run/test 로 넘기는 래퍼일 뿐입니다.
+#
+#   python cli.py run [--snipe|--agent|--tabs] ...   실제 예약 실행 (main.py 와 같은 옵션)
+#   python cli.py test                               로컬 픽스처 서버에 대고 실행
+#   python cli.py bench {driver,http,cdp,startup}    벤치마크
+#   python cli.py notify [DATE TIME] [--fail]        카카오 테스트 메시지
+#   python cli.py parse {calendar,tee} FILE          저장한 HTML 파싱 결과 출력
+#   python cli.py warmup                             chromedriver 경로 캐시/디스크 캐시 준비
+#   python cli.py broadcast SUBS.json                새 슬롯을 구독자에게 알림 (예약 안 함, 브라우저 없음)
+#   python cli.py broadcast --fixture-check          픽스처 서버에서 알림이 나가는지 확인
+#   python cli.py ledger [resolve DATE booked|failed] 결과 불명 예약 목록 / 확인한 결과로 정리
+#
+# --timing 을 주면 명령을 시작하기까지(인자 해석 + 그 명령의 import) 걸린 시간을 stderr 로 출력하고,
+# --check 를 주면 import 까지만 하고 실행하지 않습니다. bench startup 이 이 둘로 명령별 시작 시간을 잽니다.
+
+
+def run_options(args):
+    """run/test 인자를 main.main() 키워드 인자로"""
+    return dict(snipe=args.snipe, agent=args.agent, tabs=args.tabs, profile=args.profile,
+                profile_dir=args.profile_dir, deterministic=args.cprofile, test=args.test, replay=args.replay,
+                time_scale=args.time_scale, capture=args.capture)
+
+
+def _run(args):
+    from main import main
+
+    main(**run_options(args))
+
+
+def _load_run(args):
+    import main  # noqa: F401  (selenium 포함 봇 전체)
+    return _run
+
+
+def _load_test(args):
+    import main  # noqa: F401
+    import fixture_server  # noqa: F401
+
+    def run(args):
+        args.test = True
+        _run(args)
+    return run
+
+
+def _load_bench(args):
+    if args.target == "driver":
+        from driver_pool import benchmark
+        return lambda args: benchmark(rounds=args.rounds, headless=not args.visible)
+    if args.target == "http":
+        from conditional_fetch import benchmark
+        from fixture_server import FixtureServer
+
+        def run(args):
+            if args.url:
+                benchmark(args.url, args.rounds)
+                return
+            with FixtureServer() as server:
+                benchmark(server.reservation_url, args.rounds)
+        return run
+    if args.target == "cdp":
+        from cdp_backend import benchmark
+        return lambda args: benchmark(args.rounds, headless=not args.visible)
+    return _bench_startup
+
+
+def _bench_startup(args):
+    """명령별로 새 인터프리터를 띄워 (인터프리터 시작 + import) 시간을 잽니다."""
+    import subprocess
+    import statistics
+
+    commands = [["notify", "--check"], ["parse", "calendar", os.devnull, "--check"], ["warmup", "--check"],
+                ["bench", "http", "--check"], ["run", "--check"]]
+    print(f"{'명령':<24} {'중앙값ms':>10} {'최대ms':>10}")
+    for command in commands:
+        samples = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), *command],
+                                    capture_output=True, text=True)
+            samples.append((time.perf_counter() - started) * 1000)
+            if result.returncode != 0:
+                break
+        name = " ".join(c for c in command if c not in ("--check", os.devnull))
+        if result.returncode != 0:
+            error = (result.stderr.strip().splitlines() or ["?"])[-1]
+            print(f"{name:<24} {'실패':>10}  {error}")
+            continue
+        print(f"{name:<24} {statistics.median(samples):>10.1f} {max(samples):>10.1f}")
+
+
+def _load_notify(args):
+    from kakao_send import send_kakao_message
+
+    def run(args):
+        ok = send_kakao_message(args.date, args.time, success=not args.fail)
+        print(f"테스트 메시지 전송 결과: {'성공' if ok else '실패'}")
+        return 0 if ok else 1
+    return run
+
+
+def _load_parse(args):
+    from slots import parse_calendar_html, parse_tee_sheet_html
+
+    def run(args):
+        with open(args.file, encoding=args.encoding) as f:
+            html = f.read()
+        items = parse_calendar_html(html) if args.kind == "calendar" else parse_tee_sheet_html(html)
+        for item in items:
+            print(item)
+        print(f"총 {len(items)}개", file=sys.stderr)
+    return run
+
+
+def _load_warmup(args):
+    from driver_pool import warmup
+    return lambda args: warmup(headless=not args.visible)
+
+
+def _load_broadcast(args):
+    import broadcaster
+    import conditional_fetch  # noqa: F401  (requests)
+
+    def run(args):
+        if args.fixture_check:
+            return 0 if broadcaster.fixture_check() else 1
+        if not args.subscriptions:
+            print("구독 목록 JSON 파일이 필요합니다", file=sys.stderr)
+            return 2
+        broadcaster.main(args.subscriptions, args.interval, args.workers, args.quiet_start, args.dry_run, args.test)
+    return run
+
+
+def _load_ledger(args):
+    from dotenv import dotenv_values
+    from ledger import BookingLedger
+
+    def run(args):
+        # main.py 와 같은 순서로 계정 결정 (.env 의 USERNAME → GOLF_USERNAME)
+        args.account = args.account or dotenv_values().get("USERNAME") or os.getenv("GOLF_USERNAME")
+        ledger = BookingLedger(args.path)
+        try:
+            if args.action == "resolve":
+                if not args.date or not args.status:
+                    print("resolve 에는 DATE 와 booked|failed 가 필요합니다", file=sys.stderr)
+                    return 2
+                if not args.account:
+                    print("--account 또는 .env 의 USERNAME(GOLF_USERNAME) 이 필요합니다", file=sys.stderr)
+                    return 1
+                count = ledger.resolve(args.account, args.date, args.status)
+                print(f"{args.account} {args.date} 결과 불명 {count}건을 {args.status} 로 정리했습니다")
+                return 0 if count else 1
+            for account, date, minutes, course, updated_at in ledger.unresolved(args.account):
+                print(f"{account} {date} {minutes // 60:02d}:{minutes % 60:02d} 코스{course} "
+                      f"({time.strftime('%m-%d %H:%M', time.localtime(updated_at))})")
+        finally:
+            ledger.close()
+    return run
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='골프장 예약 자동화')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--timing', action='store_true', help='명령 시작까지 걸린 시간을 stderr 로 출력')
+    common.add_argument('--check', action='store_true', help='필요한 모듈 import 까지만 하고 종료')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_run_options(p):
+        p.add_argument('--snipe', action='store_true', help='이미 열린 날짜의 취소분만 짧은 주기로 확인합니다')
+        p.add_argument('--agent', action='store_true', help='브라우저 안에서 감시/신청까지 처리하는 에이전트를 사용합니다')
+        p.add_argument('--tabs', action='store_true', help='Chrome 하나에서 날짜별 탭으로 감시합니다')
+        p.add_argument('--profile', type=int, nargs='?', const=10, default=0, metavar='N',
+                       help='감시 주기 N번(기본 10)을 프로파일링하고 요약표/플레임 그래프용 파일을 남깁니다')
+        p.add_argument('--profile-dir', default='profile', help='프로파일 결과 디렉터리')
+        p.add_argument('--cprofile', action='store_true', help='샘플링과 함께 cProfile 결과(cycles.prof)도 저장합니다')
+        p.add_argument('--capture', metavar='HAR', help='실행 중 요청/응답을 타이밍과 함께 HAR 파일로 기록합니다')
+        p.add_argument('--replay', metavar='HAR', help='기록한 HAR 파일을 재생하는 로컬 서버에 대고 실행합니다')
+        p.add_argument('--time-scale', type=float, default=1.0, help='재생 속도 배율 (1.0=원래 지연, 0=지연 없음)')
+
+    p = sub.add_parser('run', parents=[common], help='예약 실행')
+    add_run_options(p)
+    p.add_argument('--test', action='store_true', help='로컬 픽스처 서버에 대고 실행합니다')
+    p.set_defaults(load=_load_run)
+
+    p = sub.add_parser('test', parents=[common], help='로컬 픽스처 서버에 대고 실행')
+    add_run_options(p)
+    p.set_defaults(load=_load_test)
+
+    p = sub.add_parser('bench', parents=[common], help='벤치마크')
+    p.add_argument('target', choices=['driver', 'http', 'cdp', 'startup'])
+    p.add_argument('--rounds', type=int, default=5)
+    p.add_argument('--url', help='http: 달력 주소 (생략하면 로컬 픽스처 서버)')
+    p.add_argument('--visible', action='store_true', help='브라우저를 화면에 표시합니다')
+    p.set_defaults(load=_load_bench)
+
+    p = sub.add_parser('notify', parents=[common], help='카카오 테스트 메시지 전송')
+    p.add_argument('date', nargs='?', default=time.strftime('%Y%m%d'))
+    p.add_argument('time', nargs='?', default='10:30')
+    p.add_argument('--fail', action='store_true', help='예약 실패 메시지로 전송')
+    p.set_defaults(load=_load_notify)
+
+    p = sub.add_parser('parse', parents=[common], help='저장한 달력/시간표 HTML 파싱')
+    p.add_argument('kind', choices=['calendar', 'tee'])
+    p.add_argument('file')
+    p.add_argument('--encoding', default='utf-8')
+    p.set_defaults(load=_load_parse)
+
+    p = sub.add_parser('warmup', parents=[common], help='chromedriver 경로 캐시/디스크 캐시 준비')
+    p.add_argument('--visible', action='store_true', help='브라우저를 화면에 표시합니다')
+    p.set_defaults(load=_load_warmup)
+
+    p = sub.add_parser('broadcast', parents=[common], help='새로 열린 슬롯을 구독자에게 카카오로 알림')
+    p.add_argument('subscriptions', nargs='?', help='구독 목록 JSON 파일')
+    p.add_argument('--interval', type=float, default=2.0, help='폴링 주기(초)')
+    p.add_argument('--workers', type=int, default=8, help='동시 전송 스레드 수')
+    p.add_argument('--quiet-start', action='store_true', help='시작 시 이미 열려 있던 슬롯은 알리지 않음')
+    p.add_argument('--dry-run', action='store_true', help='전송하지 않고 메시지만 출력')
+    p.add_argument('--test', action='store_true', help='로컬 픽스처 서버에서 실행')
+    p.add_argument('--fixture-check', action='store_true', help='픽스처 서버에서 알림이 나가는지만 확인')
+    p.set_defaults(load=_load_broadcast)
+
+    p = sub.add_parser('ledger', parents=[common], help='결과 불명 예약 목록 / 확인한 결과로 정리')
+    p.add_argument('action', nargs='?', choices=['list', 'resolve'], default='list')
+    p.add_argument('date', nargs='?', help='resolve: 날짜 (YYYYMMDD)')
+    p.add_argument('status', nargs='?', choices=['booked', 'failed'], help='resolve: 사이트에서 확인한 결과')
+    p.add_argument('--account', help='계정 (기본: .env 의 USERNAME, 없으면 GOLF_USERNAME)')
+    p.add_argument('--path', default=os.getenv("GOLF_LEDGER_PATH", "booking_ledger.sqlite3"), help='원장 파일')
+    p.set_defaults(load=_load_ledger)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    handler = args.load(args)
+    if args.timing or args.check:
+        print(f"{args.command} 시작까지 {(time.perf_counter() - _STARTED) * 1000:.1f}ms", file=sys.stderr)
+    if args.check:
+        return 0
+    return handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+import re
+import time
+import hashlib
+import threading
+from collections import deque
+from urllib.parse import urljoin, urlsplit
+from slots import CalendarDay, parse_calendar_html, parse_tee_sheet_html
+from page_fetch import FetchResult, tee_sheet_url
+from transport import get_transport
+from botlog import get_logger
+import metrics
+
+log = get_logger("conditional_fetch")
+
+# 브라우저 없이 달력(reservation02.asp)을 HTTP 로 폴링하는 경량 경로.
+# 달력 페이지는 ~1600줄(약 78KB)인데 실제로 필요한 것은 뒤쪽의 <ul class="cal_new"> 달력 표 하나뿐입니다.
+#
+# - Accept-Encoding: gzip 으로 받아 전송량을 줄입니다.
+# - 서버가 ETag / Last-Modified 를 주면 다음 요청에 If-None-Match / If-Modified-Since 를 붙여 304 를 받습니다.
+# - 그렇지 않으면 본문을 스트리밍으로 읽으며 달력 표가 끝나는 </ul> 에서 읽기를 멈춥니다.
+#   남은 양이 drain_limit 이하이면 연결을 재사용하려고 나머지를 버리며 읽고, 아니면 연결을 닫습니다.
+# - 달력 부분의 해시가 이전과 같으면 다시 파싱하지 않습니다.
+# 폴링마다 전송 바이트 / 압축 해제 후 바이트 / CPU 시간을 기록하고 metrics 로도 내보냅니다.
+
+CALENDAR_START = b'<ul class="cal_new">'
+CALENDAR_END = b"</ul>"
+
+_CHARSET_RE = re.compile(r"charset=([\w-]+)", re.I)
+
+
+class LoginRequired(RuntimeError):
+    """세션이 없거나 만료되어 달력/시간표 대신 로그인 페이지를 받았음"""
+
+
+class CalendarPoll:
+    """달력 폴링 한 번의 결과"""
+    __slots__ = ("status", "days", "changed", "not_modified", "stopped_early", "login_required",
+                 "wire_bytes", "body_bytes", "cpu_ms", "elapsed_ms")
+
+    def __init__(self, status, days=None, changed=False, not_modified=False, stopped_early=False,
+                 login_required=False, wire_bytes=0, body_bytes=0, cpu_ms=0.0, elapsed_ms=0.0):
+        self.status = status
+        self.days = days
+        self.changed = changed
+        self.not_modified = not_modified
+        self.stopped_early = stopped_early
+        self.login_required = login_required
+        self.wire_bytes = wire_bytes
+        self.body_bytes = body_bytes
+        self.cpu_ms = cpu_ms
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self):
+        return self.days is not None and not self.login_required
+
+    @property
+    def dates(self):
+        return [day.date_text for day in self.days or ()]
+
+    def __repr__(self):
+        state = "304" if self.not_modified else ("변경" if self.changed else "동일")
+        return (f"달력 {self.status} {state} 전송 {self.wire_bytes}B / 본문 {self.body_bytes}B "
+                f"CPU {self.cpu_ms:.2f}ms 전체 {self.elapsed_ms:.1f}ms{' (조기 종료)' if self.stopped_early else ''}")
+
+
+def scan_calendar(chunks):
+    """
+    바이트 조각들을 읽으며 달력 구간(CALENDAR_START ~ CALENDAR_END)을 찾습니다.
+    (달력 구간 또는 None, 읽은 바이트 수, 끝까지 읽지 않고 멈췄는지, 구간을 못 찾았을 때의 전체 본문) 을 반환합니다.
+    """
+    buffer = bytearray()
+    start = -1
+    consumed = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        consumed += len(chunk)
+        # 조각 경계에 걸친 표시 문자열도 찾도록 직전 꼬리부터 검색
+        offset = max(len(buffer) - len(CALENDAR_START), 0)
+        buffer += chunk
+        if start < 0:
+            start = buffer.find(CALENDAR_START, offset)
+            if start < 0:
+                continue
+            del buffer[:start]
+            start = 0
+            offset = 0
+        end = buffer.find(CALENDAR_END, max(offset, len(CALENDAR_START)))
+        if end >= 0:
+            return bytes(buffer[:end + len(CALENDAR_END)]), consumed, True, None
+    if start >= 0:
+        return bytes(buffer), consumed, False, None
+    return None, consumed, False, bytes(buffer)
+
+
+class CalendarPoller:
+    """
+    달력 페이지 HTTP 폴러.
+    세션 쿠키는 감시 스레드에서 sync_cookies(driver) 로 브라우저에서 복사해 옵니다.
+    """
+
+    def __init__(self, reservation_url, chunk_size=8192, drain_limit=16384, cookie_refresh=60, keep=200):
+        self.reservation_url = reservation_url
+        self.chunk_size = chunk_size
+        self.drain_limit = drain_limit
+        self.cookie_refresh = cookie_refresh
+        self.history = deque(maxlen=keep)
+        self.days = None
+        self._etag = None
+        self._last_modified = None
+        self._digest = None
+        self._cookies_synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _session(self):
+        parts = urlsplit(self.reservation_url)
+        return get_transport().session(f"{parts.scheme}://{parts.netloc}")
+
+    def sync_cookies(self, driver, force=False):
+        """브라우저 세션 쿠키를 HTTP 세션으로 복사 (cookie_refresh 초마다)"""
+        now = time.monotonic()
+        if not force and now - self._cookies_synced_at < self.cookie_refresh:
+            return
+        session = self._session()
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"),
+                                path=cookie.get("path", "/"))
+        self._cookies_synced_at = now
+
+    def snapshot(self):
+        """체크포인트용 상태 (검증자, 달력 지문, 마지막 파싱 결과)"""
+        with self._lock:
+            return {
+                "etag": self._etag,
+                "last_modified": self._last_modified,
+                "digest": self._digest.hex() if self._digest else None,
+                "days": [day.as_tuple() for day in self.days] if self.days is not None else None,
+            }
+
+    def restore(self, snapshot):
+        with self._lock:
+            if snapshot.get("days") is None:
+                # 파싱 결과 없이 검증자만 복원하면 304 를 받아도 돌려줄 달력이 없습니다.
+                return
+            self.days = [CalendarDay(*values) for values in snapshot["days"]]
+            self._etag = snapshot.get("etag")
+            self._last_modified = snapshot.get("last_modified")
+            self._digest = bytes.fromhex(snapshot["digest"]) if snapshot.get("digest") else None
+
+    def _conditional_headers(self):
+        headers = {"Accept-Encoding": "gzip"}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+        return headers
+
+    def _finish(self, response, stopped_early):
+        """조기 종료한 응답 정리. 남은 양이 적으면 읽어 버리고 연결을 풀로 돌려보냅니다."""
+        raw = response.raw
+        if not stopped_early:
+            response.close()
+            return
+        length = response.headers.get("Content-Length")
+        if length is not None and int(length) - raw.tell() <= self.drain_limit:
+            raw.drain_conn()
+            raw.release_conn()
+        else:
+            response.close()
+
+    def poll(self):
+        """달력 한 번 조회. 변경이 없으면 이전 파싱 결과(days)를 그대로 돌려줍니다."""
+        cpu_started = time.thread_time()
+        started = time.perf_counter()
+        with self._lock:
+            response = get_transport().get(self.reservation_url, headers=self._conditional_headers(), stream=True,
+                                           allow_redirects=False)
+            status = response.status_code
+            if status == 304:
+                response.close()
+                return self._record(CalendarPoll(status, self.days, not_modified=True,
+                                                 wire_bytes=response.raw.tell()), cpu_started, started)
+
+            section, body_bytes, stopped_early, whole = scan_calendar(response.iter_content(self.chunk_size))
+            wire_bytes = response.raw.tell()
+            self._finish(response, stopped_early)
+            wire_bytes = max(wire_bytes, response.raw.tell())
+            match = _CHARSET_RE.search(response.headers.get("Content-Type", ""))
+            encoding = match.group(1) if match else "euc-kr"
+
+            if section is None:
+                text = (whole or b"").decode(encoding, "replace")
+                login_required = status in (301, 302) or FetchResult(status, text).login_required
+                return self._record(CalendarPoll(status, None, login_required=login_required,
+                                                 wire_bytes=wire_bytes, body_bytes=body_bytes),
+                                    cpu_started, started)
+
+            # 달력을 받았을 때만 검증자 갱신 (로그인 페이지의 ETag 로 304 를 받으면 안 됨)
+            self._etag = response.headers.get("ETag")
+            self._last_modified = response.headers.get("Last-Modified")
+            digest = hashlib.blake2b(section, digest_size=16).digest()
+            changed = digest != self._digest or self.days is None
+            if changed:
+                self.days = parse_calendar_html(section.decode(encoding, "replace"))
+                self._digest = digest
+            return self._record(CalendarPoll(status, self.days, changed=changed, stopped_early=stopped_early,
+                                             wire_bytes=wire_bytes, body_bytes=body_bytes),
+                                cpu_started, started)
+
+    def _record(self, poll, cpu_started, started):
+        poll.cpu_ms = (time.thread_time() - cpu_started) * 1000
+        poll.elapsed_ms = (time.perf_counter() - started) * 1000
+        self.history.append(poll)
+        metrics.CALENDAR_POLL_BYTES.inc(poll.wire_bytes, kind="wire")
+        metrics.CALENDAR_POLL_BYTES.inc(poll.body_bytes, kind="body")
+        metrics.CALENDAR_POLL_CPU.observe(poll.cpu_ms / 1000)
+        log.debug("%r", poll)
+        return poll
+
+    def summary(self):
+        """최근 폴링의 평균 전송 바이트 / 본문 바이트 / CPU / 304·조기 종료 비율"""
+        polls = list(self.history)
+        if not polls:
+            return {"polls": 0}
+        n = len(polls)
+        return {
+            "polls": n,
+            "avg_wire_bytes": sum(p.wire_bytes for p in polls) / n,
+            "avg_body_bytes": sum(p.body_bytes for p in polls) / n,
+            "avg_cpu_ms": sum(p.cpu_ms for p in polls) / n,
+            "avg_elapsed_ms": sum(p.elapsed_ms for p in polls) / n,
+            "not_modified_ratio": sum(1 for p in polls if p.not_modified) / n,
+            "stopped_early_ratio": sum(1 for p in polls if p.stopped_early) / n,
+            "parsed_ratio": sum(1 for p in polls if p.changed) / n,
+        }
+
+
+class HttpPage:
+    """
+    브라우저 없이 HTTP 만으로 동작하는 페이지 (cdp_backend.SeleniumPage / CdpPage 와 같은 읽기 메서드).
+    달력은 CalendarPoller 로, 시간표는 submitDate POST 로 읽습니다. 신청(book)은 지원하지 않습니다.
+    """
+
+    LOGIN_ACTION = "/08member/login_ok.asp"
+
+    def __init__(self, reservation_url):
+        self.poller = CalendarPoller(reservation_url)
+
+    def login(self, reservation_url, username, password):
+        """
+        LoginForm 과 같은 필드로 로그인 (세션 쿠키는 공용 Transport 세션에 남습니다).
+        로그인 응답만으로는 성공 여부를 알 수 없어 달력을 한 번 읽어 확인하고, 실패하면 LoginRequired.
+        """
+        get_transport().post(urljoin(reservation_url, self.LOGIN_ACTION),
+                             data={"UserID": username, "Password": password})
+        poll = self.poller.poll()
+        if not poll.ok:
+            raise LoginRequired(f"로그인 후에도 달력을 읽지 못했습니다 (status={poll.status})")
+
+    def sync_cookies(self, driver):
+        """로그인 대신 브라우저 세션을 그대로 빌려 쓸 때"""
+        self.poller.sync_cookies(driver, force=True)
+
+    def read_calendar(self, reservation_url):
+        poll = self.poller.poll()
+        if poll.login_required:
+            raise LoginRequired(f"달력 대신 로그인 페이지를 받았습니다 (status={poll.status})")
+        if not poll.ok:
+            raise RuntimeError(f"달력을 읽지 못했습니다 (status={poll.status})")
+        return poll.days
+
+    def read_tee_sheet(self, reservation_url, date):
+        """시간표 슬롯. 로그인 페이지나 오류 페이지를 빈 시간표로 읽지 않도록 예외를 냅니다."""
+        response = get_transport().post(tee_sheet_url(reservation_url), data={"submitDate": date},
+                                        headers={"Referer": reservation_url, "Accept-Encoding": "gzip"},
+                                        allow_redirects=False)
+        match = _CHARSET_RE.search(response.headers.get("Content-Type", ""))
+        text = response.content.decode(match.group(1) if match else "euc-kr", "replace")
+        if response.status_code in (301, 302) or FetchResult(response.status_code, text).login_required:
+            raise LoginRequired(f"{date} 시간표 대신 로그인 페이지를 받았습니다 (status={response.status_code})")
+        if response.status_code != 200:
+            raise RuntimeError(f"{date} 시간표를 읽지 못했습니다 (status={response.status_code})")
+        return parse_tee_sheet_html(text)
+
+    def close(self):
+        pass
+
+
+def benchmark(reservation_url, count=20):
+    """
+    매번 전체 페이지를 받아 파싱하는 방식과 CalendarPoller 를 비교.
+    (전체 방식 요약, 폴러 요약) 을 반환합니다.
+    """
+    full = []
+    for _ in range(count):
+        cpu_started = time.thread_time()
+        started = time.perf_counter()
+        response = get_transport().get(reservation_url, headers={"Accept-Encoding": "identity"})
+        parse_calendar_html(response.content.decode("utf-8", "replace"))
+        full.append(((time.thread_time() - cpu_started) * 1000, (time.perf_counter() - started) * 1000,
+                     len(response.content)))
+    poller = CalendarPoller(reservation_url)
+    for _ in range(count):
+        poller.poll()
+
+    baseline = {
+        "polls": count,
+        "avg_wire_bytes": sum(b for _, _, b in full) / count,
+        "avg_cpu_ms": sum(c for c, _, _ in full) / count,
+        "avg_elapsed_ms": sum(e for _, e, _ in full) / count,
+    }
+    optimized = poller.summary()
+    print(f"전체 받기+파싱: 폴링당 {baseline['avg_wire_bytes']:.0f}B, CPU {baseline['avg_cpu_ms']:.2f}ms, "
+          f"{baseline['avg_elapsed_ms']:.1f}ms")
+    print(f"조건부/압축/조기 종료: 폴링당 {optimized['avg_wire_bytes']:.0f}B, CPU {optimized['avg_cpu_ms']:.2f}ms, "
+          f"{optimized['avg_elapsed_ms']:.1f}ms (304 {optimized['not_modified_ratio']:.0%}, "
+          f"조기 종료 {optimized['stopped_early_ratio']:.0%}, 파싱 {optimized['parsed_ratio']:.0%})")
+    return baseline, optimized
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='달력 HTTP 폴링 전송량/CPU 비교')
+    parser.add_argument('url', nargs='?', help='달력 주소 (생략하면 로컬 픽스처 서버)')
+    parser.add_argument('--count', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.url:
+        benchmark(args.url, args.count)
+    else:
+        from fixture_server import FixtureServer
+
+        with FixtureServer() as server:
+            benchmark(server.reservation_url, args.count)
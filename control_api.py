@@ -0,0 +1,272 @@
+import re
+import os
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from botlog import get_logger
+
+log = get_logger("control_api")
+
+# 실행 중인 ReservationBot 의 감시 조건을 재시작 없이 바꾸는 로컬 HTTP API.
+# 프로세스를 재시작하면 띄워 둔 브라우저와 로그인 세션을 잃으므로, 날짜/시간대/주기/일시정지를 여기서 바꿉니다.
+#
+# 요청은 바로 적용하지 않고 대기열에 쌓았다가 감시 주기 사이에 한꺼번에 적용합니다
+# (주기 도중에 날짜 목록이나 시간대가 반쯤 바뀌는 일이 없도록).
+#
+#   GET  /status                          현재 설정과 대기 중인 변경 수
+#   POST /dates    {"add": [...], "remove": [...]}
+#   POST /hours    {"start_hour": 8, "end_hour": 11}
+#   POST /interval {"seconds": 3}
+#   POST /pause, POST /resume
+#
+# GOLF_CONTROL_TOKEN 이 설정되어 있으면 X-Control-Token 헤더가 같아야 합니다.
+# 실행 중 변경을 반영하지 못하는 모드(--agent, --profile)에서는 변경 요청을 409 로 거절합니다.
+
+DEFAULT_PORT = 8765
+
+_DATE_RE = re.compile(r"^\d{8}$")
+
+
+class ControlError(ValueError):
+    """잘못된 제어 요청 (HTTP 400)"""
+
+
+class ControlConflict(ControlError):
+    """현재 실행 모드가 변경을 반영하지 않음 (HTTP 409)"""
+
+
+class BotController:
+    """
+    변경 요청 대기열. HTTP 스레드는 submit() 으로 넣기만 하고,
+    감시 스레드가 주기 사이에 apply_pending() 을 불러 한 번에 반영합니다.
+    """
+
+    def __init__(self, bot, live=True):
+        self.bot = bot
+        # False 면 현재 모드가 apply_pending() 을 부르지 않으므로 변경 요청을 받지 않습니다.
+        self.live = live
+        self.paused = False
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def submit(self, op, payload):
+        if payload is None:
+            payload = {}
+        if not isinstance(payload, dict):
+            raise ControlError("요청 본문은 JSON 객체여야 합니다")
+        change = self._validate(op, payload)
+        if not self.live:
+            raise ControlConflict("현재 실행 모드에서는 실행 중 설정 변경을 반영할 수 없습니다")
+        with self._lock:
+            self._pending.append(change)
+            pending = len(self._pending)
+        self._wakeup.set()
+        return pending
+
+    def _validate(self, op, payload):
+        if op == "dates":
+            add = [str(d) for d in payload.get("add", [])]
+            remove = [str(d) for d in payload.get("remove", [])]
+            bad = [d for d in add + remove if not _DATE_RE.match(d)]
+            if bad:
+                raise ControlError(f"날짜 형식(YYYYMMDD)이 아닙니다: {bad}")
+            return op, {"add": add, "remove": remove}
+        if op == "hours":
+            try:
+                start, end = int(payload["start_hour"]), int(payload["end_hour"])
+            except (KeyError, TypeError, ValueError):
+                raise ControlError("start_hour, end_hour 가 필요합니다")
+            if not 0 <= start < end <= 24:
+                raise ControlError(f"잘못된 시간대: {start}~{end}")
+            return op, {"start_hour": start, "end_hour": end}
+        if op == "interval":
+            try:
+                seconds = float(payload["seconds"])
+            except (KeyError, TypeError, ValueError):
+                raise ControlError("seconds 가 필요합니다")
+            if seconds <= 0:
+                raise ControlError("seconds 는 0보다 커야 합니다")
+            return op, {"seconds": seconds}
+        if op in ("pause", "resume"):
+            return op, {}
+        raise ControlError(f"알 수 없는 요청: {op}")
+
+    def apply_pending(self):
+        """대기 중인 변경을 모두 반영하고 반영한 개수를 반환 (감시 스레드에서 호출)"""
+        with self._lock:
+            changes, self._pending = self._pending, []
+            self._wakeup.clear()
+        if not changes:
+            return 0
+        dates = list(self.bot.user_dates)
+        start_hour, end_hour = self.bot.start_hour, self.bot.end_hour
+        interval = self.bot.monitor_interval
+        paused = self.paused
+        for op, payload in changes:
+            if op == "dates":
+                dates = [d for d in dates if d not in payload["remove"]]
+                dates += [d for d in payload["add"] if d not in dates]
+            elif op == "hours":
+                start_hour, end_hour = payload["start_hour"], payload["end_hour"]
+            elif op == "interval":
+                interval = payload["seconds"]
+            else:
+                paused = op == "pause"
+        self.bot.user_dates = dates
+        self.bot.start_hour, self.bot.end_hour = start_hour, end_hour
+        self.bot.monitor_interval = interval
+        self.paused = paused
+        log.info(f"설정 변경 {len(changes)}건 반영: 날짜 {dates}, {start_hour}~{end_hour}시, "
+                 f"주기 {interval}초{' (일시정지)' if paused else ''}")
+        return len(changes)
+
+    def wait(self, timeout):
+        """주기 사이 대기. 변경 요청이 들어오면 바로 깨어납니다."""
+        self._wakeup.wait(timeout)
+
+    def status(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "dates": list(self.bot.user_dates),
+            "start_hour": self.bot.start_hour,
+            "end_hour": self.bot.end_hour,
+            "interval": self.bot.monitor_interval,
+            "paused": self.paused,
+            "pending": pending,
+            "live": self.live,
+        }
+
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    server_version = "GolfControl"
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.address_string(), format % args)
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        token = self.server.token
+        if token and self.headers.get("X-Control-Token") != token:
+            self._reply(403, {"error": "forbidden"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if urlsplit(self.path).path.strip("/") != "status":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, self.server.controller.status())
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        op = urlsplit(self.path).path.strip("/")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ControlError("잘못된 Content-Length")
+            payload = json.loads(self.rfile.read(length).decode("utf-8")) if length else {}
+            if not isinstance(payload, dict):
+                raise ControlError("요청 본문은 JSON 객체여야 합니다")
+            pending = self.server.controller.submit(op, payload)
+        except ControlConflict as e:
+            self._reply(409, {"error": str(e)})
+            return
+        except ValueError as e:
+            # ControlError, 잘못된 Content-Length, JSONDecodeError, UnicodeDecodeError 모두 ValueError
+            self._reply(400, {"error": str(e)})
+            return
+        self._reply(202, {"queued": op, "pending": pending})
+
+
+class ControlServer:
+    """BotController 를 127.0.0.1:port 로 노출하는 백그라운드 서버"""
+
+    def __init__(self, controller, port=DEFAULT_PORT, host="127.0.0.1", token=None):
+        self.controller = controller
+        self.httpd = ThreadingHTTPServer((host, port), _ControlHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.controller = controller
+        self.httpd.token = token if token is not None else os.getenv("GOLF_CONTROL_TOKEN")
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self._thread.start()
+            log.info(f"제어 API: {self.url}")
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+
+
+def send(command, payload=None, port=DEFAULT_PORT, token=None):
+    """제어 API 호출 (명령행 클라이언트)"""
+    import urllib.request
+    import urllib.error
+
+    url = f"http://127.0.0.1:{port}/{command}"
+    data = None if command == "status" else json.dumps(payload or {}).encode("utf-8")
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    token = token or os.getenv("GOLF_CONTROL_TOKEN")
+    if token:
+        request.add_header("X-Control-Token", token)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b"{}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='실행 중인 예약 봇 제어')
+    parser.add_argument('--port', type=int, default=int(os.getenv("GOLF_CONTROL_PORT", DEFAULT_PORT)))
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status')
+    add_parser = sub.add_parser('add', help='감시 날짜 추가')
+    add_parser.add_argument('dates', nargs='+')
+    remove_parser = sub.add_parser('remove', help='감시 날짜 제거')
+    remove_parser.add_argument('dates', nargs='+')
+    hours_parser = sub.add_parser('hours', help='시간대 변경')
+    hours_parser.add_argument('start_hour', type=int)
+    hours_parser.add_argument('end_hour', type=int)
+    interval_parser = sub.add_parser('interval', help='감시 주기(초) 변경')
+    interval_parser.add_argument('seconds', type=float)
+    sub.add_parser('pause')
+    sub.add_parser('resume')
+    args = parser.parse_args()
+
+    if args.command == 'add':
+        result = send('dates', {"add": args.dates}, args.port)
+    elif args.command == 'remove':
+        result = send('dates', {"remove": args.dates}, args.port)
+    elif args.command == 'hours':
+        result = send('hours', {"start_hour": args.start_hour, "end_hour": args.end_hour}, args.port)
+    elif args.command == 'interval':
+        result = send('interval', {"seconds": args.seconds}, args.port)
+    else:
+        result = send(args.command, port=args.port)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
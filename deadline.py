@@ -0,0 +1,112 @@
+import time
+from contextlib import contextmanager
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from botlog import get_logger
+import metrics
+
+log = get_logger("deadline")
+
+# 감시 주기 / 날짜별 예약 시도의 시간 예산.
+# 기존에는 모든 단계가 공용 WebDriverWait(driver, 10) 을 써서, 응답 없는 시간표 하나가
+# 대기마다 10초씩 여러 번 잡아먹는 동안 다른 감시 날짜는 확인하지 못했습니다.
+# Deadline 은 끝나는 시각(monotonic)을 들고 다니며, child() 로 만든 하위 예산은 상위 예산을 넘지 않습니다.
+# DeadlineWait 는 WebDriverWait 처럼 until()/until_not() 을 제공하므로
+# 기존 헬퍼(reserve_for_two_members 등)에 wait 대신 그대로 넘길 수 있습니다.
+# 단, 신청하기를 누른 뒤의 팝업 대기에는 적용하지 않습니다 (main.BOOKING_RESULT_TIMEOUT).
+
+
+class DeadlineExceeded(TimeoutException):
+    """예산 초과. TimeoutException 이므로 기존 대기 실패 처리에도 그대로 걸립니다."""
+
+    def __init__(self, deadline, step):
+        super().__init__(f"{deadline.name or '작업'} 시간 예산 {deadline.budget:.1f}초 초과 ({step})")
+        self.deadline = deadline
+        self.step = step
+
+
+class Deadline:
+    """seconds 초 뒤에 끝나는 예산. parent 가 있으면 parent 보다 늦게 끝나지 않습니다."""
+
+    def __init__(self, seconds, name="", scope="cycle", parent=None):
+        now = time.monotonic()
+        expires = now + seconds
+        if parent is not None:
+            expires = min(expires, parent.expires)
+        self.name = name
+        self.scope = scope
+        self.started = now
+        self.expires = expires
+        self.budget = expires - now
+
+    def child(self, seconds, name="", scope="attempt"):
+        return Deadline(seconds, name, scope, parent=self)
+
+    def remaining(self):
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def check(self, step):
+        """이미 끝났으면 DeadlineExceeded"""
+        if self.expired:
+            raise DeadlineExceeded(self, step)
+
+    def wait(self, driver, cap=None, poll_frequency=0.2):
+        return DeadlineWait(driver, self, cap, poll_frequency)
+
+    @contextmanager
+    def page_loads(self, driver, restore=30):
+        """이 구간의 페이지 로드(click/get 이 기다리는 로딩)도 남은 예산 안에서 끊기도록"""
+        driver.set_page_load_timeout(max(self.remaining(), 0.5))
+        try:
+            yield self
+        finally:
+            driver.set_page_load_timeout(restore)
+
+    def report(self, error=None):
+        """초과를 로그와 metrics 에 남깁니다."""
+        metrics.DEADLINE_OVERRUNS.inc(scope=self.scope)
+        log.warning(f"{self.name or self.scope} 시간 예산 초과 ({self.elapsed():.1f}초/{self.budget:.1f}초)"
+                    f"{f': {error.step}' if isinstance(error, DeadlineExceeded) else ''}")
+
+
+class DeadlineWait:
+    """
+    WebDriverWait 대신 쓰는 대기. 한 번의 대기는 min(cap, 남은 예산) 초를 넘지 않고,
+    예산이 바닥나서 끝난 대기는 DeadlineExceeded 로 알립니다.
+    """
+
+    def __init__(self, driver, deadline, cap=None, poll_frequency=0.2):
+        self.driver = driver
+        self.deadline = deadline
+        self.cap = cap
+        self.poll_frequency = poll_frequency
+
+    def _wait(self):
+        self.deadline.check("대기 시작")
+        timeout = self.deadline.remaining()
+        if self.cap is not None:
+            timeout = min(timeout, self.cap)
+        return WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency)
+
+    def until(self, method, message=""):
+        try:
+            return self._wait().until(method, message)
+        except TimeoutException as e:
+            if self.deadline.expired and not isinstance(e, DeadlineExceeded):
+                raise DeadlineExceeded(self.deadline, message or getattr(method, "__name__", "대기")) from e
+            raise
+
+    def until_not(self, method, message=""):
+        try:
+            return self._wait().until_not(method, message)
+        except TimeoutException as e:
+            if self.deadline.expired and not isinstance(e, DeadlineExceeded):
+                raise DeadlineExceeded(self.deadline, message or getattr(method, "__name__", "대기")) from e
+            raise
@@ -0,0 +1,222 @@
+import os
+import time
+import queue
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from botlog import get_logger
+
+log = get_logger("driver_pool")
+
+# chromedriver 를 한 번만 띄워 두고, 미리 실행해 둔 Chrome 세션을 바로 넘겨주는 드라이버 풀.
+# webdriver.Chrome(options=...) 를 매번 새로 호출하면
+# chromedriver 경로 탐색(Selenium Manager) → chromedriver 실행 → Chrome 실행을 모두 기다려야 합니다.
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+# warmup 명령이 찾아 둔 chromedriver 경로 (다음 실행부터 경로 탐색을 건너뜀)
+DRIVER_PATH_CACHE = ".chromedriver_path"
+
+
+def build_chrome_options(headless=False, performance_log=False):
+    """
+    ReservationBot / DriverPool 에서 공통으로 쓰는 Chrome 옵션.
+    performance_log=True 면 Network 이벤트를 performance 로그로 남깁니다 (traffic_capture 용).
+    """
+    chrome_options = Options()
+    if performance_log:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+    return chrome_options
+
+
+def cached_driver_path():
+    try:
+        with open(DRIVER_PATH_CACHE, encoding="utf-8") as f:
+            path = f.read().strip()
+    except OSError:
+        return None
+    return path if path and os.path.exists(path) else None
+
+
+def resolve_driver_path(options=None):
+    """
+    Selenium Manager 로 chromedriver 경로 찾기.
+    Selenium 4.11+ 는 경로를 webdriver.Chrome 안(DriverFinder)에서만 찾으므로, 경로 없는 Service 를
+    직접 start() 하려면 먼저 찾아 둬야 합니다. (4.20 부터 DriverFinder 가 인스턴스 API 로 바뀜)
+    """
+    from selenium.webdriver.common.driver_finder import DriverFinder
+
+    options = options or Options()
+    if hasattr(DriverFinder, "get_path"):
+        return DriverFinder.get_path(Service(), options)
+    return DriverFinder(Service(), options).get_driver_path()
+
+
+class SharedService(Service):
+    """
+    여러 드라이버가 함께 쓰는 chromedriver 서비스.
+    이미 실행 중이면 start() 가 새 프로세스를 띄우지 않고,
+    driver.quit() 이 부르는 stop() 도 무시합니다. 종료는 shutdown() 으로 합니다.
+    """
+
+    def start(self):
+        process = getattr(self, "process", None)
+        if process is not None and process.poll() is None:
+            return
+        super().start()
+
+    def stop(self):
+        pass
+
+    def shutdown(self):
+        super().stop()
+
+
+class DriverPool:
+    """
+    미리 띄워 둔 Chrome 세션 풀.
+    acquire() 는 대기 중인 드라이버를 바로 돌려주고, 백그라운드에서 빈자리를 다시 채웁니다.
+    """
+
+    def __init__(self, size=1, headless=False, executable_path=None):
+        self.size = size
+        self.headless = headless
+        path = executable_path or cached_driver_path() or resolve_driver_path(build_chrome_options(headless))
+        self.service = SharedService(executable_path=path)
+        self.service.start()
+        self._idle = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._fill()
+
+    def _launch(self):
+        return webdriver.Chrome(service=self.service, options=build_chrome_options(self.headless))
+
+    def _fill(self):
+        with self._lock:
+            missing = self.size - self._idle.qsize() - self._pending
+            if self._closed or missing <= 0:
+                return
+            self._pending += missing
+        for _ in range(missing):
+            threading.Thread(target=self._launch_into_pool, daemon=True).start()
+
+    def _launch_into_pool(self):
+        try:
+            driver = self._launch()
+            if self._closed:
+                driver.quit()
+            else:
+                self._idle.put(driver)
+        except Exception as e:
+            log.warning(f"예비 드라이버 실행 실패: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def acquire(self, timeout=None):
+        """
+        (driver, wait) 반환. 대기 중인 드라이버가 없고 준비 중인 것도 없으면 바로 새로 띄웁니다.
+        """
+        try:
+            with self._lock:
+                waiting = self._pending > 0
+            driver = self._idle.get(timeout=timeout) if waiting else self._idle.get_nowait()
+        except queue.Empty:
+            driver = self._launch()
+        self._fill()
+        return driver, WebDriverWait(driver, 10)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
+        self.service.shutdown()
+
+
+def benchmark(rounds=3, headless=True):
+    """
+    드라이버 시작 시간 비교 (초).
+    - cold: webdriver.Chrome(options=...) 를 매번 새로 호출 (현재 방식)
+    - shared_service: chromedriver 는 재사용, Chrome 만 새로 실행
+    - pooled: 미리 띄워 둔 세션을 acquire
+    """
+    results = {"cold": [], "shared_service": [], "pooled": []}
+    for _ in range(rounds):
+        started = time.perf_counter()
+        driver = webdriver.Chrome(options=build_chrome_options(headless))
+        results["cold"].append(time.perf_counter() - started)
+        driver.quit()
+
+    pool = DriverPool(size=1, headless=headless)
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            driver = pool._launch()
+            results["shared_service"].append(time.perf_counter() - started)
+            driver.quit()
+
+        for _ in range(rounds):
+            # 빈자리가 다시 채워질 때까지 기다린 뒤 측정
+            while pool._idle.qsize() < pool.size:
+                time.sleep(0.1)
+            started = time.perf_counter()
+            driver, _ = pool.acquire()
+            results["pooled"].append(time.perf_counter() - started)
+            driver.quit()
+    finally:
+        pool.close()
+
+    for name, values in results.items():
+        print(f"{name:>15}: 평균 {sum(values) / len(values):.3f}초 (최소 {min(values):.3f}, 최대 {max(values):.3f})")
+    return results
+
+
+def warmup(headless=True):
+    """
+    예약 오픈 전에 실행: chromedriver 경로를 찾아 캐시하고, 바이너리를 한 번 실행해
+    디스크 캐시를 데워 둡니다. 걸린 시간을 출력합니다.
+    """
+    started = time.perf_counter()
+    path = resolve_driver_path(build_chrome_options(headless))
+    service = SharedService(executable_path=path)
+    service.start()
+    resolved = time.perf_counter() - started
+    with open(DRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+        f.write(path)
+    started = time.perf_counter()
+    driver = webdriver.Chrome(service=service, options=build_chrome_options(headless))
+    launched = time.perf_counter() - started
+    driver.quit()
+    service.shutdown()
+    print(f"chromedriver 준비 {resolved:.3f}초, Chrome 실행 {launched:.3f}초 (경로: {path})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='드라이버 풀 준비/벤치마크')
+    parser.add_argument('command', choices=['warmup', 'bench'])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--visible', action='store_true', help='브라우저를 화면에 표시합니다')
+    args = parser.parse_args()
+
+    if args.command == 'warmup':
+        warmup(headless=not args.visible)
+    else:
+        benchmark(rounds=args.rounds, headless=not args.visible)
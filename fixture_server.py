@@ -0,0 +1,165 @@
+import os
+import gzip
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from slots import parse_calendar_html
+from botlog import get_logger
+
+log = get_logger("fixture_server")
+
+# 실제 사이트 경로(.asp)를 저장해 둔 HTML(select_date.html / submit.html / login.html)로 연결하는 로컬 서버.
+# 파일 이름 그대로만 제공하는 정적 서버로는 main.py 의 흐름
+# (로그인 → 달력 → 날짜 POST → 시간표 → 신청 POST)을 그대로 돌릴 수 없습니다.
+# 여기서는 경로를 실제 사이트와 같게 맞춰 ReservationBot 을 수정 없이 실행할 수 있습니다.
+# 파일 응답에는 ETag / Last-Modified 를 붙이고 조건부 요청(304)과 gzip 도 처리합니다 (conditional_fetch 확인용).
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RESERVATION_PATH = "/03reservation/reservation02.asp"
+
+# 경로 → 제공할 파일
+ROUTES = {
+    RESERVATION_PATH: "select_date.html",
+    "/03reservation/reservation02_1.asp": "submit.html",
+    "/08member/member01.asp": "login.html",
+}
+
+# 신청서(formJoin_1) 제출 후 응답: 실제 사이트처럼 alert 후 달력으로 돌아갑니다.
+BOOKED_PAGE = ("<html><head><meta charset=\"utf-8\"></head><body><script>"
+               "alert('예약이 완료되었습니다.');location.href='reservation02.asp';"
+               "</script></body></html>")
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "FixtureServer"
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.address_string(), format % args)
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode("utf-8", "replace") if length else ""
+        return {key: values[-1] for key, values in parse_qs(raw).items()}
+
+    def _route(self, form):
+        path = urlsplit(self.path).path
+        self.server.requests.append((self.command, path, form))
+        if path == "/08member/login_ok.asp":
+            self._send(302, headers={"Location": RESERVATION_PATH,
+                                     "Set-Cookie": "ASPSESSIONID=fixture; Path=/"})
+            return
+        if path == "/03reservation/reservation02_2.asp":
+            self.server.bookings.append(form)
+            self._send(200, BOOKED_PAGE.encode("utf-8"))
+            return
+        name = ROUTES.get(path) or (path.lstrip("/") if path.endswith(".html") else None)
+        file_path = os.path.join(self.server.directory, name) if name else None
+        if not file_path or not os.path.isfile(file_path):
+            self._send(404, b"not found", "text/plain")
+            return
+        with open(file_path, "rb") as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        headers = {"ETag": etag, "Last-Modified": formatdate(os.path.getmtime(file_path), usegmt=True)}
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers=headers)
+            return
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self._send(200, body, headers=headers)
+
+    def do_GET(self):
+        self._route({})
+
+    def do_HEAD(self):
+        self._route({})
+
+    def do_POST(self):
+        self._route(self._form())
+
+
+class FixtureServer:
+    """
+    백그라운드 스레드에서 도는 픽스처 서버.
+    port=0 이면 빈 포트를 자동으로 고릅니다. 받은 요청은 requests, 신청서 제출은 bookings 에 쌓입니다.
+    """
+
+    def __init__(self, port=0, host="127.0.0.1", directory=FIXTURE_DIR):
+        self.httpd = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.directory = directory
+        self.httpd.requests = []
+        self.httpd.bookings = []
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def reservation_url(self):
+        return self.base_url + RESERVATION_PATH
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def bookings(self):
+        return self.httpd.bookings
+
+    def dates(self):
+        """달력 픽스처에서 예약 가능한 날짜 목록"""
+        with open(os.path.join(self.httpd.directory, ROUTES[RESERVATION_PATH]), encoding="utf-8") as f:
+            return [day.date_text for day in parse_calendar_html(f.read())]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='예약 사이트 픽스처 서버')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port)
+    print(f"픽스처 서버: {server.reservation_url}")
+    print("서버를 종료하려면 Ctrl+C를 누르세요.")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
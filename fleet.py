@@ -0,0 +1,388 @@
+import os
+import json
+import time
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from slots import Slot
+from ledger import BookingLedger, Claim, STATUS_BOOKED
+from botlog import get_logger
+
+log = get_logger("fleet")
+
+# 여러 호스트에서 ReservationBot 워커를 돌리기 위한 가벼운 코디네이터/워커.
+#
+# 코디네이터는 (계정, 날짜) 작업을 워커에게 lease_ttl 초짜리 임대로 나눠 주고,
+# 워커는 heartbeat_interval 초마다 /heartbeat 로 임대를 연장하면서 현재 맡은 작업 목록을 받습니다.
+# 하트비트가 끊긴 워커의 작업은 lease_ttl 뒤 다른 워커에게 넘어가고, 그 워커가 선점해 둔 슬롯도 풀립니다.
+#
+# 두 워커가 같은 슬롯을 동시에 발견하면 코디네이터가 정합니다.
+# 코디네이터 안의 BookingLedger 가 기존 원장 규칙(같은 슬롯 중복, 하루 한도, 겹치는 티타임)을 그대로 적용하고,
+# 워커 쪽에서는 FleetLedger 가 BookingLedger 와 같은 claim/record 인터페이스로 이를 호출하므로
+# reserve_for_two_members 등 기존 예약 경로를 고치지 않고 그대로 씁니다.
+#
+#   POST /heartbeat {worker, accounts, capacity}      → {jobs: [{job, account, date}], lease_ttl}
+#   POST /claim     {worker, account, slot}           → {granted: bool}
+#   POST /record    {worker, account, date, minutes, course, status}
+#   POST /jobs      {add: [{account, date}], remove: [...]}
+#   GET  /status
+#
+# GOLF_FLEET_TOKEN 이 설정되어 있으면 모든 요청의 X-Fleet-Token 헤더가 같아야 합니다 (워커도 같은 값을 보냄).
+# 코디네이터는 기본으로 127.0.0.1 에만 열리며, 다른 호스트의 워커를 받으려면 --host 와 토큰을 함께 지정합니다.
+# 루프백이 아닌 주소에 토큰 없이 열려고 하면 시작하지 않습니다.
+
+DEFAULT_PORT = 8770
+
+JOB_OPEN = "open"
+JOB_LEASED = "leased"
+JOB_DONE = "done"
+
+
+class Job:
+    __slots__ = ("job_id", "account", "date", "worker", "expires", "status")
+
+    def __init__(self, account, date):
+        self.job_id = f"{account}:{date}"
+        self.account = account
+        self.date = str(date)
+        self.worker = None
+        self.expires = 0.0
+        self.status = JOB_OPEN
+
+    def to_dict(self):
+        return {"job": self.job_id, "account": self.account, "date": self.date}
+
+
+class Coordinator:
+    """작업 임대/하트비트/슬롯 선점 판정 (HTTP 처리와 분리된 상태 객체)"""
+
+    def __init__(self, lease_ttl=6.0, ledger_path=":memory:", max_per_day=1):
+        self.lease_ttl = lease_ttl
+        self.jobs = {}
+        self.workers = {}
+        # 워커가 신청 도중 죽어도 lease_ttl 뒤에는 같은 슬롯을 다른 워커가 잡을 수 있도록 ttl 을 짧게
+        self.ledger = BookingLedger(ledger_path, max_per_day=max_per_day, claim_ttl=max(lease_ttl * 5, 30))
+        self._lock = threading.Lock()
+
+    def add_job(self, account, date):
+        job = Job(account, date)
+        with self._lock:
+            self.jobs.setdefault(job.job_id, job)
+        return job.job_id
+
+    def remove_job(self, account, date):
+        with self._lock:
+            self.jobs.pop(f"{account}:{date}", None)
+
+    def _reap(self, now):
+        """임대가 끝난 작업을 다시 열고, 그 워커의 진행 중 선점을 만료"""
+        dead = set()
+        for job in self.jobs.values():
+            if job.status == JOB_LEASED and job.expires < now:
+                log.warning(f"워커 {job.worker} 응답 없음: {job.job_id} 작업을 다른 워커에게 넘깁니다.")
+                dead.add(job.worker)
+                job.status, job.worker = JOB_OPEN, None
+        for worker in dead:
+            self.workers.pop(worker, None)
+            self.ledger.expire_owner(worker)
+
+    def heartbeat(self, worker, accounts=None, capacity=1):
+        """임대 연장 + 빈 작업 배정. 워커가 지금 맡아야 할 작업 목록 반환"""
+        now = time.monotonic()
+        with self._lock:
+            # 늦게 도착한 하트비트라도 아직 다른 워커에게 넘어가지 않았으면 그대로 이어서 맡깁니다.
+            mine = [job for job in self.jobs.values() if job.worker == worker and job.status == JOB_LEASED]
+            for job in mine:
+                job.expires = now + self.lease_ttl
+            self._reap(now)
+            self.workers[worker] = now
+            for job in sorted(self.jobs.values(), key=lambda j: j.date):
+                if len(mine) >= capacity:
+                    break
+                if job.status == JOB_OPEN and (not accounts or job.account in accounts):
+                    job.status, job.worker = JOB_LEASED, worker
+                    mine.append(job)
+                    log.info(f"{job.job_id} 작업을 워커 {worker} 에게 배정")
+            for job in mine:
+                job.expires = now + self.lease_ttl
+            return [job.to_dict() for job in mine]
+
+    def claim(self, worker, account, slot):
+        """
+        같은 슬롯을 여러 워커가 발견하면 먼저 요청한 워커 하나만 신청.
+        그 날짜의 임대를 가진 워커만 선점할 수 있습니다 (임대가 넘어간 뒤 늦게 온 요청도 거절).
+        """
+        with self._lock:
+            job = self.jobs.get(f"{account}:{slot.date_text}")
+            if job is None or job.status != JOB_LEASED or job.worker != worker:
+                log.warning(f"임대를 갖지 않은 워커 {worker} 의 선점 요청 거절: {account} {slot}")
+                return False
+        return self.ledger.claim(account, slot, owner=worker) is not None
+
+    def record(self, worker, claim, status):
+        self.ledger.record(claim, status)
+        if status == STATUS_BOOKED:
+            with self._lock:
+                job = self.jobs.get(f"{claim.account}:{claim.date}")
+                if job is not None:
+                    job.status, job.worker = JOB_DONE, None
+            log.info(f"워커 {worker} 가 {claim} 예약 완료")
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "workers": {w: round(now - seen, 1) for w, seen in self.workers.items()},
+                "jobs": [dict(job.to_dict(), status=job.status, worker=job.worker,
+                              lease_left=round(job.expires - now, 1) if job.status == JOB_LEASED else None)
+                         for job in self.jobs.values()],
+            }
+
+
+class _CoordinatorHandler(BaseHTTPRequestHandler):
+    server_version = "GolfFleet"
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.address_string(), format % args)
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        token = self.server.token
+        if token and self.headers.get("X-Fleet-Token") != token:
+            self._reply(403, {"error": "forbidden"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if urlsplit(self.path).path != "/status":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, self.server.coordinator.status())
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        coordinator = self.server.coordinator
+        path = urlsplit(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            if path == "/heartbeat":
+                jobs = coordinator.heartbeat(body["worker"], body.get("accounts"), int(body.get("capacity", 1)))
+                self._reply(200, {"jobs": jobs, "lease_ttl": coordinator.lease_ttl})
+            elif path == "/claim":
+                granted = coordinator.claim(body["worker"], body["account"], Slot(*body["slot"]))
+                self._reply(200, {"granted": granted})
+            elif path == "/record":
+                # course 는 Slot.course_key (아는 코스는 정수, 그 밖은 paraBookCrs 문자열)
+                claim = Claim(body["account"], int(body["date"]), int(body["minutes"]), body["course"],
+                              body["worker"])
+                coordinator.record(body["worker"], claim, body["status"])
+                self._reply(200, {"ok": True})
+            elif path == "/jobs":
+                for job in body.get("add", []):
+                    coordinator.add_job(job["account"], job["date"])
+                for job in body.get("remove", []):
+                    coordinator.remove_job(job["account"], job["date"])
+                self._reply(200, coordinator.status())
+            else:
+                self._reply(404, {"error": "not found"})
+        except (KeyError, TypeError, ValueError) as e:
+            self._reply(400, {"error": str(e)})
+
+
+class CoordinatorServer:
+    """루프백이 아닌 주소에 열 때는 토큰이 있어야 합니다 (없으면 ValueError)."""
+
+    def __init__(self, coordinator, port=DEFAULT_PORT, host="127.0.0.1", token=None):
+        token = token if token is not None else os.getenv("GOLF_FLEET_TOKEN")
+        if not token and host not in ("127.0.0.1", "localhost", "::1"):
+            raise ValueError(f"{host} 에 코디네이터를 열려면 GOLF_FLEET_TOKEN 이 필요합니다 "
+                             "(토큰 없이는 같은 네트워크의 누구나 작업을 임대하고 슬롯을 선점할 수 있습니다)")
+        self.coordinator = coordinator
+        self.httpd = ThreadingHTTPServer((host, port), _CoordinatorHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.coordinator = coordinator
+        self.httpd.token = token
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}"
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+
+
+class CoordinatorClient:
+    def __init__(self, url, timeout=3, token=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.token = token if token is not None else os.getenv("GOLF_FLEET_TOKEN")
+
+    def call(self, path, payload):
+        from transport import get_transport
+
+        headers = {"X-Fleet-Token": self.token} if self.token else None
+        response = get_transport().post(self.url + path, json=payload, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class FleetLedger:
+    """
+    BookingLedger 와 같은 claim/record 인터페이스로 코디네이터에 선점을 요청.
+    코디네이터에 연결할 수 없으면 중복 예약을 막기 위해 선점 실패로 처리합니다.
+    """
+
+    def __init__(self, client, worker):
+        self.client = client
+        self.worker = worker
+
+    def claim(self, account, slot):
+        try:
+            granted = self.client.call("/claim", {"worker": self.worker, "account": account,
+                                                  "slot": list(slot.as_tuple())})["granted"]
+        except Exception as e:
+            log.warning(f"코디네이터 선점 요청 실패: {e}")
+            return None
+        if not granted:
+            log.info(f"다른 워커가 먼저 발견한 슬롯입니다: {slot}")
+            return None
+        return Claim(account, slot.date, slot.minutes, slot.course_key, self.worker)
+
+    def record(self, claim, status, detail=""):
+        try:
+            self.client.call("/record", {"worker": self.worker, "account": claim.account, "date": claim.date,
+                                         "minutes": claim.minutes, "course": claim.course, "status": status})
+        except Exception as e:
+            log.warning(f"코디네이터 결과 보고 실패: {e}")
+
+    def bookings(self, account, date=None):
+        return []
+
+    def close(self):
+        pass
+
+
+class FleetWorker:
+    """
+    코디네이터에서 임대받은 날짜만 감시하는 ReservationBot 워커.
+    하트비트는 별도 스레드(HTTP 만 사용)가 보내고, 배정 변경은 감시 주기 사이에 반영합니다.
+    """
+
+    def __init__(self, coordinator_url, worker_id=None, capacity=2, heartbeat_interval=2.0, monitor_interval=1,
+                 start_hour=8, end_hour=11):
+        self.client = CoordinatorClient(coordinator_url)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.capacity = capacity
+        self.heartbeat_interval = heartbeat_interval
+        self.monitor_interval = monitor_interval
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.dates = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _heartbeat_loop(self, account):
+        while not self._stop.is_set():
+            try:
+                jobs = self.client.call("/heartbeat", {"worker": self.worker_id, "accounts": [account],
+                                                       "capacity": self.capacity})["jobs"]
+                with self._lock:
+                    self.dates = [job["date"] for job in jobs]
+            except Exception as e:
+                # 코디네이터와 끊기면 임대가 곧 다른 워커로 넘어가므로 감시를 멈춥니다.
+                log.warning(f"하트비트 실패: {e}")
+                with self._lock:
+                    self.dates = []
+            self._stop.wait(self.heartbeat_interval)
+
+    def run(self):
+        from main import ReservationBot
+
+        bot = ReservationBot([], monitor_interval=self.monitor_interval, start_hour=self.start_hour,
+                             end_hour=self.end_hour, ledger=FleetLedger(self.client, self.worker_id))
+        if not bot.username or not bot.password:
+            log.warning("로그인 정보 누락")
+            bot.driver.quit()
+            return None
+        threading.Thread(target=self._heartbeat_loop, args=(bot.username,), daemon=True).start()
+        log.info(f"워커 {self.worker_id} 시작 (코디네이터 {self.client.url})")
+        bot._login()
+        try:
+            while True:
+                with self._lock:
+                    dates = list(self.dates)
+                if dates != bot.user_dates:
+                    log.info(f"배정된 날짜: {dates}")
+                    bot.user_dates = dates
+                if not dates:
+                    time.sleep(self.heartbeat_interval)
+                    continue
+                result = bot.run_cycle()
+                if result is None:
+                    time.sleep(self.monitor_interval)
+                    bot.driver.refresh()
+                else:
+                    time.sleep(self.monitor_interval)
+        finally:
+            self._stop.set()
+            bot._shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='여러 호스트에 감시 워커 분산')
+    sub = parser.add_subparsers(dest='command', required=True)
+    coord_parser = sub.add_parser('coordinator', help='코디네이터 실행')
+    coord_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    coord_parser.add_argument('--host', default="127.0.0.1",
+                              help='바인드 주소 (다른 호스트의 워커를 받으려면 0.0.0.0, GOLF_FLEET_TOKEN 필요)')
+    coord_parser.add_argument('--account', default=os.getenv("GOLF_USERNAME"), help='작업 계정')
+    coord_parser.add_argument('--dates', nargs='*', default=[], help='감시할 날짜 (YYYYMMDD)')
+    coord_parser.add_argument('--lease-ttl', type=float, default=6.0)
+    worker_parser = sub.add_parser('worker', help='워커 실행')
+    worker_parser.add_argument('--coordinator', default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    worker_parser.add_argument('--capacity', type=int, default=2, help='동시에 맡을 날짜 수')
+    worker_parser.add_argument('--id', help='워커 이름 (기본: 호스트명:pid)')
+    args = parser.parse_args()
+
+    if args.command == 'coordinator':
+        coordinator = Coordinator(lease_ttl=args.lease_ttl)
+        for date in args.dates:
+            coordinator.add_job(args.account, date)
+        try:
+            server = CoordinatorServer(coordinator, port=args.port, host=args.host)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"코디네이터: {server.url} (작업 {len(coordinator.jobs)}개)")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+    else:
+        FleetWorker(args.coordinator, worker_id=args.id, capacity=args.capacity).run()
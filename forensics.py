@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import time
+import queue
+import threading
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from botlog import get_logger
+
+log = get_logger("forensics")
+
+# 예약 실패 원인 분석용 최근 페이지 상태 링 버퍼.
+# 예약에 실패해도 남는 것이 perform_login 의 page_source[:1000] 정도라 놓친 슬롯을 되짚을 수 없었습니다.
+# 그렇다고 매번 스크린샷을 찍으면 예약 경로가 느려지므로,
+# - 평소에는 이미 가져온 값(페이지 소스, 행 HTML, 팝업 문구, 구간 시간)만 참조로 버퍼에 넣고 (복사/WebDriver 호출 없음)
+# - 버퍼는 상태 개수(capacity)와 HTML 문자 수(max_chars)로 크기를 제한하며
+# - 실패가 났을 때만 버퍼를 떠서 백그라운드 스레드가 output_dir 아래에 파일로 씁니다.
+# 프로세스 전역 BUFFER 하나를 쓰며, metrics.REGISTRY 처럼 어디서든 capture()/failure() 로 기록합니다.
+
+_SLUG_RE = re.compile(r"[^\w-]+")
+
+
+class PageState:
+    """한 시점의 페이지 상태"""
+    __slots__ = ("ts", "label", "url", "html", "alert", "extra")
+
+    def __init__(self, ts, label, url=None, html=None, alert=None, extra=None):
+        self.ts = ts
+        self.label = label
+        self.url = url
+        self.html = html
+        self.alert = alert
+        self.extra = extra
+
+    @property
+    def size(self):
+        return len(self.html) if self.html else 0
+
+    def meta(self):
+        return {"ts": self.ts, "label": self.label, "url": self.url, "alert": self.alert,
+                "html_chars": self.size, "extra": self.extra}
+
+
+class ForensicsBuffer:
+    """
+    최근 capacity 개 상태와 최근 구간 시간(spans)을 보관.
+    HTML 합계가 max_chars 를 넘으면 오래된 상태부터 버립니다.
+    같은 이유의 실패는 min_interval 초에 한 번만 저장합니다.
+    """
+
+    def __init__(self, capacity=32, max_chars=4_000_000, max_spans=256, output_dir="forensics", min_interval=5.0):
+        self.capacity = capacity
+        self.max_chars = max_chars
+        self.output_dir = output_dir
+        self.min_interval = min_interval
+        self.enabled = True
+        self.states = deque()
+        self.spans = deque(maxlen=max_spans)
+        self._chars = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._last_failure = {}
+        self._deferred = []
+
+    def capture(self, label, url=None, html=None, alert=None, **extra):
+        """상태 하나 추가 (html 은 이미 가져온 문자열을 그대로 넘깁니다)"""
+        if not self.enabled:
+            return
+        state = PageState(time.time(), label, url, html, alert, extra or None)
+        with self._lock:
+            self.states.append(state)
+            self._chars += state.size
+            while self.states and (len(self.states) > self.capacity or self._chars > self.max_chars):
+                self._chars -= self.states.popleft().size
+
+    def span_record(self, name, seconds):
+        if self.enabled:
+            self.spans.append((time.time(), name, round(seconds * 1000, 2)))
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.span_record(name, time.perf_counter() - started)
+
+    def failure(self, reason, error=None, driver=None, defer=False):
+        """
+        실패 발생: 지금까지의 버퍼를 떠서 백그라운드 저장을 요청합니다.
+        driver 를 넘기면 실패 시점 페이지(URL/소스)를 한 번 더 담습니다 (실패 경로에서만 드는 WebDriver 호출).
+        defer=True 면 예약 시도 중이라는 뜻이라 페이지 읽기와 저장을 settle() 때까지 미룹니다.
+        """
+        if not self.enabled:
+            return
+        if defer and driver is not None:
+            with self._lock:
+                self._deferred.append((reason, error, driver))
+            return
+        now = time.monotonic()
+        if now - self._last_failure.get(reason, -self.min_interval) < self.min_interval:
+            return
+        self._last_failure[reason] = now
+        if driver is not None:
+            try:
+                self.capture("failure", url=driver.current_url, html=driver.page_source)
+            except Exception as e:
+                log.debug("실패 시점 페이지를 읽지 못했습니다: %s", e)
+        with self._lock:
+            states = list(self.states)
+        spans = list(self.spans)
+        detail = "".join(traceback.format_exception(type(error), error, error.__traceback__)) if error else None
+        self._queue.put((time.time(), reason, detail, states, spans))
+        self._ensure_writer()
+
+    def settle(self):
+        """예약 시도가 끝난 뒤 미뤄 둔 실패를 처리 (다른 페이지로 이동하기 전에 부릅니다)"""
+        with self._lock:
+            deferred, self._deferred = self._deferred, []
+        for reason, error, driver in deferred:
+            self.failure(reason, error, driver)
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="forensics-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                path = self._write(*item)
+                log.info(f"실패 기록 저장: {path}")
+            except Exception as e:
+                log.warning(f"실패 기록 저장 실패: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, ts, reason, detail, states, spans):
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(ts)) + f"{ts % 1:.3f}"[1:]
+        directory = os.path.join(self.output_dir, f"{stamp}-{_SLUG_RE.sub('_', reason)[:40]}")
+        os.makedirs(directory, exist_ok=True)
+        index = {"ts": ts, "reason": reason, "error": detail, "states": [], "spans": spans}
+        for number, state in enumerate(states):
+            meta = state.meta()
+            if state.html:
+                name = f"{number:02d}-{_SLUG_RE.sub('_', state.label)[:30]}.html"
+                with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                    f.write(state.html)
+                meta["file"] = name
+            index["states"].append(meta)
+        with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        return directory
+
+    def flush(self, timeout=10):
+        """대기 중인 저장이 끝날 때까지 (종료 직전 호출)"""
+        if self._writer is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+BUFFER = ForensicsBuffer()
+
+
+def capture(label, url=None, html=None, alert=None, **extra):
+    BUFFER.capture(label, url, html, alert, **extra)
+
+
+def span(name):
+    return BUFFER.span(name)
+
+
+def failure(reason, error=None, driver=None, defer=False):
+    BUFFER.failure(reason, error, driver, defer)
+
+
+def settle():
+    BUFFER.settle()
+
+
+def configure():
+    """GOLF_FORENSICS=0 이면 끄고, GOLF_FORENSICS_DIR 로 저장 위치 지정"""
+    BUFFER.enabled = os.getenv("GOLF_FORENSICS", "1") != "0"
+    BUFFER.output_dir = os.getenv("GOLF_FORENSICS_DIR", BUFFER.output_dir)
+    return BUFFER
@@ -0,0 +1,248 @@
+import os
+import gzip
+import json
+import time
+import threading
+from array import array
+from collections import defaultdict
+from slots import Slot, CalendarDay
+
+# 달력/시간표 관측 기록을 날짜별 gzip 세그먼트(history/YYYYMMDD.jsonl.gz)에 덧붙여 저장합니다.
+# 버퍼가 찰 때마다 gzip 멤버 하나를 파일 끝에 추가하므로 기존 데이터는 절대 다시 쓰지 않습니다.
+# (여러 gzip 멤버가 이어진 파일도 gzip.open 으로 한 번에 읽을 수 있습니다.)
+
+KIND_CALENDAR = "cal"
+KIND_TEE_SHEET = "tee"
+
+# 컬럼형 내보내기 형식 (array 타입코드)
+_COLUMNS = (
+    ("ts", "d"),
+    ("date", "I"),
+    ("minutes", "H"),
+    ("course", "B"),
+    ("holes", "B"),
+    ("open_seats", "B"),
+)
+
+
+class Observation:
+    """
+    한 번의 관측 기록.
+    kind == "cal" 이면 items 는 CalendarDay 목록, "tee" 이면 date 날짜의 Slot 목록입니다.
+    """
+    __slots__ = ("ts", "kind", "date", "items")
+
+    def __init__(self, ts, kind, date, items):
+        self.ts = ts
+        self.kind = kind
+        self.date = date
+        self.items = items
+
+    def to_record(self):
+        return {
+            "t": round(self.ts, 3),
+            "k": self.kind,
+            "d": self.date,
+            "i": [item.as_tuple() for item in self.items],
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        kind = record["k"]
+        if kind == KIND_CALENDAR:
+            items = [CalendarDay(*values) for values in record["i"]]
+        else:
+            items = [Slot(*values) for values in record["i"]]
+        return cls(record["t"], kind, record.get("d"), items)
+
+
+class SnapshotStore:
+    """
+    추가 전용(append-only) 관측 기록 저장소.
+    모니터링 루프에서 record_calendar / record_tee_sheet 를 호출하면
+    메모리에 모아 두었다가 flush_every 개마다, 또는 마지막 기록 후 flush_interval 초가 지나면
+    압축해서 파일 끝에 덧붙입니다 (비정상 종료 시 잃는 기록이 그 사이의 관측으로 제한됩니다).
+    """
+
+    def __init__(self, directory="history", flush_every=64, flush_interval=10.0):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._flushed_at = time.monotonic()
+        self._buffer = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def record_calendar(self, days, ts=None):
+        self._append(Observation(ts or time.time(), KIND_CALENDAR, None, list(days)))
+
+    def record_tee_sheet(self, date, slots, ts=None):
+        self._append(Observation(ts or time.time(), KIND_TEE_SHEET, int(date), list(slots)))
+
+    def _append(self, observation):
+        with self._lock:
+            self._buffer.append(observation)
+            now = time.monotonic()
+            if len(self._buffer) < self.flush_every and now - self._flushed_at < self.flush_interval:
+                return
+            pending, self._buffer = self._buffer, []
+            self._flushed_at = now
+        self._write(pending)
+
+    def flush(self):
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            self._flushed_at = time.monotonic()
+        if pending:
+            self._write(pending)
+
+    def close(self):
+        self.flush()
+
+    def _segment_path(self, day):
+        return os.path.join(self.directory, f"{day}.jsonl.gz")
+
+    def _write(self, observations):
+        by_day = defaultdict(list)
+        for obs in observations:
+            by_day[time.strftime("%Y%m%d", time.localtime(obs.ts))].append(obs)
+        for day, items in by_day.items():
+            lines = "".join(json.dumps(obs.to_record(), ensure_ascii=False, separators=(",", ":")) + "\n"
+                            for obs in items)
+            # 'ab' 모드로 열면 새 gzip 멤버가 파일 끝에 추가됩니다.
+            with gzip.open(self._segment_path(day), "ab") as f:
+                f.write(lines.encode("utf-8"))
+
+    def segments(self, start=None, end=None):
+        """[start, end] 시간 범위와 겹치는 세그먼트 파일 경로를 날짜순으로 반환"""
+        start_day = time.strftime("%Y%m%d", time.localtime(start)) if start else None
+        end_day = time.strftime("%Y%m%d", time.localtime(end)) if end else None
+        paths = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".jsonl.gz"):
+                continue
+            day = name[:8]
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            paths.append(os.path.join(self.directory, name))
+        return paths
+
+    def query(self, start=None, end=None, kind=None, date=None):
+        """
+        시간 범위(유닉스 타임스탬프)로 관측 기록을 조회.
+        버퍼에 남아 있는 기록도 함께 반환합니다.
+        """
+        self.flush()
+        for path in self.segments(start, end):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    ts = record["t"]
+                    if (start and ts < start) or (end and ts > end):
+                        continue
+                    if kind and record["k"] != kind:
+                        continue
+                    if date and record.get("d") != int(date):
+                        continue
+                    yield Observation.from_record(record)
+
+    def slot_events(self, start=None, end=None):
+        """
+        날짜별 연속된 시간표 관측을 비교해 슬롯 등장/소멸 이벤트를 생성.
+        (ts, "appear" | "vanish", Slot) 튜플을 반환합니다.
+        """
+        previous = {}
+        for obs in self.query(start, end, kind=KIND_TEE_SHEET):
+            current = {slot.key: slot for slot in obs.items}
+            before = previous.get(obs.date)
+            if before is not None:
+                for key in current.keys() - before.keys():
+                    yield obs.ts, "appear", current[key]
+                for key in before.keys() - current.keys():
+                    yield obs.ts, "vanish", before[key]
+            previous[obs.date] = current
+
+    def release_times(self, start=None, end=None):
+        """날짜별로 달력에서 처음 예약 가능(td.on)으로 관측된 시각"""
+        first_seen = {}
+        for obs in self.query(start, end, kind=KIND_CALENDAR):
+            for day in obs.items:
+                first_seen.setdefault(day.date, obs.ts)
+        return first_seen
+
+    def cancellation_counts(self, start=None, end=None):
+        """
+        이미 열린 날짜에서 새로 나타난 슬롯(취소분) 수를 (날짜별, 시각별)로 집계.
+        버스트 폴링을 언제 돌릴지 정하는 데 사용합니다.
+        """
+        by_date = defaultdict(int)
+        by_hour = defaultdict(int)
+        for ts, event, slot in self.slot_events(start, end):
+            if event != "appear":
+                continue
+            by_date[slot.date] += 1
+            by_hour[time.localtime(ts).tm_hour] += 1
+        return dict(by_date), dict(by_hour)
+
+    def export_columnar(self, path, start=None, end=None):
+        """
+        시간표 관측을 슬롯 단위 컬럼(array)으로 펼쳐 gzip 바이너리로 저장.
+        첫 줄은 컬럼 정보(JSON), 이후는 컬럼별 원시 바이트입니다.
+        """
+        columns = {name: array(code) for name, code in _COLUMNS}
+        for obs in self.query(start, end, kind=KIND_TEE_SHEET):
+            for slot in obs.items:
+                columns["ts"].append(obs.ts)
+                columns["date"].append(slot.date)
+                columns["minutes"].append(slot.minutes)
+                columns["course"].append(int(slot.course))
+                columns["holes"].append(int(slot.holes))
+                columns["open_seats"].append(min(slot.open_seats, 255))
+        header = {
+            "rows": len(columns["ts"]),
+            "columns": [[name, code, columns[name].itemsize] for name, code in _COLUMNS],
+        }
+        with gzip.open(path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for name, _ in _COLUMNS:
+                f.write(columns[name].tobytes())
+        return header["rows"]
+
+
+def load_columnar(path):
+    """export_columnar 로 저장한 파일을 {컬럼명: array} 로 읽기"""
+    with gzip.open(path, "rb") as f:
+        header = json.loads(f.readline())
+        rows = header["rows"]
+        columns = {}
+        for name, code, itemsize in header["columns"]:
+            col = array(code)
+            col.frombytes(f.read(rows * itemsize))
+            columns[name] = col
+    return columns
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='예약 가능 이력 조회/내보내기')
+    parser.add_argument('--dir', default='history', help='이력 저장 디렉터리')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('summary', help='날짜별 오픈 시각과 취소분 등장 통계를 출력합니다')
+    export_parser = sub.add_parser('export', help='시간표 관측을 컬럼형 파일로 내보냅니다')
+    export_parser.add_argument('output')
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.dir)
+
+    if args.command == 'export':
+        count = store.export_columnar(args.output)
+        print(f"{count}개 슬롯 관측을 {args.output}에 저장했습니다.")
+    else:
+        for date, ts in sorted(store.release_times().items()):
+            print(f"{date}: 최초 오픈 관측 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}")
+        by_date, by_hour = store.cancellation_counts()
+        for date, count in sorted(by_date.items()):
+            print(f"{date}: 취소분 등장 {count}회")
+        for hour, count in sorted(by_hour.items()):
+            print(f"{hour:02d}시: 취소분 등장 {count}회")
@@ -0,0 +1,255 @@
+import time
+from slots import Slot, Holes, format_minutes
+from page_fetch import LOGIN_PAGE_PATTERNS, tee_sheet_url, book_url, submit_join_form
+from botlog import get_logger
+
+log = get_logger("inpage_agent")
+
+# 로그인된 페이지 안에서 동작하는 감시 에이전트.
+# execute_async_script 로 한 번 주입하면 브라우저 안에서 직접
+# fetch → DOMParser 파싱 → 조건 필터 → formJoin_1 제출까지 처리하고,
+# 결과가 생겼을 때만 Python 으로 콜백합니다.
+# 감지부터 제출까지 WebDriver 왕복이 없으므로 지연은 브라우저 이벤트 루프 수준입니다.
+
+_AGENT_SCRIPT = """
+var cfg = arguments[0], done = arguments[arguments.length - 1];
+var started = Date.now(), polls = 0, finished = false;
+// page_fetch.LOGIN_PAGE_PATTERNS 와 같은 판별 (모든 페이지에 있는 login() 함수의 alert 는 무시)
+var loginPage = new RegExp(cfg.loginPatterns.join('|'), 'i');
+
+function finish(result) {
+    if (finished) { return; }
+    finished = true;
+    result.polls = polls;
+    result.elapsedMs = Date.now() - started;
+    done(result);
+}
+
+function decode(r, buf) {
+    var ct = r.headers.get('content-type') || '';
+    var m = /charset=([\\w-]+)/i.exec(ct);
+    if (!m) { m = /charset=["']?([\\w-]+)/i.exec(new TextDecoder('ascii').decode(buf.slice(0, 2048))); }
+    try { return new TextDecoder(m ? m[1] : 'euc-kr').decode(buf); }
+    catch (e) { return new TextDecoder().decode(buf); }
+}
+
+function parseRows(html) {
+    var doc = new DOMParser().parseFromString(html, 'text/html');
+    var slots = [];
+    doc.querySelectorAll('table tbody tr').forEach(function (tr) {
+        var timeEl = tr.querySelector('td.gray span');
+        var link = tr.querySelector('a[href*="bookProsecc_join(\\'"]');
+        if (!timeEl || !link) { return; }
+        var args = (link.getAttribute('href').match(/'([^']*)'/g) || []).map(function (a) { return a.slice(1, -1); });
+        var t = /(\\d{1,2}):(\\d{2})/.exec(timeEl.textContent) || [];
+        var course = tr.querySelector('td.course');
+        var seats = tr.querySelector('td:nth-child(3) span');
+        var options = Array.prototype.map.call(tr.querySelectorAll('td.price option[value]'), function (o) {
+            return parseInt(o.value, 10) || 0;
+        });
+        slots.push({
+            args: args,
+            minutes: parseInt(t[1], 10) * 60 + parseInt(t[2], 10),
+            holes: parseInt((course && /\\d+/.exec(course.textContent)) || 0, 10),
+            seats: parseInt((seats && /\\d+/.exec(seats.textContent)) || 0, 10),
+            maxParty: Math.max.apply(null, options.concat([0]))
+        });
+    });
+    return slots;
+}
+
+function matches(s) {
+    if (cfg.exclude.indexOf(s.args[0] + '|' + s.args[1] + '|' + s.args[2]) >= 0) { return false; }
+    return s.minutes >= cfg.startMinutes && s.minutes < cfg.endMinutes
+        && (!cfg.holes || s.holes === cfg.holes)
+        && s.seats >= cfg.minSeats && s.seats <= cfg.maxSeats
+        && s.maxParty >= cfg.party;
+}
+
+function submit(slot) {
+    var form = document.createElement('form');
+    form.method = 'post';
+    form.action = cfg.bookUrl;
+    var fields = {book_date: slot.args[0], book_time: slot.args[1], book_crs: slot.args[2],
+                  person: String(cfg.party), a_cart: '', roundf: slot.args[5]};
+    for (var name in fields) {
+        var input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = name;
+        input.value = fields[name];
+        form.appendChild(input);
+    }
+    document.body.appendChild(form);
+    // 콜백이 Python 에 먼저 전달되도록 다음 틱에 제출 (제출하면 페이지가 바뀝니다)
+    setTimeout(function () { form.submit(); }, 0);
+}
+
+function pollDate(date) {
+    polls += 1;
+    return fetch(cfg.teeSheetUrl, {
+        method: 'POST', credentials: 'include', cache: 'no-store',
+        headers: {'Content-Type': 'application/x-www-form-urlencoded'},
+        body: 'submitDate=' + encodeURIComponent(date)
+    }).then(function (r) {
+        return r.arrayBuffer().then(function (buf) {
+            return {html: decode(r, buf), toLogin: r.redirected && /member01\\.asp/i.test(r.url)};
+        });
+    }).then(function (page) {
+        var html = page.html;
+        if (page.toLogin || loginPage.test(html)) {
+            finish({status: 'login'});
+            return;
+        }
+        var hit = parseRows(html).filter(matches)[0];
+        if (!hit) { return; }
+        var detectedMs = Date.now() - started;
+        if (cfg.submit) { submit(hit); }
+        finish({status: cfg.submit ? 'submitted' : 'matched', slot: hit, detectedMs: detectedMs});
+    });
+}
+
+function loop() {
+    if (finished) { return; }
+    if (Date.now() - started > cfg.timeoutMs) {
+        finish({status: 'timeout'});
+        return;
+    }
+    cfg.dates.reduce(function (p, date) {
+        return p.then(function () { if (!finished) { return pollDate(date); } });
+    }, Promise.resolve()).catch(function (e) {
+        finish({status: 'error', error: String(e)});
+    }).then(function () {
+        if (!finished) { setTimeout(loop, cfg.intervalMs); }
+    });
+}
+
+loop();
+"""
+
+
+class InPageAgent:
+    """
+    ReservationBot 의 로그인된 브라우저에 감시 에이전트를 주입해 실행.
+
+    에이전트는 조건에 맞는 슬롯을 찾는 즉시 브라우저 안에서 바로 제출합니다.
+    ledger 가 있으면 실행 전에 감시 날짜마다 원장에 날짜 보류(hold_date)를 걸어 두고 보류한 날짜만 감시하며,
+    제출한 뒤에 보류를 실제 슬롯으로 옮겨(assign) 결과를 기록합니다. 보류는 claim_ttl 의 절반마다 연장합니다.
+    hold_date 가 없는 원장(fleet.FleetLedger)은 슬롯만 돌려받아 선점한 뒤 제출합니다 (감지 전용, WebDriver 왕복 추가).
+    """
+
+    def __init__(self, bot, dates=None, party=2, interval=0.5, holes=Holes.NINE, min_seats=2, max_seats=3):
+        self.bot = bot
+        self.dates = list(dates or bot.user_dates)
+        self.party = party
+        self.interval = interval
+        self.holes = holes
+        self.min_seats = min_seats
+        self.max_seats = max_seats
+        # 이미 시도했거나 원장에서 거절된 슬롯 (에이전트가 다시 고르지 않도록 전달)
+        self.exclude = set()
+
+    def _config(self, timeout, submit, dates=None):
+        return {
+            "teeSheetUrl": tee_sheet_url(self.bot.reservation_url),
+            "bookUrl": book_url(self.bot.reservation_url),
+            "dates": self.dates if dates is None else dates,
+            "startMinutes": self.bot.start_hour * 60,
+            "endMinutes": self.bot.end_hour * 60,
+            "holes": int(self.holes) if self.holes else 0,
+            "minSeats": self.min_seats,
+            "maxSeats": self.max_seats,
+            "party": self.party,
+            "intervalMs": int(self.interval * 1000),
+            "timeoutMs": int(timeout * 1000),
+            "submit": submit,
+            "exclude": sorted(self.exclude),
+            "loginPatterns": list(LOGIN_PAGE_PATTERNS),
+        }
+
+    def watch(self, timeout=60, submit=True, dates=None):
+        """에이전트를 실행하고 결과(dict)를 반환. slot 이 있으면 Slot 객체로 변환합니다."""
+        self.bot.driver.set_script_timeout(timeout + 10)
+        result = self.bot.driver.execute_async_script(_AGENT_SCRIPT, self._config(timeout, submit, dates)) or {}
+        hit = result.get("slot")
+        if hit:
+            slot = Slot.from_book_args(tuple(hit["args"][:7]), holes=hit["holes"], open_seats=hit["seats"],
+                                       max_party=hit["maxParty"])
+            slot.minutes = hit["minutes"]
+            result["slot"] = slot
+        return result
+
+    def book(self, timeout=60):
+        """
+        예약에 성공할 때까지(또는 timeout 초) 감시.
+        (성공 여부, 'HH:MM') 튜플을 반환합니다.
+        """
+        from main import _await_booking_result
+        from ledger import STATUS_BOOKED, STATUS_FAILED, STATUS_EXPIRED
+
+        deadline = time.monotonic() + timeout
+        ledger = self.bot.ledger
+        holding = ledger is not None and hasattr(ledger, "hold_date")
+        holds = {}
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, None
+                dates = None
+                if holding:
+                    dates = self._hold_dates(ledger, holds)
+                    if not dates:
+                        log.info("원장에 보류할 수 있는 날짜가 없어 페이지 내 감시를 끝냅니다.")
+                        return False, None
+                    # 보류가 만료되기 전에 돌아와 연장
+                    remaining = min(remaining, ledger.claim_ttl / 2)
+                result = self.watch(timeout=remaining, submit=holding or ledger is None, dates=dates)
+                status = result.get("status")
+                if status == "login":
+                    log.warning("로그인이 만료되었습니다. 다시 로그인합니다.")
+                    self.bot._login()
+                    continue
+                if status == "timeout" and holding and deadline > time.monotonic():
+                    continue
+                if status not in ("submitted", "matched"):
+                    log.info(f"페이지 내 감시 종료: {status} {result.get('error', '')} (조회 {result.get('polls', 0)}회)")
+                    return False, None
+
+                slot = result["slot"]
+                book_date, book_time, book_crs = slot.book_args()[:3]
+                self.exclude.add(f"{book_date}|{book_time}|{book_crs}")
+                log.info(f"페이지 내 감시에서 {slot} 감지 ({result.get('detectedMs', 0)}ms, 조회 {result.get('polls', 0)}회)")
+                claim = None
+                if holding:
+                    claim = ledger.assign(holds.pop(slot.date_text), slot)
+                elif ledger is not None:
+                    claim = ledger.claim(self.bot.username, slot)
+                    if claim is None:
+                        continue
+                    submit_join_form(self.bot.driver, self.bot.reservation_url, slot, self.party)
+
+                outcome = STATUS_FAILED
+                try:
+                    outcome = _await_booking_result(self.bot.driver, self.bot.wait, format_minutes(slot.minutes))
+                finally:
+                    if claim is not None:
+                        ledger.record(claim, outcome)
+                    self.bot.driver.get(self.bot.reservation_url)
+                if outcome == STATUS_BOOKED:
+                    return True, slot.time_text
+        finally:
+            for hold in holds.values():
+                ledger.record(hold, STATUS_EXPIRED)
+
+    def _hold_dates(self, ledger, holds):
+        """감시 날짜마다 원장 보류를 걸거나 연장하고, 보류 중인 날짜 목록을 반환"""
+        for date in self.dates:
+            hold = holds.get(date)
+            if hold is not None and ledger.renew(hold):
+                continue
+            hold = ledger.hold_date(self.bot.username, date)
+            if hold is None:
+                holds.pop(date, None)
+            else:
+                holds[date] = hold
+        return [date for date in self.dates if date in holds]
@@ -1,8 +1,11 @@
 import os
-import requests
 import json
+import time
+import threading
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+from transport import get_transport
+import metrics
 
 # .env 파일 로드
 load_dotenv()
@@ -13,6 +16,7 @@ KAKAO_REDIRECT_URI = os.getenv("KAKAO_REDIRECT_URI", "https://example.com/oauth"
 
 # 토큰 파일 경로
 TOKEN_FILE = "kakao_token.json"
+_TOKEN_LOCK = threading.Lock()
 
 def save_tokens(token_data):
     """
@@ -55,7 +59,7 @@ def authorize_with_code(code):
         "code": code
     }
     
-    response = requests.post(url, data=data)
+    response = get_transport().post(url, data=data)
     
     if response.status_code != 200:
         print(f"카카오 토큰 발급 실패: {response.text}")
@@ -88,7 +92,7 @@ def refresh_tokens(token_data):
         "refresh_token": token_data['refresh_token']
     }
     
-    response = requests.post(url, data=data)
+    response = get_transport().post(url, data=data)
     
     if response.status_code != 200:
         print(f"카카오 토큰 갱신 실패: {response.text}")
@@ -113,9 +117,11 @@ def refresh_tokens(token_data):
     print("카카오 토큰 갱신 성공!")
     return new_token_data
 
-def get_access_token():
+def get_access_token(interactive=True):
     """
     유효한 액세스 토큰 반환 (필요시 리프레시)
+    interactive=False 면 저장된 토큰 갱신과 KAKAO_CODE 까지만 시도하고 인증 코드를 묻지 않습니다
+    (전송 스레드에서 input() 으로 멈추지 않도록).
     """
     # 저장된 토큰 로드
     token_data = load_tokens()
@@ -134,6 +140,10 @@ def get_access_token():
         if token_data:
             return token_data['access_token']
     
+    if not interactive:
+        print("카카오 인증이 필요합니다. 메인 스레드에서 한 번 인증한 뒤 다시 시도하세요.")
+        return None
+
     # 인증 코드 안내 메시지
     auth_url = f"https://kauth.kakao.com/oauth/authorize?client_id={KAKAO_REST_API_KEY}&redirect_uri={KAKAO_REDIRECT_URI}&response_type=code&scope=profile_nickname,talk_message"
     print("\n유효한 토큰이 없습니다. 다음 URL에서 새 인증 코드를 발급받으세요:")
@@ -158,33 +168,49 @@ def send_kakao_message(date, time_slot, success=True):
         time_slot: 예약 시간대
         success: 예약 성공 여부
     """
+    # 날짜 형식 변환 (YYYYMMDD -> YYYY년 MM월 DD일)
+    formatted_date = f"{date[:4]}년 {date[4:6]}월 {date[6:8]}일"
+    
+    # 메시지 내용 설정
+    status = "예약 완료" if success else "예약 실패"
+    text = (f"골프장 예약 {'성공' if success else '실패'} 알림\n\n"
+            f"📅 날짜: {formatted_date}\n"
+            f"⏰ 시간: {time_slot}\n"
+            f"📝 상태: {status}")
+    return send_kakao_text(text)
+
+def send_kakao_text(text, receiver_uuids=None, button_title="예약 확인하기", web_url="http://www.ddgolf.co.kr"):
+    """
+    텍스트 템플릿 메시지 전송.
+    receiver_uuids 가 없으면 나에게 보내기, 있으면 친구에게 보내기 API 로 전송합니다
+    (친구에게 보내기는 앱에 friends 동의항목이 필요하고, 한 번에 최대 5명).
+    여러 스레드에서 동시에 불러도 되도록 토큰 조회/갱신은 잠금 안에서 합니다.
+    인증 코드 입력은 메인 스레드에서만 묻습니다 (다른 스레드는 갱신만 하고, 인증이 필요하면 전송 실패).
+    """
+    interactive = threading.current_thread() is threading.main_thread()
     # 유효한 액세스 토큰 가져오기
-    token = get_access_token()
+    with _TOKEN_LOCK:
+        token = get_access_token(interactive)
     
     if not token:
         print("카카오 토큰이 없어 메시지를 보낼 수 없습니다.")
         return False
     
-    # 날짜 형식 변환 (YYYYMMDD -> YYYY년 MM월 DD일)
-    formatted_date = f"{date[:4]}년 {date[4:6]}월 {date[6:8]}일"
-    
-    # 메시지 내용 설정
-    status = "예약 완료" if success else "예약 실패"
     message = {
         "object_type": "text",
-        "text": f"골프장 예약 {'성공' if success else '실패'} 알림\n\n"
-                f"📅 날짜: {formatted_date}\n"
-                f"⏰ 시간: {time_slot}\n"
-                f"📝 상태: {status}",
+        "text": text,
         "link": {
-            "web_url": "http://www.ddgolf.co.kr",
-            "mobile_web_url": "http://www.ddgolf.co.kr"
+            "web_url": web_url,
+            "mobile_web_url": web_url
         },
-        "button_title": "예약 확인하기"
+        "button_title": button_title
     }
     
     # 메시지 전송 API 호출
-    url = "https://kapi.kakao.com/v2/api/talk/memo/default/send"
+    if receiver_uuids:
+        url = "https://kapi.kakao.com/v1/api/talk/friends/message/default/send"
+    else:
+        url = "https://kapi.kakao.com/v2/api/talk/memo/default/send"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/x-www-form-urlencoded"
@@ -192,15 +218,20 @@ def send_kakao_message(date, time_slot, success=True):
     data = {
         "template_object": json.dumps(message)
     }
+    if receiver_uuids:
+        data["receiver_uuids"] = json.dumps(list(receiver_uuids))
     
     max_retries = 2
     retry_count = 0
+    started = time.monotonic()
     
     while retry_count <= max_retries:
-        response = requests.post(url, headers=headers, data=data)
+        response = get_transport().post(url, headers=headers, data=data)
         
         if response.status_code == 200:
             print("카카오톡 메시지 전송 성공!")
+            metrics.KAKAO_SECONDS.observe(time.monotonic() - started)
+            metrics.KAKAO_SENDS.inc(result="success")
             return True
         else:
             print(f"카카오톡 메시지 전송 실패: {response.text}")
@@ -210,15 +241,18 @@ def send_kakao_message(date, time_slot, success=True):
             if 'code' in error_data and error_data['code'] in [-401, -2]:
                 print("토큰이 만료되어 갱신을 시도합니다.")
                 # 토큰 갱신 시도
-                token = get_access_token()
+                with _TOKEN_LOCK:
+                    token = get_access_token(interactive)
                 if token:
                     headers["Authorization"] = f"Bearer {token}"
                     retry_count += 1
                     continue
             
             # 권한 부족 또는 기타 오류
+            metrics.KAKAO_SENDS.inc(result="error")
             return False
     
+    metrics.KAKAO_SENDS.inc(result="error")
     return False
 
 # 메인 실행 부분
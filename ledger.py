@@ -0,0 +1,262 @@
+import os
+import time
+import sqlite3
+import threading
+from botlog import get_logger
+
+log = get_logger("ledger")
+
+# 여러 워커/프로세스가 같은 계정으로 같은(또는 겹치는) 티타임에 bookProsecc_join 을
+# 동시에 보내지 않도록 막는 예약 원장입니다.
+# 프로세스 내부는 threading.Lock, 프로세스 간에는 SQLite 의 BEGIN IMMEDIATE 쓰기 잠금으로 직렬화합니다.
+
+STATUS_PENDING = "pending"
+STATUS_BOOKED = "booked"
+STATUS_FAILED = "failed"
+STATUS_EXPIRED = "expired"
+# 성공 여부를 확인하지 못한 건은 중복 예약을 막기 위해 완료와 같이 취급합니다.
+# 서버가 신청을 받았을 수도 있으므로 사이트에서 확인한 뒤 resolve() (python cli.py ledger resolve ...) 로
+# 정리할 때까지 그 날짜를 막아 둡니다 (unknown_ttl 을 주면 그 시간 뒤 만료, 기본은 만료 없음).
+STATUS_UNKNOWN = "unknown"
+_ACTIVE = (STATUS_PENDING, STATUS_BOOKED, STATUS_UNKNOWN)
+# hold_date() 로 슬롯 없이 날짜만 선점한 행의 minutes
+HOLD_MINUTES = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    account    TEXT    NOT NULL,
+    date       INTEGER NOT NULL,
+    minutes    INTEGER NOT NULL,
+    course     INTEGER NOT NULL,
+    status     TEXT    NOT NULL,
+    owner      TEXT    NOT NULL,
+    detail     TEXT    NOT NULL DEFAULT '',
+    claimed_at REAL    NOT NULL,
+    updated_at REAL    NOT NULL,
+    PRIMARY KEY (account, date, minutes, course)
+)
+"""
+
+
+class Claim:
+    """원장에 선점된 슬롯 (record 로 결과를 남길 때 사용)"""
+    __slots__ = ("account", "date", "minutes", "course", "owner")
+
+    def __init__(self, account, date, minutes, course, owner):
+        self.account = account
+        self.date = date
+        self.minutes = minutes
+        self.course = course
+        self.owner = owner
+
+    def __repr__(self):
+        if self.minutes == HOLD_MINUTES:
+            return f"Claim({self.account} {self.date} 날짜 보류)"
+        return f"Claim({self.account} {self.date} {self.minutes // 60:02d}:{self.minutes % 60:02d} {self.course})"
+
+
+class _DateHold:
+    """hold_date() 가 claim() 에 넘기는 날짜 단위 선점 대상"""
+    minutes = HOLD_MINUTES
+    course_key = 0
+
+    def __init__(self, date):
+        self.date = int(date)
+
+    @property
+    def date_text(self):
+        return f"{self.date:08d}"
+
+    def __str__(self):
+        return f"{self.date_text} 날짜 보류"
+
+
+class BookingLedger:
+    """
+    계정/날짜/시간/코스 기준 예약 원장.
+
+    claim() 으로 네트워크 요청 전에 슬롯을 선점하고, 결과는 record() 로 남깁니다.
+    - 같은 키가 이미 진행 중(pending)이거나 예약 완료(booked/unknown)이면 선점 실패
+    - 같은 계정/날짜의 진행 중+완료 건수가 max_per_day 이상이면 선점 실패
+    - 같은 계정/날짜에 conflict_minutes 이내의 다른 티타임이 있으면 선점 실패
+    claim_ttl 초가 지나도 결과가 기록되지 않은 pending 은 죽은 워커로 보고 만료시킵니다.
+    unknown 은 resolve() 로 정리할 때까지 유지합니다 (unknown_ttl 을 주면 그 시간 뒤 만료).
+    """
+
+    def __init__(self, path="booking_ledger.sqlite3", max_per_day=1, conflict_minutes=60, claim_ttl=120,
+                 unknown_ttl=None):
+        self.path = path
+        self.max_per_day = max_per_day
+        self.conflict_minutes = conflict_minutes
+        self.claim_ttl = claim_ttl
+        self.unknown_ttl = unknown_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+
+    def _owner(self):
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def claim(self, account, slot, owner=None):
+        """
+        슬롯 선점. 성공하면 Claim, 중복/한도 초과/충돌이면 None.
+        owner 를 주면 현재 프로세스/스레드 대신 그 이름으로 선점합니다 (fleet 코디네이터가 워커 대신 선점).
+        """
+        now = time.time()
+        key = (account, slot.date, slot.minutes, slot.course_key)
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute(
+                    "UPDATE claims SET status = ?, updated_at = ? WHERE status = ? AND claimed_at < ?",
+                    (STATUS_EXPIRED, now, STATUS_PENDING, now - self.claim_ttl),
+                )
+                if self.unknown_ttl is not None:
+                    cur.execute(
+                        "UPDATE claims SET status = ?, detail = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                        (STATUS_EXPIRED, "unknown 확인 기한 초과", now, STATUS_UNKNOWN, now - self.unknown_ttl),
+                    )
+                    if cur.rowcount:
+                        log.warning(f"{self.unknown_ttl}초 동안 확인되지 않은 결과 불명 예약 {cur.rowcount}건을 만료했습니다.")
+                cur.execute(
+                    "SELECT status FROM claims WHERE account = ? AND date = ? AND minutes = ? AND course = ?",
+                    key,
+                )
+                row = cur.fetchone()
+                if row and row[0] in _ACTIVE:
+                    log.info(f"이미 진행 중이거나 완료된 예약입니다: {slot} ({row[0]})")
+                    cur.execute("ROLLBACK")
+                    return None
+
+                cur.execute(
+                    "SELECT minutes FROM claims WHERE account = ? AND date = ? AND status IN (?, ?, ?)",
+                    (account, slot.date) + _ACTIVE,
+                )
+                active = [r[0] for r in cur.fetchall()]
+                if len(active) >= self.max_per_day:
+                    log.info(f"{slot.date_text} 예약 한도({self.max_per_day}건)에 도달했습니다: {slot}")
+                    cur.execute("ROLLBACK")
+                    return None
+                if any(abs(m - slot.minutes) < self.conflict_minutes for m in active):
+                    log.info(f"같은 날 겹치는 티타임이 이미 진행 중입니다: {slot}")
+                    cur.execute("ROLLBACK")
+                    return None
+
+                owner = owner or self._owner()
+                cur.execute(
+                    "INSERT OR REPLACE INTO claims "
+                    "(account, date, minutes, course, status, owner, detail, claimed_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, '', ?, ?)",
+                    key + (STATUS_PENDING, owner, now, now),
+                )
+                cur.execute("COMMIT")
+                return Claim(*key, owner)
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def hold_date(self, account, date, owner=None):
+        """
+        슬롯을 모르는 상태에서 날짜 하나를 선점 (브라우저 안에서 찾는 즉시 제출하는 에이전트용).
+        그 날짜의 한도(max_per_day)를 하나 차지하므로 다른 프로세스는 그 날짜에 새로 선점하지 못합니다.
+        claim_ttl 안에 renew() 로 연장하고, 실제로 신청한 슬롯은 assign() 으로 옮긴 뒤 record() 합니다.
+        """
+        return self.claim(account, _DateHold(date), owner)
+
+    def renew(self, claim):
+        """진행 중인 선점의 만료 시각 연장. 이미 만료/기록됐으면 False"""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE claims SET claimed_at = ?, updated_at = ? "
+                "WHERE account = ? AND date = ? AND minutes = ? AND course = ? AND owner = ? AND status = ?",
+                (now, now, claim.account, claim.date, claim.minutes, claim.course, claim.owner, STATUS_PENDING),
+            )
+            return cur.rowcount > 0
+
+    def assign(self, hold, slot):
+        """
+        날짜 보류를 실제 신청한 슬롯의 선점으로 옮겨 그 Claim 을 반환.
+        같은 슬롯을 다른 곳에서 이미 선점했으면 옮기지 않고 보류를 그대로 반환합니다 (결과는 보류 행에 기록).
+        """
+        key = (hold.account, slot.date, slot.minutes, slot.course_key)
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute(
+                    "SELECT status FROM claims WHERE account = ? AND date = ? AND minutes = ? AND course = ?",
+                    key,
+                )
+                row = cur.fetchone()
+                if row and row[0] in _ACTIVE:
+                    log.warning(f"보류한 날짜에서 신청한 슬롯이 이미 다른 곳에서 선점되어 있습니다: {slot} ({row[0]})")
+                    cur.execute("ROLLBACK")
+                    return hold
+                cur.execute("DELETE FROM claims WHERE account = ? AND date = ? AND minutes = ? AND course = ?", key)
+                cur.execute(
+                    "UPDATE claims SET minutes = ?, course = ?, updated_at = ? "
+                    "WHERE account = ? AND date = ? AND minutes = ? AND course = ? AND owner = ?",
+                    (slot.minutes, slot.course_key, time.time(),
+                     hold.account, hold.date, hold.minutes, hold.course, hold.owner),
+                )
+                cur.execute("COMMIT")
+                return Claim(*key, hold.owner)
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def record(self, claim, status, detail=""):
+        """선점한 슬롯의 결과(booked/failed) 기록"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE claims SET status = ?, detail = ?, updated_at = ? "
+                "WHERE account = ? AND date = ? AND minutes = ? AND course = ? AND owner = ?",
+                (status, detail, time.time(), claim.account, claim.date, claim.minutes, claim.course, claim.owner),
+            )
+
+    def expire_owner(self, owner):
+        """owner 의 진행 중(pending) 선점을 모두 만료 (죽은 워커 정리). 만료한 건수 반환"""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE claims SET status = ?, updated_at = ? WHERE owner = ? AND status = ?",
+                (STATUS_EXPIRED, time.time(), owner, STATUS_PENDING),
+            )
+            return cur.rowcount
+
+    def unresolved(self, account=None):
+        """결과 불명(unknown) 건: [(account, date, minutes, course, updated_at), ...]"""
+        query = "SELECT account, date, minutes, course, updated_at FROM claims WHERE status = ?"
+        params = [STATUS_UNKNOWN]
+        if account is not None:
+            query += " AND account = ?"
+            params.append(account)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY date, minutes", params).fetchall()
+
+    def resolve(self, account, date, status, detail="수동 확인"):
+        """사이트에서 확인한 결과(booked/failed)로 그 날짜의 unknown 건을 정리. 바꾼 건수 반환"""
+        if status not in (STATUS_BOOKED, STATUS_FAILED):
+            raise ValueError(f"status 는 {STATUS_BOOKED} 또는 {STATUS_FAILED} 여야 합니다: {status}")
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE claims SET status = ?, detail = ?, updated_at = ? WHERE account = ? AND date = ? AND status = ?",
+                (status, detail, time.time(), account, int(date), STATUS_UNKNOWN),
+            )
+            return cur.rowcount
+
+    def bookings(self, account, date=None):
+        """예약 완료 기록 조회: [(date, minutes, course, detail), ...]"""
+        query = "SELECT date, minutes, course, detail FROM claims WHERE account = ? AND status = ?"
+        params = [account, STATUS_BOOKED]
+        if date is not None:
+            query += " AND date = ?"
+            params.append(int(date))
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY date, minutes", params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
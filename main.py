@@ -1,6 +1,8 @@
 import time
 import re
 import os
+import threading
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -11,7 +13,20 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException
 from dotenv import load_dotenv, dotenv_values
+from slots import Slot, SlotFilter, Holes, parse_calendar_html, parse_tee_sheet_html
+from history import SnapshotStore
+from ledger import BookingLedger, STATUS_BOOKED, STATUS_FAILED, STATUS_UNKNOWN
+from resources import ResourceMonitor
+from driver_pool import DriverPool, build_chrome_options
+from page_fetch import submit_join_form, booking_succeeded
+from deadline import Deadline, DeadlineExceeded
+from botlog import get_logger
+import metrics
+import forensics
+
+log = get_logger("main")
 
 # .env 파일 로드
 load_dotenv()
@@ -20,35 +35,244 @@ load_dotenv()
 env_values = dotenv_values()
 GOLF_USERNAME = env_values.get("USERNAME") or os.getenv("GOLF_USERNAME")
 GOLF_PASSWORD = env_values.get("PASSWORD") or os.getenv("GOLF_PASSWORD")
+# 신청 확인 팝업을 수락한 뒤에는 서버가 이미 처리 중이므로, 결과 팝업은 시도 예산과 상관없이 이만큼 기다립니다.
+BOOKING_RESULT_TIMEOUT = 10
 
 
 class ReservationBot:
-    def __init__(self, user_dates, monitor_interval=5, start_hour=8, end_hour=13):
+    def __init__(self, user_dates, monitor_interval=5, start_hour=8, end_hour=13, recorder=None, ledger=None,
+                 resource_monitor=None, driver_pool=None, reservation_url=None, traffic=None):
         self.user_dates = user_dates
         self.monitor_interval = monitor_interval
         self.username = GOLF_USERNAME
         self.password = GOLF_PASSWORD
         self.start_time = datetime.now()
-        self.reservation_url = "http://www.ddgolf.co.kr/03reservation/reservation02.asp"
+        # 픽스처 서버(fixture_server.FixtureServer)로 돌릴 때는 그쪽 주소를 넘깁니다.
+        self.reservation_url = reservation_url or "http://www.ddgolf.co.kr/03reservation/reservation02.asp"
+        # 미리 띄워 둔 드라이버 풀 (DriverPool, None 이면 매번 새로 실행)
+        self.driver_pool = driver_pool
+        # 요청/응답 기록 (traffic_capture.TrafficRecorder, None 이면 기록하지 않음)
+        self.traffic = traffic
         self.driver, self.wait = self._setup_driver()
         self.start_hour = start_hour
         self.end_hour = end_hour
+        # 관측 기록 저장소 (SnapshotStore, None 이면 기록하지 않음)
+        self.recorder = recorder
+        # 중복 예약 방지 원장 (BookingLedger, None 이면 사용하지 않음)
+        self.ledger = ledger
+        # 드라이버 메모리/지연 감시 (ResourceMonitor, None 이면 드라이버를 교체하지 않음)
+        self.resource_monitor = resource_monitor
+        # 실행 중 설정 변경 (control_api.BotController, None 이면 사용하지 않음)
+        self.control = None
+        # 오픈 직전 시간표 미리 조회 (prefetch.TeeSheetPrefetcher, None 이면 사용하지 않음)
+        self.prefetcher = None
+        # 같은 호스트의 감시들이 함께 쓰는 요청 속도 제한 (rate_limiter.SharedRateLimiter, None 이면 제한 없음)
+        self.rate_limiter = None
+        # 브라우저 대신 HTTP 로 달력 변경 확인 (conditional_fetch.CalendarPoller, None 이면 매번 브라우저 새로고침)
+        self.calendar_poller = None
+        # 감시 한 주기 / 날짜 하나 예약 시도의 시간 예산(초), 예산 밖에서 쓰는 페이지 로드 제한
+        self.cycle_budget = 30
+        self.attempt_budget = 15
+        self.page_load_timeout = 30
+        # 상태 체크포인트 (checkpoint.BotCheckpoint, None 이면 저장/복원하지 않음)
+        self.checkpoint = None
+        # 예약 완료한 날짜 → 시간, 날짜별 시도 기록 (체크포인트로 재시작 후에도 유지)
+        self.booked = {}
+        self.attempts = {}
+        self._first_poll_done = False
+        self._replacement = None
 
     def _setup_driver(self):
-        chrome_options = Options()
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        driver = webdriver.Chrome(options=chrome_options)
-        wait = WebDriverWait(driver, 10)
+        if self.traffic is not None:
+            # 기록 모드는 performance 로그가 켜진 드라이버가 필요하므로 풀을 쓰지 않습니다.
+            driver = webdriver.Chrome(options=build_chrome_options(performance_log=True))
+            self.traffic.attach(driver)
+            wait = WebDriverWait(driver, 10)
+        elif self.driver_pool is not None:
+            driver, wait = self.driver_pool.acquire()
+        else:
+            driver = webdriver.Chrome(options=build_chrome_options())
+            wait = WebDriverWait(driver, 10)
+        metrics.instrument_driver(driver)
         return driver, wait
 
+    def _collect_traffic(self):
+        if self.traffic is not None:
+            self.traffic.collect(self.driver)
+
+    def _shutdown(self):
+        """기록 저장소를 닫고 드라이버 종료"""
+        self._collect_traffic()
+        if self.traffic is not None:
+            self.traffic.save()
+        if self.recorder is not None:
+            self.recorder.close()
+        forensics.BUFFER.flush()
+        self.driver.quit()
+
+    def _prepare_replacement(self, reason):
+        """
+        백그라운드 스레드에서 새 드라이버를 띄우고 현재 세션 쿠키를 옮겨 둡니다.
+        준비되는 동안에도 기존 드라이버는 계속 감시를 수행합니다.
+        """
+        log.info(f"드라이버 교체 준비 시작: {reason}")
+        cookies = self.driver.get_cookies()
+        result = {}
+
+        def build():
+            try:
+                driver, wait = self._setup_driver()
+                driver.get(self.reservation_url)
+                for cookie in cookies:
+                    try:
+                        driver.add_cookie(cookie)
+                    except Exception:
+                        pass
+                driver.get(self.reservation_url)
+                result["driver"] = (driver, wait)
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=build, daemon=True)
+        thread.start()
+        self._replacement = (thread, result)
+
+    def _maintain_driver(self):
+        """주기 사이에 호출: 준비된 새 드라이버가 있으면 교체하고, 없으면 교체 필요 여부 확인"""
+        if self.resource_monitor is None:
+            return
+        if self._replacement is not None:
+            thread, result = self._replacement
+            if thread.is_alive():
+                return
+            self._replacement = None
+            if "driver" not in result:
+                log.warning(f"새 드라이버 준비 실패: {result.get('error')}")
+                return
+            old_driver = self.driver
+            self._collect_traffic()
+            self.driver, self.wait = result["driver"]
+            self.resource_monitor.reset()
+            threading.Thread(target=old_driver.quit, daemon=True).start()
+            log.info("새 드라이버로 교체했습니다.")
+            return
+        reason = self.resource_monitor.should_recycle(self.driver)
+        if reason:
+            self._prepare_replacement(reason)
+
+    def _observe_cycle(self, started):
+        elapsed = time.monotonic() - started
+        metrics.record_poll(elapsed)
+        forensics.BUFFER.span_record("cycle", elapsed)
+        if not self._first_poll_done:
+            self._first_poll_done = True
+            startup = time.time() - metrics.REGISTRY.started_at
+            metrics.STARTUP_SECONDS.set(startup)
+            log.info(f"시작 후 첫 감시까지 {startup:.2f}초")
+        if self.resource_monitor is not None:
+            self.resource_monitor.observe_cycle(elapsed)
+
+    def _apply_control(self):
+        """제어 API 로 들어온 변경을 주기 사이에 반영. 일시정지 중이면 True"""
+        if self.control is None:
+            return False
+        self.control.apply_pending()
+        return self.control.paused
+
+    def _sleep(self, seconds):
+        # 제어 API 가 있으면 변경 요청이 들어오는 즉시 깨어남
+        if self.control is not None:
+            self.control.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+    def _throttle(self, kind="poll"):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(kind)
+
+    @contextmanager
+    def _booking(self):
+        """
+        예약 구간: 이 동안 같은 호스트의 다른 감시는 폴링을 멈춥니다.
+        구간이 끝나면 시도 중에 미뤄 둔 실패 페이지를 읽어 저장합니다.
+        """
+        try:
+            with self.rate_limiter.booking() if self.rate_limiter is not None else nullcontext():
+                yield
+        finally:
+            forensics.settle()
+
+    def _refresh_calendar(self):
+        """
+        달력 새로고침. 브라우저를 새로고침했으면 True.
+        calendar_poller 가 있으면 HTTP 로 먼저 확인하고, 감시 날짜가 열렸거나 확인에 실패했을 때만 새로고침합니다.
+        """
+        if self.calendar_poller is not None and not self._calendar_opened():
+            return False
+        self._throttle()
+        started = time.monotonic()
+        self.driver.refresh()
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe_navigation(self.driver, time.monotonic() - started)
+        return True
+
+    def _calendar_opened(self):
+        started = time.monotonic()
+        try:
+            self.calendar_poller.sync_cookies(self.driver)
+            self._throttle()
+            poll = self.calendar_poller.poll()
+        except Exception as e:
+            log.warning(f"HTTP 달력 확인 실패, 브라우저로 확인합니다: {e}")
+            return True
+        if self.rate_limiter is not None:
+            self.rate_limiter.report(poll.elapsed_ms / 1000, poll.status)
+        self._observe_cycle(started)
+        if not poll.ok:
+            if poll.login_required:
+                self.calendar_poller.sync_cookies(self.driver, force=True)
+            return True
+        if poll.changed and self.recorder is not None:
+            self.recorder.record_calendar(poll.days)
+        return any(date in self.user_dates for date in poll.dates)
+
+    def _note_attempt(self, date, booked_time=None):
+        record = self.attempts.setdefault(date, {"count": 0})
+        record["count"] += 1
+        record["last_at"] = time.time()
+        record["booked"] = booked_time is not None
+        if booked_time is not None:
+            self.booked[date] = booked_time
+
+    def _save_checkpoint(self, force=False):
+        if self.checkpoint is None:
+            return
+        try:
+            self.checkpoint.save(self, force=force)
+        except Exception as e:
+            log.warning(f"체크포인트 저장 실패: {e}")
+
+    def resume_session(self, cookies):
+        """저장해 둔 세션 쿠키로 로그인 상태 복원. 로그인 링크가 보이면(세션 만료) False"""
+        try:
+            self.driver.get(self.reservation_url)
+            for cookie in cookies:
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception:
+                    pass
+            self.driver.get(self.reservation_url)
+            if self.driver.find_elements(By.XPATH, "//a[contains(@href, 'member01.asp') and contains(text(), '로그인')]"):
+                log.info("저장된 세션이 만료되어 다시 로그인합니다.")
+                return False
+        except Exception as e:
+            log.warning(f"세션 복원 실패: {e}")
+            return False
+        log.info("저장된 세션으로 로그인 상태를 복원했습니다.")
+        return True
+
     def _login(self):
+        metrics.LOGINS.inc()
         try:
             self.driver.get(self.reservation_url)
             elem = self.driver.find_element(By.XPATH, "//a[contains(@href, 'member01.asp') and contains(text(), '로그인')]")
@@ -58,7 +282,28 @@ class ReservationBot:
         except:
             pass
 
+    def _record_calendar(self):
+        if self.recorder is None:
+            return
+        try:
+            source = self.driver.page_source
+            forensics.capture("calendar", url=self.reservation_url, html=source)
+            self.recorder.record_calendar(parse_calendar_html(source))
+        except Exception as e:
+            log.error(f"달력 기록 중 오류 발생: {e}")
+
+    def _record_tee_sheet(self, date):
+        if self.recorder is None:
+            return
+        try:
+            source = self.driver.page_source
+            forensics.capture("tee_sheet", html=source, date=date)
+            self.recorder.record_tee_sheet(date, parse_tee_sheet_html(source))
+        except Exception as e:
+            log.error(f"시간표 기록 중 오류 발생: {e}")
+
     def _get_available_dates(self):
+        self._record_calendar()
         raw = self.driver.find_elements(By.XPATH, "//td[@class='on' and contains(@onclick, 'transDate_join')]")
         avail = []
         for e in raw:
@@ -67,45 +312,219 @@ class ReservationBot:
                 avail.append((m.group(1), e))
         return avail
 
-    def _attempt_reserve(self, date, elem):
-        try:
-            elem.click()
+    def _attempt_reserve(self, date, elem, deadline=None):
+        """
+        날짜 하나 예약 시도. deadline(cycle 예산)이 주어지면 그 안에서 attempt_budget 초짜리 하위 예산을 만들고,
+        모든 대기/페이지 로드/팝업 확인이 그 예산을 넘지 않도록 합니다.
+        """
+        # 날짜 발견 시각 (신청서 제출까지의 지연 측정 기준)
+        detected_at = time.monotonic()
+        if deadline is None:
+            deadline = Deadline(self.attempt_budget, scope="attempt")
+        attempt = deadline.child(self.attempt_budget, f"{date} 예약 시도")
+        wait = attempt.wait(self.driver)
+        with self._booking(), forensics.span(f"attempt {date}"):
             try:
-                alert = self.wait.until(EC.alert_is_present(), timeout=5)
-                if "로그인" in alert.text:
-                    alert.accept()
+                with attempt.page_loads(self.driver, restore=self.page_load_timeout):
+                    self._throttle("book")
+                    elem.click()
+                    # 로그인 만료 팝업은 클릭 직후 바로 뜹니다 (기다리지 않고 확인).
+                    alert = EC.alert_is_present()(self.driver)
+                    login_expired = bool(alert) and "로그인" in alert.text
+                    if login_expired:
+                        forensics.capture("login_expired", alert=alert.text, date=date)
+                        metrics.ALERTS.inc(outcome="login_required")
+                        alert.accept()
+                    else:
+                        wait.until(EC.presence_of_element_located((By.XPATH, "//table/tbody/tr[td[@class='gray']]")))
+                        self._record_tee_sheet(date)
+                        ok, t = reserve_for_two_members(self.driver, wait, self.start_hour, self.end_hour,
+                                                        ledger=self.ledger, account=self.username,
+                                                        detected_at=detected_at, deadline=attempt)
+                if login_expired:
+                    # 로그인은 시도 예산 밖에서 (페이지 로드 제한도 원래대로)
                     self._login()
                     return False
-            except:
-                pass
-            self.wait.until(EC.presence_of_element_located((By.XPATH, "//table/tbody/tr[td[@class='gray']]") ))
-            ok, t = reserve_for_two_members(self.driver, self.wait, self.start_hour, self.end_hour)
-            if ok:
-                print(f"{date} {t} 예약 성공!")
-                return True
-        except:
-            pass
-        finally:
-            self.driver.get(self.reservation_url)
+                self._note_attempt(date, t if ok else None)
+                if ok:
+                    log.info(f"{date} {t} 예약 성공!")
+                    return True
+            except TimeoutException as e:
+                if attempt.expired:
+                    attempt.report(e)
+                    self._note_attempt(date)
+                else:
+                    log.warning(f"{date} 예약 시도 중 대기 시간 초과: {e.msg or e}")
+                forensics.failure(f"{date} 예약 시도 시간 초과", e, self.driver)
+            except Exception as e:
+                forensics.failure(f"{date} 예약 시도 오류", e, self.driver)
+            finally:
+                # 미뤄 둔 실패 페이지와 시간표/신청 응답 본문은 달력으로 돌아가기 전에 가져와야 합니다.
+                forensics.settle()
+                self._collect_traffic()
+                self.driver.get(self.reservation_url)
+            return False
+
+    def _book_prefetched(self):
+        """
+        미리 받아 둔 시간표에 조건에 맞는 슬롯이 있으면 시간표 페이지를 열지 않고 바로 신청.
+        예약에 성공하면 True.
+        """
+        self.prefetcher.sync_cookies(self.driver)
+        for date, slots, detected_at in self.prefetcher.ready():
+            log.info(f"{date} 미리 조회한 시간표로 바로 신청합니다 ({len(slots)}개 슬롯)")
+            attempt = Deadline(self.attempt_budget, f"{date} 미리 조회 신청", scope="attempt")
+            try:
+                with self._booking():
+                    for slot in slots:
+                        claim = None
+                        if self.ledger is not None:
+                            claim = self.ledger.claim(self.username, slot)
+                            if claim is None:
+                                continue
+                        status = STATUS_FAILED
+                        try:
+                            self._throttle("book")
+                            attempt.check(f"{slot.time_text} 신청 전")
+                            submit_join_form(self.driver, self.reservation_url, slot)
+                            metrics.DETECT_TO_SUBMIT.observe(time.monotonic() - detected_at)
+                            # 제출한 뒤에는 예산이 아니라 고정 시간만큼 결과를 기다립니다.
+                            status = _await_booking_result(self.driver, WebDriverWait(self.driver, BOOKING_RESULT_TIMEOUT),
+                                                           slot.time_text)
+                        finally:
+                            if claim is not None:
+                                self.ledger.record(claim, status)
+                        self._note_attempt(date, slot.time_text if status == STATUS_BOOKED else None)
+                        if status == STATUS_BOOKED:
+                            log.info(f"{date} {slot.time_text} 예약 성공!")
+                            self.prefetcher.mark_done(date)
+                            return True
+            except Exception as e:
+                log.error(f"미리 조회한 시간표로 신청 중 오류 발생: {e}")
+                forensics.failure(f"{date} 미리 조회 신청 오류", e, self.driver)
+            finally:
+                self.driver.get(self.reservation_url)
+            # 캐시된 슬롯이 모두 실패했으면 기존 흐름(달력 → 시간표)으로 확인
+            self.prefetcher.mark_done(date)
         return False
 
     def run(self):
         if not self.username or not self.password:
-            print("로그인 정보 누락")
+            log.warning("로그인 정보 누락")
             return
-        self._login()
+        if self.checkpoint is None or not self.checkpoint.restore(self):
+            self._login()
+        if not self.user_dates:
+            log.info("감시할 날짜가 모두 예약되었습니다.")
+            self._shutdown()
+            return
+        refreshed = True
         while True:
-            avail = self._get_available_dates()
-            if not avail:
-                print(f"예약가능 날짜 없음. {self.monitor_interval}초 후 재시도")
-                time.sleep(self.monitor_interval)
-                self.driver.refresh()
+            if self._apply_control():
+                self._sleep(self.monitor_interval)
                 continue
-            for d, e in avail:
-                if self._attempt_reserve(d, e):
-                    self.driver.quit()
-                    return
-            time.sleep(self.monitor_interval)
+            # HTTP 확인에서 변화가 없었으면 브라우저 쪽 주기는 건너뜁니다 (미리 조회한 시간표가 있으면 제외).
+            result = self.run_cycle() if refreshed or self.prefetcher is not None else None
+            self._save_checkpoint(force=bool(result))
+            if result:
+                self._shutdown()
+                return
+            if result is None:
+                log.info(f"예약가능 날짜 없음. {self.monitor_interval}초 후 재시도")
+            self._sleep(self.monitor_interval)
+            refreshed = True
+            if result is None:
+                refreshed = self._refresh_calendar()
+
+    def run_cycle(self):
+        """
+        감시 한 주기 (대기 시간 제외).
+        예약에 성공하면 True, 날짜는 있었지만 실패하면 False, 예약 가능한 날짜가 없으면 None.
+        """
+        self._maintain_driver()
+        cycle_started = time.monotonic()
+        if self.prefetcher is not None and self._book_prefetched():
+            self._observe_cycle(cycle_started)
+            return True
+        avail = self._get_available_dates()
+        if not avail:
+            self._observe_cycle(cycle_started)
+            self._collect_traffic()
+            return None
+        cycle = Deadline(self.cycle_budget, "감시 주기")
+        for index, (d, e) in enumerate(avail):
+            if cycle.expired:
+                cycle.report()
+                log.warning(f"확인하지 못한 날짜: {[date for date, _ in avail[index:]]}")
+                break
+            if index > 0:
+                # 앞 날짜 시도 후 달력을 다시 불러왔으므로 셀을 다시 찾습니다.
+                cells = self.driver.find_elements(
+                    By.XPATH, f"//td[@class='on' and contains(@onclick, \"transDate_join('{d}')\")]")
+                if not cells:
+                    continue
+                e = cells[0]
+            if self._attempt_reserve(d, e, cycle):
+                self._observe_cycle(cycle_started)
+                return True
+        self._observe_cycle(cycle_started)
+        return False
+
+    def watch_in_page(self, timeout=3600):
+        """페이지 내 감시 에이전트 모드 (inpage_agent.InPageAgent 참고)"""
+        from inpage_agent import InPageAgent
+
+        if not self.username or not self.password:
+            log.warning("로그인 정보 누락")
+            return
+        self._login()
+        try:
+            ok, t = InPageAgent(self).book(timeout=timeout)
+            if ok:
+                log.info(f"{t} 예약 성공!")
+            return ok, t
+        finally:
+            self._shutdown()
+
+    def watch_tabs(self, timeout=None):
+        """날짜별 탭 감시 모드 (tab_pool.TabMultiplexer 참고)"""
+        from tab_pool import TabMultiplexer
+
+        if not self.username or not self.password:
+            log.warning("로그인 정보 누락")
+            return
+        self._login()
+        try:
+            return TabMultiplexer(self, interval=self.monitor_interval).run(timeout=timeout)
+        finally:
+            self._shutdown()
+
+    def snipe(self, timeout=None):
+        """취소분 스나이핑 모드 (sniper.CancellationSniper 참고)"""
+        from sniper import CancellationSniper
+
+        if not self.username or not self.password:
+            log.warning("로그인 정보 누락")
+            return
+        self._login()
+        try:
+            return CancellationSniper(self).run(timeout=timeout)
+        finally:
+            self._shutdown()
+
+    def profile(self, cycles=10, output_dir="profile", deterministic=False, stop_on_booking=True):
+        """감시 주기 프로파일링 모드 (profiling.CycleProfiler 참고)"""
+        from profiling import CycleProfiler
+
+        if not self.username or not self.password:
+            log.warning("로그인 정보 누락")
+            return
+        self._login()
+        try:
+            return CycleProfiler(self, output_dir=output_dir, deterministic=deterministic).run(
+                cycles, stop_on_booking=stop_on_booking)
+        finally:
+            self._shutdown()
 
 
 def perform_login(driver, wait, username, password):
@@ -117,44 +536,45 @@ def perform_login(driver, wait, username, password):
     """
     try:
         # 로그인 정보 확인
-        print(f"로그인 시도: 사용자명={username}")
+        log.debug("로그인 시도: 사용자명=%s", username)
         
         # 로그인 페이지 로딩 대기 
-        print("로그인 페이지 로딩 대기 중...")
+        log.debug("로그인 페이지 로딩 대기 중...")
         time.sleep(3)
         
         # 아이디 입력 (name="UserID")
         id_input = driver.find_element(By.NAME, "UserID")
         id_input.clear()
         id_input.send_keys(username)
-        print("아이디 입력 완료")
+        log.debug("아이디 입력 완료")
         
         # 비밀번호 입력 (name="Password")
         pw_input = driver.find_element(By.NAME, "Password")
         pw_input.clear()
         pw_input.send_keys(password)
-        print("비밀번호 입력 완료")
+        log.debug("비밀번호 입력 완료")
         
         # 로그인 버튼 클릭 (이미지 src="/image/btn_login.jpg")
         # 이미지 버튼이므로 이미지를 감싸고 있는 a 태그나 이미지 직접 클릭 시도
         login_button = driver.find_element(By.XPATH, "//img[@src='/image/btn_login.jpg']")
         login_button.click()
-        print("로그인 버튼 이미지 클릭")
+        log.debug("로그인 버튼 이미지 클릭")
         
         # 로그인 완료 후 로딩 대기
-        print("로그인 처리 중...")
+        log.debug("로그인 처리 중...")
         time.sleep(5)
         
-        print("로그인 완료!")
+        log.info("로그인 완료!")
     except Exception as e:
-        print(f"로그인 과정에서 오류 발생: {e}")
+        log.error(f"로그인 과정에서 오류 발생: {e}")
         # 페이지 소스 일부 출력하여 디버깅에 도움
         try:
             page_source = driver.page_source
-            print("현재 페이지 소스 일부:")
-            print(page_source[:1000])  # 처음 1000자만 출력
+            log.debug("현재 페이지 소스 일부:\n%s", page_source[:1000])  # 처음 1000자만 출력
+            forensics.capture("login", html=page_source)
         except:
-            print("페이지 소스를 가져올 수 없습니다.")
+            log.warning("페이지 소스를 가져올 수 없습니다.")
+        forensics.failure("로그인 오류", e)
 
 def select_date(driver, wait, target_date):
     """
@@ -165,150 +585,316 @@ def select_date(driver, wait, target_date):
         # td class="on" 요소를 찾아 클릭 (onclick 속성에 transDate_join 함수 호출 포함)
         date_elem = driver.find_element(By.XPATH, f"//td[@class='on' and contains(@onclick, 'transDate_join')]")
         date_elem.click()
-        print(f"날짜 선택 클릭 완료.")
+        log.debug(f"날짜 선택 클릭 완료.")
         
         # 날짜 선택 후, reservation02_1.asp 페이지 로딩 대기
         wait.until(EC.presence_of_element_located((By.XPATH, "//table/tbody/tr[td[@class='gray']]")))
-        print("예약 가능 시간 페이지 로딩 완료")
+        log.debug("예약 가능 시간 페이지 로딩 완료")
     except Exception as e:
-        print(f"날짜 선택 중 오류 발생:", e)
+        log.error("날짜 선택 중 오류 발생: %s", e)
+
+def _await_booking_result(driver, wait, time_text):
+    """
+    신청서 제출 후 두 번째 팝업(예약 성공/실패)을 확인해 ledger 상태값으로 반환.
+    """
+    # 두 번째 팝업(예약 성공) 처리 시도
+    try:
+        # 예약 성공 알림 팝업 대기 (최대 10초)
+        success_alert = wait.until(EC.alert_is_present())
+        success_text = success_alert.text
+        log.debug("두 번째 팝업 메시지: %s", success_text)
+        forensics.capture("result", alert=success_text, time=time_text)
+
+        # 예약 성공 메시지 확인
+        if booking_succeeded(success_text):
+            success_alert.accept()
+            log.info(f"예약 성공 확인! {time_text}에 예약이 완료되었습니다.")
+            metrics.ALERTS.inc(outcome=STATUS_BOOKED)
+            return STATUS_BOOKED
+        else:
+            # 예약 실패 메시지인 경우
+            success_alert.accept()
+            log.warning(f"예약 실패 메시지: {success_text}")
+            metrics.ALERTS.inc(outcome=STATUS_FAILED)
+            forensics.failure(f"{time_text} 예약 실패", driver=driver, defer=True)
+            return STATUS_FAILED  # 다음 시간대로 넘어감
+    except Exception as popup_e:
+        log.warning(f"두 번째 팝업 대기 중 오류: {popup_e}")
+        # 팝업이 나타나지 않은 경우, 페이지 확인
+        try:
+            # 예약 성공 확인을 위한 페이지 체크
+            # 성공 페이지에 나타나는 요소 확인 (예: 예약 완료 메시지)
+            success_elem = driver.find_element(By.XPATH, "//div[contains(text(), '예약') and contains(text(), '완료')]")
+            if success_elem:
+                log.info(f"페이지에서 예약 성공 확인! {time_text}에 예약이 완료되었습니다.")
+                metrics.ALERTS.inc(outcome=STATUS_BOOKED)
+                return STATUS_BOOKED
+        except:
+            log.warning("예약 성공 여부를 확인할 수 없습니다. 다음 시간대로 넘어갑니다.")
+            metrics.ALERTS.inc(outcome=STATUS_UNKNOWN)
+            forensics.failure(f"{time_text} 예약 결과 확인 불가", popup_e, driver, defer=True)
+            return STATUS_UNKNOWN
+    return STATUS_FAILED
 
-def reserve_for_two_members(driver, wait, start_hour, end_hour):
+def _submit_slot(driver, wait, row, time_text, detected_at=None, deadline=None):
+    """
+    조건에 맞는 행에서 인원 선택 → 신청하기 → 팝업 처리까지 수행.
+    결과를 ledger 상태값(STATUS_BOOKED / STATUS_FAILED / STATUS_UNKNOWN)으로 반환합니다.
+    detected_at(time.monotonic)이 주어지면 신청서 제출까지 걸린 시간을 metrics 에 기록합니다.
+    deadline 은 신청하기를 누르기 직전까지만 확인합니다. 누른 뒤의 확인/결과 팝업은
+    BOOKING_RESULT_TIMEOUT 초 동안 기다립니다 (이미 접수된 예약을 UNKNOWN 으로 남기지 않도록).
+    """
+    # 해당 행의 인원 선택 드롭다운 가져오기 - j_person0, j_person1 등 ID 형식
+    select_elem = row.find_element(By.XPATH, ".//td[@class='price']/select")
+    select_id = select_elem.get_attribute("id")
+    select_obj = Select(select_elem)
+
+    # "2명" 옵션 선택
+    select_obj.select_by_value("2")
+    log.debug("드롭다운 ID: %s에서 '2명' 옵션 선택 완료", select_id)
+
+    # "신청하기" 버튼 클릭
+    apply_link = row.find_element(By.XPATH, ".//td/a[contains(@href, 'bookProsecc_join')]")
+    if deadline is not None:
+        deadline.check(f"{time_text} 신청 전")
+    apply_link.click()
+    log.debug("신청하기 버튼 클릭 완료, 팝업 대기 중...")
+    # 클릭한 뒤에는 팝업을 열어 둔 채로 끝내지 않도록 예산 대신 고정 시간 대기
+    popup_wait = WebDriverWait(driver, BOOKING_RESULT_TIMEOUT)
+
+    # 첫 번째 팝업(조인 예약 확인) 처리
+    alert = popup_wait.until(EC.alert_is_present())
+    alert_text = alert.text
+    log.debug("첫 번째 팝업 메시지: %s", alert_text)
+    forensics.capture("confirm", alert=alert_text, time=time_text)
+
+    # 팝업 메시지 분석
+    if "조인 가능한 타임이 아닙니다" in alert_text:
+        log.info("이미 예약된 시간대입니다. 다음 시간대로 넘어갑니다.")
+        metrics.ALERTS.inc(outcome="not_joinable")
+        alert.accept()
+        return STATUS_FAILED  # 다음 시간대로 넘어감
+    elif "예약" in alert_text or "조인" in alert_text:
+        # 예약 확인 팝업 - '확인' 클릭
+        log.debug("예약 확인 팝업 발견: %s", alert_text)
+        alert.accept()
+        if detected_at is not None:
+            metrics.DETECT_TO_SUBMIT.observe(time.monotonic() - detected_at)
+        log.debug("예약 확인 팝업 '확인' 버튼 클릭")
+        return _await_booking_result(driver, popup_wait, time_text)
+    else:
+        # 기타 예상치 못한 팝업 - 수락 후 다음 시간대로
+        metrics.ALERTS.inc(outcome="unexpected")
+        alert.accept()
+        log.info(f"예상치 못한 팝업: {alert_text}. 다음 시간대로 넘어갑니다.")
+        return STATUS_FAILED
+
+def reserve_for_two_members(driver, wait, start_hour, end_hour, ledger=None, account=None, detected_at=None,
+                            deadline=None):
     """
     날짜 클릭 후 넘어온 페이지(예: reservation02_1.asp)의 테이블에서
     '2명'이 가능한 행을 찾아 '신청하기'까지 진행하고 팝업(Alert)을 '예'로 처리.
     시간 범위는 8시부터 13시까지만 고려하며, 9홀만 예약합니다.
     성공하면 (True, 시간) 튜플, 실패하면 (False, None)을 반환합니다.
+    ledger(BookingLedger)가 주어지면 신청 전에 슬롯을 선점하고 결과를 기록합니다.
+    detected_at 은 날짜를 발견한 시각(time.monotonic)으로, 없으면 호출 시각을 씁니다.
+    deadline(deadline.Deadline)이 주어지면 슬롯마다 남은 예산을 확인하고, 넘으면 DeadlineExceeded 를 그대로 올립니다.
     """
+    if detected_at is None:
+        detected_at = time.monotonic()
     try:
         # 테이블 행을 찾음 (gray 클래스를 가진 td가 포함된 tr 요소들)
         rows = driver.find_elements(By.XPATH, "//table/tbody/tr[td[@class='gray']]")
         
         if not rows:
-            print("예약 가능한 시간 슬롯을 찾을 수 없습니다.")
+            log.warning("예약 가능한 시간 슬롯을 찾을 수 없습니다.")
             return False, None
             
-        print(f"총 {len(rows)}개의 시간 슬롯을 확인합니다.")
+        log.debug("총 %d개의 시간 슬롯을 확인합니다.", len(rows))
         found_slot = False
         
+        slot_filter = SlotFilter(start_hour, end_hour, holes=Holes.NINE, min_seats=2, max_seats=3)
+
         for idx, row in enumerate(rows):
             try:
-                # 시간 정보 추출
-                time_elem = row.find_element(By.XPATH, "./td[@class='gray']/span")
-                time_text = time_elem.text.strip()
-                
-                # 시간 형식이 "HH:MM"이라고 가정
-                hour = int(time_text.split(':')[0])
+                # 행 HTML 을 한 번에 가져와 Slot 으로 파싱 (셀마다 find_element 하지 않음)
+                row_html = row.get_attribute("outerHTML")
+                slot = Slot.from_row_html(row_html)
+                if slot is None:
+                    log.debug("%d번째 행에서 신청하기 링크를 찾을 수 없습니다. 건너뜁니다.", idx + 1)
+                    continue
+                time_text = slot.time_text
+
                 # 사용자 지정 범위만 고려
-                if start_hour <= hour < end_hour:
-                    print(f"시간대 {time_text}는 원하는 범위({start_hour}시~{end_hour}시) 내에 있습니다.")
+                if slot_filter.start_minutes <= slot.minutes < slot_filter.end_minutes:
+                    log.debug("시간대 %s는 원하는 범위(%d시~%d시) 내에 있습니다.", time_text, start_hour, end_hour)
                 else:
-                    print(f"시간대 {time_text}는 원하는 범위({start_hour}시~{end_hour}시)를 벗어납니다. 건너뜁니다.")
+                    log.debug("시간대 %s는 원하는 범위(%d시~%d시)를 벗어납니다. 건너뜁니다.", time_text, start_hour, end_hour)
                     continue
-                
+
                 # 9홀 여부 확인
-                try:
-                    course_elem = row.find_element(By.XPATH, "./td[@class='course']")
-                    course_text = course_elem.text.strip()
-                    if "9홀" not in course_text:
-                        print(f"시간대 {time_text}는 9홀이 아닙니다 ({course_text}). 건너뜁니다.")
-                        continue
-                    print(f"시간대 {time_text}는 9홀입니다. 조건에 맞습니다.")
-                except Exception as course_e:
-                    print(f"코스 정보를 찾을 수 없습니다: {course_e}. 다음 시간대로 넘어갑니다.")
+                if slot.holes != slot_filter.holes:
+                    log.debug("시간대 %s는 9홀이 아닙니다 (%d홀). 건너뜁니다.", time_text, slot.holes)
                     continue
-                
-                # 예약 가능 인원 확인 (HTML 구조: td[3]/span)
-                seat_count_elem = row.find_element(By.XPATH, "./td[3]/span")
-                seat_count_text = seat_count_elem.text.strip()
-                
-                if "2명" in seat_count_text or "3명" in seat_count_text:
+                log.debug("시간대 %s는 9홀입니다. 조건에 맞습니다.", time_text)
+
+                # 예약 가능 인원 확인 (2명 또는 3명)
+                if slot_filter.matches(slot):
                     found_slot = True
-                    print(f"{idx+1}번째 슬롯({time_text})에서 '2명' or '3명' 예약 가능 발견. 예약 진행 시도 중...")
-                    
-                    # 해당 행의 인원 선택 드롭다운 가져오기 - j_person0, j_person1 등 ID 형식
-                    select_elem = row.find_element(By.XPATH, ".//td[@class='price']/select")
-                    select_id = select_elem.get_attribute("id")
-                    select_obj = Select(select_elem)
-                    
-                    # "2명" 옵션 선택
-                    select_obj.select_by_value("2")
-                    print(f"드롭다운 ID: {select_id}에서 '2명' 옵션 선택 완료")
+                    if deadline is not None:
+                        deadline.check(f"{time_text} 신청 전")
+                    log.info(f"{idx+1}번째 슬롯({time_text})에서 '2명' or '3명' 예약 가능 발견. 예약 진행 시도 중...")
+                    forensics.capture("slot", html=row_html, time=time_text)
                     
-                    # "신청하기" 버튼 클릭
-                    apply_link = row.find_element(By.XPATH, ".//td/a[contains(@href, 'bookProsecc_join')]")
-                    apply_link.click()
-                    print("신청하기 버튼 클릭 완료, 팝업 대기 중...")
-                    
-                    # 첫 번째 팝업(조인 예약 확인) 처리
-                    alert = wait.until(EC.alert_is_present())
-                    alert_text = alert.text
-                    print(f"첫 번째 팝업 메시지: {alert_text}")
-                    
-                    # 팝업 메시지 분석
-                    if "조인 가능한 타임이 아닙니다" in alert_text:
-                        print("이미 예약된 시간대입니다. 다음 시간대로 넘어갑니다.")
-                        alert.accept()
-                        continue  # 다음 시간대로 넘어감
-                    elif "예약" in alert_text or "조인" in alert_text:
-                        # 예약 확인 팝업 - '확인' 클릭
-                        print(f"예약 확인 팝업 발견: {alert_text}")
-                        alert.accept()
-                        print("예약 확인 팝업 '확인' 버튼 클릭")
-                        
-                        # 두 번째 팝업(예약 성공) 처리 시도
-                        try:
-                            # 예약 성공 알림 팝업 대기 (최대 10초)
-                            success_alert = wait.until(EC.alert_is_present())
-                            success_text = success_alert.text
-                            print(f"두 번째 팝업 메시지: {success_text}")
-                            
-                            # 예약 성공 메시지 확인
-                            if "예약" in success_text and ("완료" in success_text or "성공" in success_text):
-                                success_alert.accept()
-                                print(f"예약 성공 확인! {time_text}에 예약이 완료되었습니다.")
-                                return True, time_text
-                            else:
-                                # 예약 실패 메시지인 경우
-                                success_alert.accept()
-                                print(f"예약 실패 메시지: {success_text}")
-                                continue  # 다음 시간대로 넘어감
-                        except Exception as popup_e:
-                            print(f"두 번째 팝업 대기 중 오류: {popup_e}")
-                            # 팝업이 나타나지 않은 경우, 페이지 확인
-                            try:
-                                # 예약 성공 확인을 위한 페이지 체크
-                                # 성공 페이지에 나타나는 요소 확인 (예: 예약 완료 메시지)
-                                success_elem = driver.find_element(By.XPATH, "//div[contains(text(), '예약') and contains(text(), '완료')]")
-                                if success_elem:
-                                    print(f"페이지에서 예약 성공 확인! {time_text}에 예약이 완료되었습니다.")
-                                    return True, time_text
-                            except:
-                                print("예약 성공 여부를 확인할 수 없습니다. 다음 시간대로 넘어갑니다.")
-                                continue
-                    else:
-                        # 기타 예상치 못한 팝업 - 수락 후 다음 시간대로
-                        alert.accept()
-                        print(f"예상치 못한 팝업: {alert_text}. 다음 시간대로 넘어갑니다.")
-                        continue
+                    claim = None
+                    if ledger is not None:
+                        claim = ledger.claim(account, slot)
+                        if claim is None:
+                            log.info(f"시간대 {time_text}는 다른 작업에서 이미 진행 중이거나 한도를 넘었습니다. 건너뜁니다.")
+                            continue
+
+                    status = STATUS_FAILED
+                    try:
+                        status = _submit_slot(driver, wait, row, time_text, detected_at, deadline)
+                    finally:
+                        if claim is not None:
+                            ledger.record(claim, status)
+                    if status == STATUS_BOOKED:
+                        return True, time_text
                     
+            except DeadlineExceeded:
+                raise
             except Exception as row_e:
-                print(f"행 처리 중 오류 발생: {row_e}")
+                log.error(f"행 처리 중 오류 발생: {row_e}")
                 continue
         
         if not found_slot:
-            print("8시부터 13시 사이에 9홀 2명 예약 가능한 슬롯을 찾지 못했습니다.")
+            log.warning("8시부터 13시 사이에 9홀 2명 예약 가능한 슬롯을 찾지 못했습니다.")
             
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        print("2명 예약 진행 중 오류 발생:", e)
+        log.error("2명 예약 진행 중 오류 발생: %s", e)
     return False, None
 
 
-def main():
+def main(snipe=False, agent=False, tabs=False, profile=0, profile_dir="profile", deterministic=False, test=False,
+         replay=None, time_scale=1.0, capture=None):
     user_dates = ["20250507", "20250509"]
     start_hour, end_hour = 8, 11 # 8시~11시
-    bot = ReservationBot(user_dates, monitor_interval=5, start_hour=start_hour, end_hour=end_hour)
-    bot.run()
+    reservation_url = None
+    server = None
+    if test:
+        # 실제 사이트 대신 로컬 픽스처 서버에 대고 실행 (픽스처 달력의 날짜 사용)
+        from fixture_server import FixtureServer
+
+        server = FixtureServer().start()
+        reservation_url = server.reservation_url
+        user_dates = server.dates()
+        log.info(f"테스트 모드: {reservation_url} (날짜 {user_dates})")
+    elif replay:
+        # 기록해 둔 실제 요청/응답(traffic_capture)을 원래 속도 × time_scale 로 재생
+        from traffic_capture import ReplayServer
+
+        server = ReplayServer(replay, time_scale=time_scale).start()
+        reservation_url = server.reservation_url
+        user_dates = server.dates() or user_dates
+        test = True
+        log.info(f"재생 모드: {reservation_url} (날짜 {user_dates})")
+    # capture(또는 GOLF_CAPTURE)에 경로를 주면 실제 요청/응답을 HAR 로 기록
+    capture = capture or os.getenv("GOLF_CAPTURE")
+    traffic = None
+    if capture:
+        from traffic_capture import TrafficRecorder
+
+        traffic = TrafficRecorder(capture)
+    # GOLF_HISTORY_DIR 가 설정되어 있으면 관측 기록 모드로 동작
+    history_dir = os.getenv("GOLF_HISTORY_DIR")
+    recorder = SnapshotStore(history_dir) if history_dir and not test else None
+    # 여러 프로세스가 같은 계정으로 돌더라도 같은 날짜를 중복 예약하지 않도록 원장 공유
+    ledger = None if test else BookingLedger(os.getenv("GOLF_LEDGER_PATH", "booking_ledger.sqlite3"))
+    # GOLF_DRIVER_POOL=N 이면 예비 드라이버 N개를 미리 띄워 교체/복구 시 바로 사용
+    pool_size = int(os.getenv("GOLF_DRIVER_POOL", "0"))
+    driver_pool = DriverPool(size=pool_size) if pool_size > 0 else None
+    bot = ReservationBot(user_dates, monitor_interval=5, start_hour=start_hour, end_hour=end_hour,
+                         recorder=recorder, ledger=ledger, resource_monitor=ResourceMonitor(),
+                         driver_pool=driver_pool, reservation_url=reservation_url, traffic=traffic)
+    # 같은 호스트에서 도는 감시들(다른 프로세스 포함)이 요청 속도 제한을 공유 (GOLF_RATE_LIMIT=0 이면 끔)
+    if os.getenv("GOLF_RATE_LIMIT", "1") != "0" and not test:
+        from rate_limiter import SharedRateLimiter
+
+        bot.rate_limiter = SharedRateLimiter(os.getenv("GOLF_RATE_LIMIT_PATH", "rate_limit.sqlite3"))
+    # GOLF_HTTP_POLL=1 이면 달력 변경을 HTTP(gzip/조건부/조기 종료)로 확인하고 필요할 때만 브라우저 새로고침
+    if os.getenv("GOLF_HTTP_POLL") == "1":
+        from conditional_fetch import CalendarPoller
+
+        bot.calendar_poller = CalendarPoller(bot.reservation_url)
+    # 재시작해도 예약 완료 날짜/세션/달력 지문을 이어받도록 상태를 주기적으로 저장 (GOLF_CHECKPOINT=0 이면 끔)
+    checkpoint_path = os.getenv("GOLF_CHECKPOINT", "bot_checkpoint.json.gz")
+    if checkpoint_path != "0" and not test:
+        from checkpoint import BotCheckpoint
+
+        bot.checkpoint = BotCheckpoint(checkpoint_path)
+    # 예약 실패 시 최근 페이지 상태를 forensics/ 에 저장 (GOLF_FORENSICS=0 이면 끔)
+    forensics.configure()
+    # GOLF_OPEN_RULE(예: 21@09:00) 또는 관측 기록으로 오픈 시각을 알 수 있으면 오픈 직전 시간표를 미리 조회
+    prefetcher = None
+    if os.getenv("GOLF_PREFETCH") == "1" and not test:
+        from prefetch import OpeningSchedule, TeeSheetPrefetcher
+
+        rule = os.getenv("GOLF_OPEN_RULE")
+        schedule = OpeningSchedule.parse(rule) if rule else (OpeningSchedule.from_history(recorder) if recorder else None)
+        if schedule is not None:
+            prefetcher = bot.prefetcher = TeeSheetPrefetcher(bot, schedule).start()
+        else:
+            log.warning("오픈 시각을 알 수 없어 시간표 미리 조회를 사용하지 않습니다 (GOLF_OPEN_RULE 설정 필요)")
+    # GOLF_METRICS_PORT 가 설정되어 있으면 /metrics (Prometheus), /status (JSON) 엔드포인트 실행
+    metrics_server = None
+    if metrics.metrics_port():
+        metrics_server = metrics.MetricsServer(bot, port=metrics.metrics_port()).start()
+    # GOLF_CONTROL_PORT 가 설정되어 있으면 날짜/시간대/주기를 재시작 없이 바꿀 수 있는 제어 API 실행
+    control_port = os.getenv("GOLF_CONTROL_PORT")
+    control_server = None
+    if control_port:
+        from control_api import BotController, ControlServer
+
+        # 에이전트/프로파일 모드는 시작할 때의 설정으로만 돌기 때문에 변경 요청을 거절합니다.
+        bot.control = BotController(bot, live=not (agent or profile))
+        control_server = ControlServer(bot.control, port=int(control_port)).start()
+    if test:
+        bot.username = bot.username or "fixture"
+        bot.password = bot.password or "fixture"
+    try:
+        if profile:
+            bot.profile(cycles=profile, output_dir=profile_dir, deterministic=deterministic,
+                        stop_on_booking=not test)
+        elif agent:
+            bot.watch_in_page()
+        elif tabs:
+            bot.watch_tabs()
+        elif snipe:
+            bot.snipe()
+        else:
+            bot.run()
+    finally:
+        if prefetcher is not None:
+            prefetcher.stop()
+        if recorder is not None:
+            # 예외/Ctrl+C 로 _shutdown 을 거치지 않아도 버퍼에 남은 관측 기록을 씁니다.
+            recorder.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        if control_server is not None:
+            control_server.stop()
+        if driver_pool is not None:
+            # 예비 Chrome 들과 공유 chromedriver 종료 (SharedService.stop() 은 무시되므로 직접)
+            driver_pool.close()
+        if server is not None:
+            server.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # 옵션 정의는 cli.py 의 run 명령과 공유합니다 (python cli.py run ... 과 같음).
+    import sys
+    from cli import build_parser, run_options
+
+    main(**run_options(build_parser().parse_args(["run", *sys.argv[1:]])))
@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from botlog import get_logger
+
+log = get_logger("metrics")
+
+# 감시/예약 상태를 Prometheus 텍스트 형식(/metrics)과 JSON(/status)으로 보여주는 로컬 엔드포인트.
+# 감시가 느려지거나 멈춘 것을 로그를 거슬러 올라가지 않고 바로 확인하기 위한 것입니다.
+# 값은 프로세스 전역 REGISTRY 에 모이며, 엔드포인트는 GOLF_METRICS_PORT 가 설정된 경우에만 띄웁니다.
+# prometheus_client 없이 필요한 만큼(카운터/게이지/히스토그램)만 직접 구현했습니다.
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """
+    증가만 하는 값.
+    rate_window 를 주면 최근 rate_window 초 동안의 발생 시각을 보관해 rate() 로 분당 횟수를 계산합니다.
+    """
+    kind = "counter"
+
+    def __init__(self, name, help, labels=(), rate_window=None):
+        super().__init__(name, help, labels)
+        self.rate_window = rate_window
+        self._recent = deque()
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            if self.rate_window:
+                now = time.monotonic()
+                self._recent.append(now)
+                while self._recent and self._recent[0] < now - self.rate_window:
+                    self._recent.popleft()
+
+    def rate(self):
+        """최근 rate_window 초 기준 분당 횟수"""
+        if not self.rate_window:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(1 for t in self._recent if t >= now - self.rate_window)
+        return recent * 60 / self.rate_window
+
+    def values(self):
+        with self._lock:
+            return {",".join(k) if k else "": v for k, v in self._values.items()}
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """버킷 누적 히스토그램. JSON 상태용으로 최근 keep 개 관측값도 보관합니다."""
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labels=(), keep=500):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._recent = deque(maxlen=keep)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+            self._recent.append(value)
+
+    def summary(self):
+        """최근 관측값 기준 건수/평균/p50/p95/최대"""
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return {"count": 0}
+        n = len(recent)
+        return {
+            "count": n,
+            "avg": sum(recent) / n,
+            "p50": recent[n // 2],
+            "p95": recent[min(int(n * 0.95), n - 1)],
+            "max": recent[-1],
+        }
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.started_at = time.time()
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=(), rate_window=None):
+        return self._add(Counter(name, help, labels, rate_window))
+
+    def gauge(self, name, help, labels=()):
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, buckets, labels=()):
+        return self._add(Histogram(name, help, buckets, labels))
+
+    def add_collector(self, collector):
+        """render() 직전에 호출되는 함수 (게이지 갱신용)"""
+        self.collectors.append(collector)
+
+    def collect(self):
+        for collector in list(self.collectors):
+            try:
+                collector()
+            except Exception as e:
+                log.debug("메트릭 수집 오류: %s", e)
+
+    def render(self):
+        self.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+POLLS = REGISTRY.counter("golf_polls_total", "감시 주기 수", rate_window=300)
+CYCLE_SECONDS = REGISTRY.histogram("golf_cycle_seconds", "감시 한 주기 소요 시간", _LATENCY_BUCKETS)
+DETECT_TO_SUBMIT = REGISTRY.histogram("golf_detect_to_submit_seconds",
+                                      "예약 가능 날짜 발견부터 신청서 제출까지 걸린 시간", _LATENCY_BUCKETS)
+WEBDRIVER_COMMANDS = REGISTRY.counter("golf_webdriver_commands_total", "WebDriver 명령 수", labels=("command",))
+WEBDRIVER_SECONDS = REGISTRY.counter("golf_webdriver_seconds_total", "WebDriver 명령 누적 시간", labels=("command",))
+LOGINS = REGISTRY.counter("golf_logins_total", "로그인(세션 갱신) 횟수")
+ALERTS = REGISTRY.counter("golf_alerts_total", "신청 후 팝업 결과", labels=("outcome",))
+DRIVER_RSS = REGISTRY.gauge("golf_driver_rss_bytes", "chromedriver + Chrome 프로세스 트리 RSS")
+KAKAO_SECONDS = REGISTRY.histogram("golf_kakao_send_seconds", "카카오톡 메시지 전송 시간", _LATENCY_BUCKETS)
+KAKAO_SENDS = REGISTRY.counter("golf_kakao_sends_total", "카카오톡 메시지 전송 결과", labels=("result",))
+DEADLINE_OVERRUNS = REGISTRY.counter("golf_deadline_overruns_total", "시간 예산을 넘겨 중단한 주기/시도",
+                                     labels=("scope",))
+STARTUP_SECONDS = REGISTRY.gauge("golf_startup_to_first_poll_seconds", "프로세스 시작부터 첫 감시 주기 완료까지 걸린 시간")
+CALENDAR_POLL_BYTES = REGISTRY.counter("golf_calendar_poll_bytes_total",
+                                       "HTTP 달력 폴링 바이트 (wire: 전송, body: 압축 해제 후 읽은 양)",
+                                       labels=("kind",))
+CALENDAR_POLL_CPU = REGISTRY.histogram("golf_calendar_poll_cpu_seconds", "HTTP 달력 폴링 한 번의 CPU 시간",
+                                       (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+LAST_POLL = REGISTRY.gauge("golf_last_poll_timestamp_seconds", "마지막 감시 주기 완료 시각")
+
+
+def record_poll(seconds):
+    POLLS.inc()
+    CYCLE_SECONDS.observe(seconds)
+    LAST_POLL.set(time.time())
+
+
+def _on_command(command, elapsed):
+    WEBDRIVER_COMMANDS.inc(command=command)
+    WEBDRIVER_SECONDS.inc(elapsed, command=command)
+
+
+def instrument_driver(driver):
+    """드라이버의 WebDriver 명령을 golf_webdriver_commands_total 로 집계"""
+    from profiling import add_command_listener
+
+    add_command_listener(driver, _on_command)
+
+
+def watch_bot(bot):
+    """스크레이프할 때마다 봇의 드라이버 RSS 갱신"""
+    from resources import driver_rss
+
+    def collect():
+        monitor = bot.resource_monitor
+        rss = monitor.sample(bot.driver) if monitor is not None else driver_rss(bot.driver)
+        DRIVER_RSS.set(rss)
+
+    REGISTRY.add_collector(collect)
+
+
+def status(bot=None):
+    """JSON 상태 페이지 내용"""
+    REGISTRY.collect()
+    last_poll = LAST_POLL.get()
+    result = {
+        "uptime_seconds": round(time.time() - REGISTRY.started_at, 1),
+        "polls_total": POLLS.values().get("", 0),
+        "polls_per_minute": POLLS.rate(),
+        "last_poll_age_seconds": round(time.time() - last_poll, 1) if last_poll else None,
+        "cycle_seconds": CYCLE_SECONDS.summary(),
+        "detect_to_submit_seconds": DETECT_TO_SUBMIT.summary(),
+        "webdriver_commands": WEBDRIVER_COMMANDS.values(),
+        "startup_to_first_poll_seconds": STARTUP_SECONDS.get(),
+        "logins": LOGINS.values().get("", 0),
+        "alerts": ALERTS.values(),
+        "deadline_overruns": DEADLINE_OVERRUNS.values(),
+        "driver_rss_bytes": DRIVER_RSS.get(),
+        "kakao_send_seconds": KAKAO_SECONDS.summary(),
+        "kakao_sends": KAKAO_SENDS.values(),
+        "calendar_poll_bytes": CALENDAR_POLL_BYTES.values(),
+        "calendar_poll_cpu_seconds": CALENDAR_POLL_CPU.summary(),
+    }
+    if bot is not None:
+        result["dates"] = list(bot.user_dates)
+        result["hours"] = [bot.start_hour, bot.end_hour]
+        result["interval"] = bot.monitor_interval
+        result["paused"] = bool(bot.control and bot.control.paused)
+    return result
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server_version = "GolfMetrics"
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            body = REGISTRY.render().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path in ("/status", "/"):
+            body = json.dumps(status(self.server.bot), ensure_ascii=False, indent=2).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """/metrics (Prometheus) 와 /status (JSON) 를 127.0.0.1:port 로 제공"""
+
+    def __init__(self, bot=None, port=9108, host="127.0.0.1"):
+        self.httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.bot = bot
+        self._thread = None
+        if bot is not None:
+            watch_bot(bot)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self._thread.start()
+            log.info(f"메트릭: {self.url}/metrics, {self.url}/status")
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+
+
+def metrics_port():
+    port = os.getenv("GOLF_METRICS_PORT")
+    return int(port) if port else None
@@ -0,0 +1,159 @@
+import re
+import json
+from urllib.parse import urljoin
+
+# 로그인된 브라우저 페이지 안에서 fetch 로 시간표만 가져오는 헬퍼.
+# 페이지 이동/렌더링/이미지 로딩 없이 reservation02_1.asp 응답 본문만 받아오므로
+# 날짜 하나를 확인하는 비용이 driver.get 보다 훨씬 작습니다.
+
+TEE_SHEET_PAGE = "reservation02_1.asp"
+BOOK_PAGE = "reservation02_2.asp"
+
+# 로그인 페이지 판별.
+# 사이트의 모든 페이지(달력/시간표/로그인)에 function login(page){ alert("로그인 후 사용이 가능합니다.") ...} 가
+# 들어 있어 alert 문구로는 알 수 없으므로, 로그인 폼(LoginForm / UserID 입력칸)이 있거나
+# 스크립트가 곧바로 alert 후 member01.asp 로 보내는 (세션 만료) 응답일 때만 로그인 페이지로 봅니다.
+# inpage_agent 의 브라우저 스크립트에도 그대로 넘기므로 JS RegExp 와 호환되는 문법만 씁니다.
+LOGIN_PAGE_PATTERNS = (
+    r"""<form[^>]*name=["']?LoginForm\b""",
+    r"""<input[^>]*name=["']?UserID\b""",
+    r"""<script[^>]*>\s*alert\([^)]*\)\s*;?\s*(?:top\.|parent\.|window\.)?location"""
+    r"""(?:\.href\s*=|\s*=|\.replace\()\s*["'][^"']*member01\.asp""",
+)
+_LOGIN_PAGE_RE = re.compile("|".join(LOGIN_PAGE_PATTERNS), re.I)
+
+# arguments: url, urlencoded body, (callback)
+_FETCH_SCRIPT = """
+var url = arguments[0], body = arguments[1], done = arguments[arguments.length - 1];
+var started = performance.now();
+fetch(url, {
+    method: 'POST',
+    credentials: 'include',
+    cache: 'no-store',
+    headers: {'Content-Type': 'application/x-www-form-urlencoded'},
+    body: body
+}).then(function (r) {
+    return r.arrayBuffer().then(function (buf) {
+        var ct = r.headers.get('content-type') || '';
+        var m = /charset=([\\w-]+)/i.exec(ct);
+        if (!m) {
+            var head = new TextDecoder('ascii').decode(buf.slice(0, 2048));
+            m = /charset=["']?([\\w-]+)/i.exec(head);
+        }
+        var text;
+        try { text = new TextDecoder(m ? m[1] : 'euc-kr').decode(buf); }
+        catch (e) { text = new TextDecoder().decode(buf); }
+        done({status: r.status, text: text, bytes: buf.byteLength, ms: performance.now() - started});
+    });
+}).catch(function (e) {
+    done({status: 0, error: String(e), ms: performance.now() - started});
+});
+"""
+
+# arguments: url, {name: value}
+_POST_NAVIGATE_SCRIPT = """
+var form = document.createElement('form');
+form.method = 'post';
+form.action = arguments[0];
+var fields = arguments[1];
+for (var name in fields) {
+    var input = document.createElement('input');
+    input.type = 'hidden';
+    input.name = name;
+    input.value = fields[name];
+    form.appendChild(input);
+}
+document.body.appendChild(form);
+form.submit();
+"""
+
+
+class FetchResult:
+    """페이지 내 fetch 결과"""
+    __slots__ = ("status", "text", "bytes", "elapsed_ms", "error")
+
+    def __init__(self, status, text="", bytes=0, elapsed_ms=0.0, error=None):
+        self.status = status
+        self.text = text
+        self.bytes = bytes
+        self.elapsed_ms = elapsed_ms
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == 200 and self.error is None
+
+    @property
+    def login_required(self):
+        return is_login_page(self.text)
+
+
+def is_login_page(html):
+    """로그인 폼이나 로그인으로 보내는 응답인지 (LOGIN_PAGE_PATTERNS 참고)"""
+    return bool(_LOGIN_PAGE_RE.search(html or ""))
+
+
+def booking_succeeded(message):
+    """신청 후 팝업 문구가 예약 완료/성공 메시지인지"""
+    return "예약" in message and ("완료" in message or "성공" in message)
+
+
+def book_url(reservation_url):
+    return urljoin(reservation_url, BOOK_PAGE)
+
+
+def join_form_fields(slot, party):
+    """
+    bookProsecc_join 이 formJoin_1 에 채워 넣는 값과 같은 필드.
+    (확인 창 없이 reservation02_2.asp 로 바로 제출할 때 사용)
+    """
+    book_date, book_time, book_crs, _, _, roundf, _ = slot.book_args()
+    return {
+        "book_date": book_date,
+        "book_time": book_time,
+        "book_crs": book_crs,
+        "person": str(party),
+        "a_cart": "",
+        "roundf": roundf,
+    }
+
+
+def submit_join_form(driver, reservation_url, slot, party=2):
+    """시간표 페이지를 거치지 않고 조인 예약 신청서를 바로 제출"""
+    post_navigate(driver, book_url(reservation_url), join_form_fields(slot, party))
+
+
+def tee_sheet_url(reservation_url):
+    return urljoin(reservation_url, TEE_SHEET_PAGE)
+
+
+def fetch_tee_sheet(driver, reservation_url, date):
+    """
+    현재 로그인된 페이지에서 해당 날짜의 시간표 HTML 을 fetch 로 가져오기.
+    transDate_join 이 보내는 것과 같은 submitDate 필드 하나만 전송합니다.
+    """
+    raw = driver.execute_async_script(_FETCH_SCRIPT, tee_sheet_url(reservation_url), f"submitDate={date}")
+    raw = raw or {}
+    return FetchResult(
+        raw.get("status", 0),
+        raw.get("text", ""),
+        raw.get("bytes", 0),
+        raw.get("ms", 0.0),
+        raw.get("error"),
+    )
+
+
+def post_navigate(driver, url, fields):
+    """임시 form 을 만들어 POST 로 페이지 이동 (사이트의 transDate_join 과 같은 방식)"""
+    driver.execute_script(_POST_NAVIGATE_SCRIPT, url, {k: str(v) for k, v in fields.items()})
+
+
+def post_navigate_expression(url, fields):
+    """post_navigate 와 같은 동작을 하는 JS 식 (WebDriver 없이 Runtime.evaluate 로 실행할 때)"""
+    args = json.dumps([url, {k: str(v) for k, v in fields.items()}], ensure_ascii=False)
+    return f"(function () {{{_POST_NAVIGATE_SCRIPT}}}).apply(null, {args})"
+
+
+def open_tee_sheet(driver, reservation_url, date):
+    """해당 날짜의 시간표 페이지로 이동"""
+    post_navigate(driver, tee_sheet_url(reservation_url), {"submitDate": date})
@@ -0,0 +1,228 @@
+import re
+import time
+import threading
+from datetime import datetime, timedelta
+from collections import Counter
+from urllib.parse import urlsplit
+from slots import SlotFilter, Holes, parse_tee_sheet_html
+from page_fetch import FetchResult, tee_sheet_url
+from transport import get_transport
+from history import KIND_CALENDAR
+from botlog import get_logger
+
+log = get_logger("prefetch")
+
+# 예약 오픈 직전의 감시 날짜 시간표를 미리 받아 두는 프리페처.
+# 기존 흐름은 달력에서 날짜가 td.on 으로 바뀐 것을 본 뒤에야 reservation02_1.asp 를 열기 때문에
+# 시간표 페이지 로딩이 항상 예약 경로 한가운데에 놓입니다.
+# 여기서는 날짜별 오픈 시각을 예측해 그 직전부터 백그라운드 HTTP 세션(브라우저 쿠키 복사)으로 시간표를 반복 조회하고,
+# 파싱한 슬롯을 캐시해 둡니다. 슬롯이 나타나면 봇은 시간표 페이지를 거치지 않고 바로 신청서를 제출합니다.
+#
+# 오픈 시각은 "며칠 전 몇 시" 규칙으로 예측합니다.
+#   - GOLF_OPEN_RULE="21@09:00" 처럼 직접 지정하거나
+#   - 관측 기록(history)의 달력 스냅샷에서 날짜가 처음 열린 시각들로 추정합니다.
+
+_RULE_RE = re.compile(r"^\s*(\d+)\s*@\s*(\d{1,2}):(\d{2})\s*$")
+_CHARSET_RE = re.compile(r"charset=([\w-]+)", re.I)
+
+
+def _midnight(date_text):
+    return datetime.strptime(date_text, "%Y%m%d")
+
+
+class OpeningSchedule:
+    """날짜가 days_ahead 일 전 open_time(초, 자정 기준)에 열린다는 규칙"""
+
+    def __init__(self, days_ahead, open_seconds):
+        self.days_ahead = days_ahead
+        self.open_seconds = open_seconds
+
+    @classmethod
+    def parse(cls, rule):
+        """'21@09:00' 형식"""
+        match = _RULE_RE.match(rule or "")
+        if not match:
+            raise ValueError(f"오픈 규칙 형식이 아닙니다 (예: 21@09:00): {rule}")
+        days, hour, minute = (int(g) for g in match.groups())
+        return cls(days, hour * 3600 + minute * 60)
+
+    @classmethod
+    def from_history(cls, store):
+        """
+        달력 기록에서 날짜가 처음 열린 시각으로 규칙 추정.
+        기록을 시작했을 때 이미 열려 있던 날짜는 실제 오픈 시각을 알 수 없으므로 제외합니다.
+        """
+        first_seen, initial = {}, None
+        for obs in store.query(kind=KIND_CALENDAR):
+            dates = {day.date_text for day in obs.items}
+            if initial is None:
+                initial = dates
+                continue
+            for date in dates - initial:
+                first_seen.setdefault(date, obs.ts)
+        if not first_seen:
+            return None
+        leads, seconds = Counter(), []
+        for date, ts in first_seen.items():
+            seen = datetime.fromtimestamp(ts)
+            leads[(_midnight(date) - seen.replace(hour=0, minute=0, second=0, microsecond=0)).days] += 1
+            seconds.append(seen.hour * 3600 + seen.minute * 60 + seen.second)
+        seconds.sort()
+        # 폴링 주기만큼 늦게 관측되므로 가장 이른 관측 시각을 오픈 시각으로 봅니다.
+        return cls(leads.most_common(1)[0][0], seconds[0])
+
+    def opens_at(self, date_text):
+        """해당 날짜가 열릴 것으로 예상되는 시각 (epoch 초)"""
+        opening = _midnight(date_text) - timedelta(days=self.days_ahead) + timedelta(seconds=self.open_seconds)
+        return opening.timestamp()
+
+    def __repr__(self):
+        return f"{self.days_ahead}일 전 {self.open_seconds // 3600:02d}:{self.open_seconds % 3600 // 60:02d}"
+
+
+class PrefetchEntry:
+    """날짜 하나의 최근 시간표 조회 결과"""
+    __slots__ = ("date", "slots", "fetched_at", "first_match_at", "elapsed_ms")
+
+    def __init__(self, date, slots, fetched_at, first_match_at, elapsed_ms):
+        self.date = date
+        self.slots = slots
+        self.fetched_at = fetched_at
+        self.first_match_at = first_match_at
+        self.elapsed_ms = elapsed_ms
+
+
+class TeeSheetPrefetcher:
+    """
+    오픈 예상 시각 lead 초 전부터 linger 초 후까지 interval 초마다 시간표를 조회.
+    세션 쿠키는 감시 스레드에서 sync_cookies(driver) 로 넘겨줘야 합니다 (WebDriver 는 스레드 안전하지 않음).
+    """
+
+    def __init__(self, bot, schedule, lead=60, linger=600, interval=1.0, max_age=5.0, cookie_refresh=60):
+        self.bot = bot
+        self.schedule = schedule
+        self.lead = lead
+        self.linger = linger
+        self.interval = interval
+        self.max_age = max_age
+        self.cookie_refresh = cookie_refresh
+        self.cache = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._cookies_synced_at = 0.0
+        self._login_required = False
+        self.done = set()
+
+    def window(self, date):
+        """(시작, 끝) epoch 초"""
+        opens = self.schedule.opens_at(date)
+        return opens - self.lead, opens + self.linger
+
+    def active_dates(self, now=None):
+        now = now or time.time()
+        result = []
+        for date in list(self.bot.user_dates):
+            if date in self.done:
+                continue
+            start, end = self.window(date)
+            if start <= now <= end:
+                result.append(date)
+        return result
+
+    def _session(self):
+        parts = urlsplit(self.bot.reservation_url)
+        return get_transport().session(f"{parts.scheme}://{parts.netloc}")
+
+    def sync_cookies(self, driver, force=False):
+        """브라우저 세션 쿠키를 HTTP 세션으로 복사 (cookie_refresh 초마다, 감시 스레드에서 호출)"""
+        now = time.monotonic()
+        if not force and not self._login_required and now - self._cookies_synced_at < self.cookie_refresh:
+            return
+        if not force and not self.active_dates():
+            return
+        session = self._session()
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"),
+                                path=cookie.get("path", "/"))
+        self._cookies_synced_at = now
+        self._login_required = False
+
+    def fetch(self, date):
+        """시간표 한 번 조회 후 캐시 갱신"""
+        self.bot._throttle()
+        started = time.perf_counter()
+        response = get_transport().post(tee_sheet_url(self.bot.reservation_url), data={"submitDate": date},
+                                        headers={"Referer": self.bot.reservation_url})
+        content_type = response.headers.get("Content-Type", "")
+        match = _CHARSET_RE.search(content_type)
+        html = response.content.decode(match.group(1) if match else "euc-kr", "replace")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if self.bot.rate_limiter is not None:
+            self.bot.rate_limiter.report(elapsed_ms / 1000, response.status_code, html)
+        # 세션이 만료되면 로그인 페이지로 보내지거나(리다이렉트를 따라간 응답) 로그인 폼이 옵니다.
+        if "member01.asp" in response.url or FetchResult(response.status_code, html).login_required:
+            # 다음 주기에 감시 스레드가 쿠키를 다시 복사할 때까지 조회 중단
+            self._login_required = True
+            return None
+        slots = parse_tee_sheet_html(html)
+        slot_filter = SlotFilter(self.bot.start_hour, self.bot.end_hour, holes=Holes.NINE, min_seats=2, max_seats=3)
+        matching = any(slot_filter.matches(slot) for slot in slots)
+        now = time.monotonic()
+        with self._lock:
+            previous = self.cache.get(date)
+            first_match_at = None
+            if matching:
+                first_match_at = previous.first_match_at if previous and previous.first_match_at else now
+            entry = self.cache[date] = PrefetchEntry(date, slots, now, first_match_at, elapsed_ms)
+        if self.bot.recorder is not None:
+            self.bot.recorder.record_tee_sheet(date, slots)
+        return entry
+
+    def ready(self):
+        """
+        max_age 초 안에 받은 시간표 중 조건에 맞는 슬롯이 있는 날짜들.
+        (날짜, 조건에 맞는 슬롯 목록, 처음 발견 시각) 목록을 반환합니다.
+        """
+        slot_filter = SlotFilter(self.bot.start_hour, self.bot.end_hour, holes=Holes.NINE, min_seats=2, max_seats=3)
+        now = time.monotonic()
+        result = []
+        with self._lock:
+            entries = list(self.cache.values())
+        for entry in entries:
+            if entry.date in self.done or entry.first_match_at is None or now - entry.fetched_at > self.max_age:
+                continue
+            matches = [slot for slot in entry.slots if slot_filter.matches(slot)]
+            if matches:
+                result.append((entry.date, matches, entry.first_match_at))
+        return result
+
+    def mark_done(self, date):
+        self.done.add(date)
+        with self._lock:
+            self.cache.pop(date, None)
+
+    def _run(self):
+        while not self._stop.is_set():
+            dates = [] if self._login_required or not self._cookies_synced_at else self.active_dates()
+            for date in dates:
+                try:
+                    entry = self.fetch(date)
+                    if entry is not None and entry.first_match_at == entry.fetched_at:
+                        log.info(f"{date} 시간표에 조건에 맞는 슬롯이 나타났습니다 (미리 조회, {entry.elapsed_ms:.0f}ms)")
+                except Exception as e:
+                    log.warning(f"{date} 시간표 미리 조회 실패: {e}")
+            self._stop.wait(self.interval if dates else min(self.interval * 5, 10))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            log.info(f"시간표 미리 조회 시작 (오픈 규칙: {self.schedule})")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
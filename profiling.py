@@ -0,0 +1,302 @@
+import os
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter, defaultdict
+from selenium.webdriver.support.wait import WebDriverWait
+from botlog import get_logger
+
+log = get_logger("profiling")
+
+# ReservationBot 감시 주기 프로파일링.
+# 예약을 놓쳤을 때 시간이 어디에 쓰였는지(파이썬 코드 / WebDriver 호출 / 페이지 로드 / 대기) 나눠 보기 위한 도구입니다.
+#
+# - WebDriver 명령: driver.command_executor.execute 를 감싸(add_command_listener) 명령 종류별 호출 수와 시간을 셉니다.
+# - 대기: WebDriverWait.until / until_not 에 머문 시간 중 WebDriver 호출을 뺀 나머지 (폴링 sleep)
+# - 스택 샘플링: interval 초마다 감시 스레드의 파이썬 스택을 찍어 collapsed stack 형식(cycles.folded)으로 저장
+#   → flamegraph.pl cycles.folded > cycles.svg 또는 speedscope 에 그대로 넣을 수 있습니다.
+# - deterministic=True 면 cProfile 결과(cycles.prof)도 함께 저장합니다 (오버헤드가 커서 기본은 끔).
+
+# 끝날 때까지 chromedriver 가 페이지 로드를 기다리는 명령
+NAVIGATION_COMMANDS = {"get", "refresh", "goBack", "goForward", "clickElement"}
+
+_state = threading.local()
+
+
+def add_command_listener(driver, listener):
+    """
+    드라이버가 보내는 WebDriver 명령마다 listener(command, elapsed_seconds) 호출.
+    command_executor.execute 는 한 번만 감싸고, 여러 listener(프로파일러, metrics)가 함께 씁니다.
+    """
+    executor = driver.command_executor
+    listeners = executor.__dict__.get("_command_listeners")
+    if listeners is None:
+        listeners = executor._command_listeners = []
+        original = executor.execute
+
+        def execute(command, params=None):
+            started = time.perf_counter()
+            try:
+                return original(command, params)
+            finally:
+                elapsed = time.perf_counter() - started
+                for callback in list(listeners):
+                    callback(command, elapsed)
+
+        executor.execute = execute
+    if listener not in listeners:
+        listeners.append(listener)
+    return executor
+
+
+def remove_command_listener(executor, listener):
+    listeners = executor.__dict__.get("_command_listeners")
+    if listeners and listener in listeners:
+        listeners.remove(listener)
+    if listeners is not None and not listeners:
+        executor.__dict__.pop("execute", None)
+        executor.__dict__.pop("_command_listeners", None)
+
+
+class WebDriverCommandCounter:
+    """드라이버의 WebDriver 명령을 종류별 호출 수 / 소요 시간으로 집계"""
+
+    def __init__(self):
+        self._attached = []
+        self.reset()
+
+    def reset(self):
+        self.counts = Counter()
+        self.seconds = defaultdict(float)
+        self.wait_command_seconds = 0.0
+
+    def attach(self, driver):
+        """같은 드라이버에 여러 번 호출해도 한 번만 등록됩니다 (드라이버 교체 후 다시 호출)."""
+        executor = add_command_listener(driver, self._record)
+        if executor not in self._attached:
+            self._attached.append(executor)
+
+    def detach(self):
+        for executor in self._attached:
+            remove_command_listener(executor, self._record)
+        self._attached = []
+
+    def _record(self, command, elapsed):
+        self.counts[command] += 1
+        self.seconds[command] += elapsed
+        if getattr(_state, "waiting", False):
+            self.wait_command_seconds += elapsed
+
+
+class _WaitTimer:
+    """WebDriverWait.until / until_not 에 머문 시간 측정 (클래스 메서드를 잠시 교체)"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._originals = {}
+
+    def _wrap(self, original):
+        timer = self
+
+        def wrapper(wait, *args, **kwargs):
+            if getattr(_state, "waiting", False):
+                return original(wait, *args, **kwargs)
+            _state.waiting = True
+            started = time.perf_counter()
+            try:
+                return original(wait, *args, **kwargs)
+            finally:
+                timer.seconds += time.perf_counter() - started
+                _state.waiting = False
+
+        return wrapper
+
+    def install(self):
+        for name in ("until", "until_not"):
+            original = getattr(WebDriverWait, name)
+            self._originals[name] = original
+            setattr(WebDriverWait, name, self._wrap(original))
+
+    def uninstall(self):
+        for name, original in self._originals.items():
+            setattr(WebDriverWait, name, original)
+        self._originals = {}
+
+
+class StackSampler:
+    """지정한 스레드의 파이썬 스택을 주기적으로 찍어 collapsed stack 으로 집계"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.active = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class CycleStats:
+    """한 주기의 측정값 (초)"""
+    __slots__ = ("index", "result", "wall", "commands", "command_seconds", "wait_seconds", "wait_command_seconds")
+
+    def __init__(self, index, result, wall, commands, command_seconds, wait_seconds, wait_command_seconds):
+        self.index = index
+        self.result = result
+        self.wall = wall
+        self.commands = commands
+        self.command_seconds = command_seconds
+        self.wait_seconds = wait_seconds
+        self.wait_command_seconds = wait_command_seconds
+
+    @property
+    def webdriver_seconds(self):
+        return sum(self.command_seconds.values())
+
+    @property
+    def navigation_seconds(self):
+        return sum(s for c, s in self.command_seconds.items() if c in NAVIGATION_COMMANDS)
+
+    @property
+    def idle_wait_seconds(self):
+        """WebDriverWait 폴링 사이의 sleep (WebDriver 호출 제외)"""
+        return max(self.wait_seconds - self.wait_command_seconds, 0.0)
+
+    @property
+    def python_seconds(self):
+        return max(self.wall - self.webdriver_seconds - self.idle_wait_seconds, 0.0)
+
+
+class CycleProfiler:
+    """
+    ReservationBot.run_cycle 을 cycles 번 실행하며 주기마다 측정.
+    run() 이 끝나면 output_dir 에 cycles.folded / summary.txt (deterministic 이면 cycles.prof) 를 씁니다.
+    """
+
+    def __init__(self, bot, output_dir="profile", interval=0.005, deterministic=False):
+        self.bot = bot
+        self.output_dir = output_dir
+        self.interval = interval
+        self.deterministic = deterministic
+        self.counter = WebDriverCommandCounter()
+        self.cycles = []
+
+    def _cycle(self):
+        # run() 과 같은 흐름: 날짜가 없으면 새로고침까지가 한 주기
+        result = self.bot.run_cycle()
+        if result is None:
+            self.bot.driver.refresh()
+        return result
+
+    def profile_cycle(self, index, sampler=None, profiler=None):
+        self.counter.attach(self.bot.driver)
+        self.counter.reset()
+        waits = _WaitTimer()
+        waits.install()
+        if sampler is not None:
+            sampler.active = True
+        if profiler is not None:
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            result = self._cycle()
+        finally:
+            wall = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+            if sampler is not None:
+                sampler.active = False
+            waits.uninstall()
+        stats = CycleStats(index, result, wall, Counter(self.counter.counts), dict(self.counter.seconds),
+                           waits.seconds, self.counter.wait_command_seconds)
+        self.cycles.append(stats)
+        log.info(f"주기 {index}: {wall * 1000:.0f}ms, WebDriver 호출 {sum(stats.commands.values())}회 "
+                 f"({stats.webdriver_seconds * 1000:.0f}ms)")
+        return stats
+
+    def run(self, cycles=10, stop_on_booking=True, pause=None):
+        """
+        pause 는 주기 사이 쉬는 시간 (기본 bot.monitor_interval, 측정에서 제외).
+        stop_on_booking=False 면 예약에 성공해도 cycles 번을 모두 돕니다 (픽스처 서버용).
+        """
+        pause = self.bot.monitor_interval if pause is None else pause
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        profiler = cProfile.Profile() if self.deterministic else None
+        try:
+            for index in range(1, cycles + 1):
+                stats = self.profile_cycle(index, sampler, profiler)
+                if stats.result and stop_on_booking:
+                    break
+                if index < cycles:
+                    time.sleep(pause)
+        finally:
+            sampler.stop()
+            self.counter.detach()
+        self.write(sampler, profiler)
+        return self.cycles
+
+    def summary_table(self):
+        lines = [f"{'주기':>4} {'결과':>6} {'전체ms':>8} {'WebDriver':>14} {'페이지로드ms':>11} "
+                 f"{'대기ms':>8} {'Pythonms':>9}"]
+        labels = {True: "예약", False: "실패", None: "없음"}
+        for c in self.cycles:
+            calls = sum(c.commands.values())
+            lines.append(f"{c.index:>4} {labels.get(c.result, '-'):>6} {c.wall * 1000:>8.0f} "
+                         f"{c.webdriver_seconds * 1000:>8.0f}ms/{calls:>3}회 {c.navigation_seconds * 1000:>11.0f} "
+                         f"{c.idle_wait_seconds * 1000:>8.0f} {c.python_seconds * 1000:>9.0f}")
+
+        counts, seconds = Counter(), defaultdict(float)
+        for c in self.cycles:
+            counts.update(c.commands)
+            for command, s in c.command_seconds.items():
+                seconds[command] += s
+        n = max(len(self.cycles), 1)
+        lines.append("")
+        lines.append(f"{'WebDriver 명령':<28} {'호출':>6} {'주기당':>7} {'합계ms':>9} {'평균ms':>8}")
+        for command, count in sorted(counts.items(), key=lambda item: -seconds[item[0]]):
+            lines.append(f"{command:<28} {count:>6} {count / n:>7.1f} {seconds[command] * 1000:>9.0f} "
+                         f"{seconds[command] / count * 1000:>8.1f}")
+        return "\n".join(lines)
+
+    def write(self, sampler=None, profiler=None):
+        os.makedirs(self.output_dir, exist_ok=True)
+        table = self.summary_table()
+        with open(os.path.join(self.output_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(table + "\n")
+        if sampler is not None:
+            sampler.write_folded(os.path.join(self.output_dir, "cycles.folded"))
+        if profiler is not None:
+            profiler.dump_stats(os.path.join(self.output_dir, "cycles.prof"))
+        print(table)
+        print(f"프로파일 결과: {os.path.abspath(self.output_dir)} "
+              f"(샘플 {sampler.samples if sampler else 0}개, 간격 {self.interval * 1000:.0f}ms)")
@@ -0,0 +1,193 @@
+import re
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from botlog import get_logger
+
+log = get_logger("rate_limiter")
+
+# 같은 호스트에서 도는 모든 감시(ReservationBot, 스나이퍼, 프리페처, 탭 감시, fleet 워커)가 함께 쓰는 요청 속도 제한.
+# 각자 따로 폴링하면 합쳐진 요청량이 사이트 제한에 걸리고, 그러면 모두가 함께 느려집니다.
+#
+# - 토큰 버킷 상태를 SQLite 파일 하나에 두고 BEGIN IMMEDIATE 로 갱신하므로 스레드/프로세스가 같은 버킷을 씁니다.
+# - AIMD: 응답이 빠르면 rate 를 조금씩(increase) 올리고, 느리거나 차단/오류 페이지면 절반(decrease)으로 내립니다.
+#   감소는 cooldown 초에 한 번만 적용해 한 번의 지연에 연달아 깎이지 않게 합니다.
+# - 예약 요청은 기다리지 않습니다. 토큰이 없어도 빚(음수)으로 가져가고, 그만큼 폴링이 뒤로 밀립니다.
+#   booking() 구간 동안에는 다른 프로세스의 폴링도 멈추고, 폴링은 항상 reserve 개의 토큰을 남겨 둡니다.
+
+KIND_POLL = "poll"
+KIND_BOOK = "book"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    host          TEXT PRIMARY KEY,
+    tokens        REAL NOT NULL,
+    rate          REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    decreased_at  REAL NOT NULL DEFAULT 0,
+    booking_until REAL NOT NULL DEFAULT 0
+)
+"""
+
+_BLOCKED_STATUS = (403, 429, 503)
+_BLOCKED_TEXT_RE = re.compile(r"Too Many Requests|과도한|접속이 차단|잠시 후 다시|서비스를 이용할 수 없")
+
+# 방금 끝난 페이지 이동의 상태 코드/서버 응답 시간/본문 앞부분
+_NAVIGATION_PROBE_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0] || {};
+return {
+    status: nav.responseStatus || 0,
+    ms: nav.responseEnd && nav.requestStart ? nav.responseEnd - nav.requestStart : 0,
+    text: document.body ? document.body.innerText.slice(0, 300) : ''
+};
+"""
+
+
+def looks_blocked(status, text=""):
+    """차단/과부하 응답으로 보이는지"""
+    return status in _BLOCKED_STATUS or bool(_BLOCKED_TEXT_RE.search(text or ""))
+
+
+class SharedRateLimiter:
+    """
+    호스트별 공유 토큰 버킷.
+    rate 는 초당 요청 수이며 min_rate~max_rate 사이에서 AIMD 로 조정됩니다.
+    """
+
+    def __init__(self, path="rate_limit.sqlite3", host="www.ddgolf.co.kr", initial_rate=1.0, min_rate=0.2,
+                 max_rate=5.0, burst=3.0, reserve=1.0, latency_target=1.5, increase=0.05, decrease=0.5,
+                 cooldown=2.0, booking_hold=30.0):
+        self.path = path
+        self.host = host
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.reserve = reserve
+        self.latency_target = latency_target
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.booking_hold = booking_hold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO buckets (host, tokens, rate, updated_at) VALUES (?, ?, ?, ?)",
+            (host, burst, initial_rate, time.time()),
+        )
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute("SELECT tokens, rate, updated_at, decreased_at, booking_until FROM buckets WHERE host = ?",
+                            (self.host,))
+                row = list(cur.fetchone())
+                now = time.time()
+                # 경과 시간만큼 토큰 보충
+                row[0] = min(self.burst, row[0] + max(now - row[2], 0) * row[1])
+                row[2] = now
+                yield now, row
+                cur.execute(
+                    "UPDATE buckets SET tokens = ?, rate = ?, updated_at = ?, decreased_at = ?, booking_until = ? "
+                    "WHERE host = ?",
+                    tuple(row) + (self.host,),
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def acquire(self, kind=KIND_POLL, timeout=None):
+        """
+        토큰 하나를 가져갑니다. 기다린 시간(초)을 반환합니다.
+        예약(KIND_BOOK)은 기다리지 않고, 폴링은 토큰이 reserve 개 넘게 남고 진행 중인 예약이 없을 때까지 기다립니다.
+        timeout 초 안에 얻지 못하면 TimeoutError.
+        """
+        started = time.monotonic()
+        while True:
+            with self._transaction() as (now, row):
+                tokens, rate, _, _, booking_until = row
+                if kind == KIND_BOOK:
+                    row[0] = tokens - 1
+                    row[4] = max(booking_until, now + 1)
+                    return time.monotonic() - started
+                if booking_until <= now and tokens >= 1 + self.reserve:
+                    row[0] = tokens - 1
+                    return time.monotonic() - started
+                if booking_until > now:
+                    delay = min(booking_until - now, 0.5)
+                else:
+                    delay = (1 + self.reserve - tokens) / rate
+            waited = time.monotonic() - started
+            if timeout is not None and waited + delay > timeout:
+                raise TimeoutError(f"요청 토큰을 {timeout}초 안에 얻지 못했습니다")
+            time.sleep(min(max(delay, 0.01), 0.5))
+
+    @contextmanager
+    def booking(self):
+        """
+        이 구간 동안 (다른 프로세스 포함) 폴링을 멈추고 예약 요청에 대역폭을 양보.
+        끝날 때는 이 호출이 건 보류만 되돌립니다. 그 사이 다른 프로세스가 보류를 늘렸으면 그대로 두고,
+        먼저 걸려 있던 보류가 있으면 그 만료 시각으로 돌려놓습니다 (그 예약은 계속 폴링보다 우선).
+        """
+        with self._transaction() as (now, row):
+            previous = row[4] if row[4] > now else 0.0
+            held = row[4] = max(row[4], now + self.booking_hold)
+        try:
+            yield self
+        finally:
+            with self._transaction() as (now, row):
+                if row[4] == held:
+                    row[4] = previous
+
+    def report(self, elapsed, status=200, text=""):
+        """응답 관측 결과로 rate 조정 (elapsed 초)"""
+        blocked = looks_blocked(status, text)
+        slow = elapsed > self.latency_target or status == 0 or status >= 500
+        with self._transaction() as (now, row):
+            rate = row[1]
+            if blocked or slow:
+                if blocked:
+                    # 차단 신호면 쌓인 토큰도 버립니다.
+                    row[0] = min(row[0], 0.0)
+                if now - row[3] >= self.cooldown:
+                    row[1] = max(self.min_rate, rate * self.decrease)
+                    row[3] = now
+                    log.warning(f"{'차단 응답' if blocked else '응답 지연'}({elapsed:.2f}s, status={status}): "
+                                f"요청 속도 {rate:.2f} → {row[1]:.2f}/s")
+            else:
+                row[1] = min(self.max_rate, rate + self.increase)
+
+    def observe_navigation(self, driver, elapsed):
+        """브라우저 페이지 이동 직후 호출: 상태 코드/응답 시간/본문 앞부분을 읽어 report"""
+        try:
+            probe = driver.execute_script(_NAVIGATION_PROBE_SCRIPT) or {}
+        except Exception:
+            probe = {}
+        server_ms = probe.get("ms") or 0
+        self.report(server_ms / 1000 if server_ms else elapsed, probe.get("status") or 200, probe.get("text", ""))
+
+    def state(self):
+        with self._transaction() as (now, row):
+            return {"host": self.host, "tokens": round(row[0], 2), "rate": round(row[1], 3),
+                    "booking": row[4] > now}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='공유 요청 속도 제한 상태')
+    parser.add_argument('--path', default='rate_limit.sqlite3')
+    parser.add_argument('--host', default='www.ddgolf.co.kr')
+    args = parser.parse_args()
+    print(SharedRateLimiter(args.path, host=args.host).state())
@@ -0,0 +1,169 @@
+import os
+import time
+from collections import deque
+
+# 브라우저(chromedriver → chrome → 렌더러 프로세스들) 프로세스 트리의 메모리 사용량 측정.
+# 리눅스 /proc 만 사용하며, /proc 이 없는 환경에서는 0 을 반환합니다.
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _parent_map():
+    parents = {}
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return parents
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                stat = f.read().decode("utf-8", "replace")
+        except OSError:
+            continue
+        # 두 번째 필드(comm)에 공백/괄호가 들어갈 수 있으므로 마지막 ')' 이후를 자릅니다.
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[int(name)] = int(fields[1])
+    return parents
+
+
+def _children_map():
+    children = {}
+    for pid, ppid in _parent_map().items():
+        children.setdefault(ppid, []).append(pid)
+    return children
+
+
+def process_cmdline(pid):
+    """프로세스 실행 인자 목록 (읽지 못하면 빈 목록)"""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().decode("utf-8", "replace").split("\0")
+    except OSError:
+        return []
+
+
+def process_tree_pids(root_pid):
+    """root_pid 와 그 모든 하위 프로세스 pid 목록"""
+    children = _children_map()
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, ()))
+    return pids
+
+
+def process_rss(pid):
+    """프로세스 하나의 RSS (바이트)"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def process_tree_rss(root_pid):
+    """프로세스 트리 전체의 RSS 합계 (바이트)"""
+    if not root_pid:
+        return 0
+    return sum(process_rss(pid) for pid in process_tree_pids(root_pid))
+
+
+def driver_root_pid(driver):
+    """webdriver.Chrome 이 띄운 chromedriver 프로세스 pid (없으면 None)"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def driver_browser_pid(driver):
+    """
+    이 세션의 Chrome 브라우저 프로세스 pid (찾지 못하면 None).
+    chromedriver 의 자식 중 세션 capabilities 의 userDataDir 로 실행된 프로세스를 찾습니다.
+    """
+    root = driver_root_pid(driver)
+    try:
+        user_data_dir = driver.capabilities["chrome"]["userDataDir"]
+    except (AttributeError, KeyError, TypeError):
+        return None
+    if not root or not user_data_dir:
+        return None
+    flag = f"--user-data-dir={user_data_dir}"
+    for pid in _children_map().get(root, ()):
+        if flag in process_cmdline(pid):
+            return pid
+    return None
+
+
+def driver_rss(driver):
+    """
+    이 드라이버가 띄운 Chrome(브라우저 + 렌더러 프로세스들) RSS 합계 (바이트).
+    DriverPool 의 공유 chromedriver 아래에는 예비 Chrome 들도 있으므로 이 세션의 브라우저 트리만 셉니다.
+    브라우저 프로세스를 찾지 못하면 chromedriver 트리 전체로 대신합니다.
+    """
+    browser = driver_browser_pid(driver)
+    if browser is not None:
+        return process_tree_rss(browser)
+    return process_tree_rss(driver_root_pid(driver))
+
+
+def format_bytes(size):
+    return f"{size / (1024 * 1024):.1f}MB"
+
+
+class ResourceMonitor:
+    """
+    장시간 실행 중인 드라이버의 메모리/주기 지연을 관찰해 교체 시점을 판단.
+
+    다음 중 하나라도 만족하면 should_recycle() 이 사유 문자열을 반환합니다.
+    - 브라우저 프로세스 트리 RSS 가 max_rss 바이트 초과
+    - 드라이버 사용 시간이 max_age 초 초과
+    - 최근 window 주기 평균 지연이 처음 window 주기 평균의 latency_factor 배 초과
+    RSS 는 /proc 을 훑어야 하므로 sample_every 초에 한 번만 측정합니다.
+    """
+
+    def __init__(self, max_rss=1536 * 1024 * 1024, max_age=6 * 3600, latency_factor=2.0, window=20,
+                 sample_every=30):
+        self.max_rss = max_rss
+        self.max_age = max_age
+        self.latency_factor = latency_factor
+        self.window = window
+        self.sample_every = sample_every
+        self.reset()
+
+    def reset(self):
+        """새 드라이버로 교체한 직후 호출"""
+        self.started_at = time.monotonic()
+        self.baseline = []
+        self.recent = deque(maxlen=self.window)
+        self.last_rss = 0
+        self._sampled_at = 0.0
+
+    def observe_cycle(self, seconds):
+        if len(self.baseline) < self.window:
+            self.baseline.append(seconds)
+        self.recent.append(seconds)
+
+    def sample(self, driver):
+        now = time.monotonic()
+        if now - self._sampled_at >= self.sample_every:
+            self._sampled_at = now
+            self.last_rss = driver_rss(driver)
+        return self.last_rss
+
+    def should_recycle(self, driver):
+        rss = self.sample(driver)
+        if self.max_rss and rss > self.max_rss:
+            return f"메모리 {format_bytes(rss)} > {format_bytes(self.max_rss)}"
+        age = time.monotonic() - self.started_at
+        if self.max_age and age > self.max_age:
+            return f"사용 시간 {age / 3600:.1f}시간 초과"
+        if len(self.baseline) >= self.window and len(self.recent) >= self.window:
+            base = sum(self.baseline) / len(self.baseline)
+            current = sum(self.recent) / len(self.recent)
+            if base > 0 and current > base * self.latency_factor:
+                return f"주기 지연 {current:.2f}s (초기 {base:.2f}s)"
+        return None
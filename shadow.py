@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import threading
+from slots import SlotFilter, Holes
+from botlog import get_logger
+
+log = get_logger("shadow")
+
+# 새 감시 엔진을 기존 ReservationBot 경로 옆에서 예약 없이 함께 돌려 보는 섀도 러너.
+# 예약 당일에 더 빠른 엔진을 믿기 전에, 같은 조건에서 같은 슬롯을 더 빨리 찾는지 확인하기 위한 것입니다.
+#
+# - 기준(baseline): ReservationBot 이 쓰는 브라우저(bot.driver)로 달력 → 시간표를 읽는 기존 흐름 (cdp_backend.SeleniumPage)
+# - 후보(candidate): read_calendar / read_tee_sheet 를 가진 아무 페이지 구현
+#   (conditional_fetch.HttpPage, cdp_backend.CdpPage 등)
+# 두 엔진은 각자 스레드에서 같은 주기로 폴링하며, 신청(book)은 절대 호출하지 않습니다.
+# 관측마다 (시각, 엔진, 날짜, 파싱한 슬롯 목록)을 timeline.jsonl 에 남기고,
+# 끝나면 슬롯별 첫 발견 시각 차이(지연)와 슬롯 집합 일치도(정확도)를 report.txt 로 정리합니다.
+
+
+def _slot_record(slot):
+    return [slot.date, slot.minutes, slot.course_key, int(slot.holes), slot.open_seats]
+
+
+class Timeline:
+    """엔진 하나의 관측 기록: 날짜/슬롯별 첫 발견 시각과 날짜별 마지막 슬롯 집합"""
+
+    def __init__(self, name, slot_filter, sink=None):
+        self.name = name
+        self.slot_filter = slot_filter
+        self.sink = sink
+        self.date_first_seen = {}
+        self.slot_first_seen = {}
+        self.match_first_seen = {}
+        self.last_slots = {}
+        self.polls = 0
+        self.poll_seconds = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        if self.sink is not None:
+            self.sink(record)
+
+    def record_calendar(self, ts, days):
+        with self._lock:
+            for day in days:
+                self.date_first_seen.setdefault(day.date_text, ts)
+        self._write({"engine": self.name, "ts": ts, "kind": "cal", "dates": [day.date_text for day in days]})
+
+    def record_tee_sheet(self, ts, date, slots):
+        with self._lock:
+            for slot in slots:
+                self.slot_first_seen.setdefault(slot.key, ts)
+                if self.slot_filter.matches(slot):
+                    self.match_first_seen.setdefault(slot.key, ts)
+            self.last_slots[date] = {slot.key for slot in slots}
+        self._write({"engine": self.name, "ts": ts, "kind": "tee", "date": date,
+                     "slots": [_slot_record(slot) for slot in slots]})
+
+    def record_poll(self, seconds, error=None):
+        with self._lock:
+            self.polls += 1
+            self.poll_seconds.append(seconds)
+            if error is not None:
+                self.errors += 1
+        if error is not None:
+            self._write({"engine": self.name, "ts": time.time(), "kind": "error", "error": str(error)})
+
+
+class ShadowEngine:
+    """페이지 하나를 interval 초마다 폴링해 Timeline 에 기록하는 스레드"""
+
+    def __init__(self, name, page, reservation_url, dates, timeline, interval=1.0):
+        self.name = name
+        self.page = page
+        self.reservation_url = reservation_url
+        self.dates = list(dates)
+        self.timeline = timeline
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        started = time.perf_counter()
+        error = None
+        try:
+            days = self.page.read_calendar(self.reservation_url)
+            self.timeline.record_calendar(time.time(), days)
+            opened = {day.date_text for day in days}
+            for date in self.dates:
+                if date in opened:
+                    slots = self.page.read_tee_sheet(self.reservation_url, date)
+                    self.timeline.record_tee_sheet(time.time(), date, slots)
+        except Exception as e:
+            error = e
+            log.warning(f"{self.name} 폴링 오류: {e}")
+        self.timeline.record_poll(time.perf_counter() - started, error)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"shadow-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def compare(baseline, candidate):
+    """두 Timeline 의 지연/정확도 비교 결과 (dict)"""
+    def latency(first_a, first_b):
+        common = first_a.keys() & first_b.keys()
+        deltas = [(first_b[key] - first_a[key]) * 1000 for key in common]
+        result = {
+            "common": len(common),
+            "only_baseline": len(first_a.keys() - first_b.keys()),
+            "only_candidate": len(first_b.keys() - first_a.keys()),
+        }
+        if deltas:
+            result.update({
+                "candidate_earlier": sum(1 for d in deltas if d < 0),
+                "median_ms": _percentile(deltas, 0.5),
+                "p95_ms": _percentile(deltas, 0.95),
+                "min_ms": min(deltas),
+                "max_ms": max(deltas),
+            })
+        return result
+
+    agreement = {}
+    for date in baseline.last_slots.keys() | candidate.last_slots.keys():
+        a = baseline.last_slots.get(date, set())
+        b = candidate.last_slots.get(date, set())
+        union = a | b
+        agreement[date] = len(a & b) / len(union) if union else 1.0
+
+    def polls(timeline):
+        seconds = timeline.poll_seconds
+        return {
+            "polls": timeline.polls,
+            "errors": timeline.errors,
+            "avg_ms": sum(seconds) / len(seconds) * 1000 if seconds else None,
+            "p95_ms": _percentile(seconds, 0.95) * 1000 if seconds else None,
+        }
+
+    return {
+        "baseline": polls(baseline),
+        "candidate": polls(candidate),
+        "dates": latency(baseline.date_first_seen, candidate.date_first_seen),
+        "slots": latency(baseline.slot_first_seen, candidate.slot_first_seen),
+        "matching_slots": latency(baseline.match_first_seen, candidate.match_first_seen),
+        "slot_set_agreement": agreement,
+    }
+
+
+def format_report(result, baseline_name="baseline", candidate_name="candidate"):
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    lines = [f"{'':<10} {baseline_name:>12} {candidate_name:>12}"]
+    for key, label in (("polls", "폴링"), ("errors", "오류"), ("avg_ms", "평균ms"), ("p95_ms", "p95ms")):
+        a, b = result["baseline"][key], result["candidate"][key]
+        if key.endswith("_ms"):
+            a, b = ms(a), ms(b)
+        lines.append(f"{label:<10} {a:>12} {b:>12}")
+    lines.append("")
+    lines.append(f"첫 발견 시각 차이 ({candidate_name} - {baseline_name}, 음수면 후보가 빠름)")
+    for key, label in (("dates", "날짜"), ("slots", "슬롯"), ("matching_slots", "조건 슬롯")):
+        r = result[key]
+        line = (f"  {label}: 공통 {r['common']}, {baseline_name}만 {r['only_baseline']}, "
+                f"{candidate_name}만 {r['only_candidate']}")
+        if "median_ms" in r:
+            line += (f", 후보가 먼저 {r['candidate_earlier']}/{r['common']}, 중앙값 {r['median_ms']:.1f}ms, "
+                     f"p95 {r['p95_ms']:.1f}ms, 범위 {r['min_ms']:.1f}~{r['max_ms']:.1f}ms")
+        lines.append(line)
+    lines.append("")
+    lines.append("날짜별 마지막 슬롯 집합 일치도 (Jaccard)")
+    for date, value in sorted(result["slot_set_agreement"].items()):
+        lines.append(f"  {date}: {value:.2f}")
+    return "\n".join(lines)
+
+
+class ShadowRunner:
+    """
+    기준 페이지와 후보 페이지를 나란히 폴링.
+    run() 이 끝나면 output_dir 에 timeline.jsonl / report.txt 를 씁니다.
+    """
+
+    def __init__(self, baseline_page, candidate_page, reservation_url, dates, start_hour=8, end_hour=13,
+                 interval=1.0, output_dir="shadow", candidate_name="candidate"):
+        self.reservation_url = reservation_url
+        self.dates = list(dates)
+        self.interval = interval
+        self.output_dir = output_dir
+        self.candidate_name = candidate_name
+        os.makedirs(output_dir, exist_ok=True)
+        self._file = open(os.path.join(output_dir, "timeline.jsonl"), "w", encoding="utf-8")
+        self._file_lock = threading.Lock()
+        slot_filter = SlotFilter(start_hour, end_hour, holes=Holes.NINE, min_seats=2, max_seats=3)
+        self.baseline = Timeline("baseline", slot_filter, self._write)
+        self.candidate = Timeline(candidate_name, slot_filter, self._write)
+        self.engines = [
+            ShadowEngine("baseline", baseline_page, reservation_url, self.dates, self.baseline, interval),
+            ShadowEngine(candidate_name, candidate_page, reservation_url, self.dates, self.candidate, interval),
+        ]
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._file_lock:
+            self._file.write(line + "\n")
+
+    def run(self, duration=60):
+        log.info(f"섀도 실행 {duration}초: baseline vs {self.candidate_name} (날짜 {self.dates}, 예약 안 함)")
+        for engine in self.engines:
+            engine.start()
+        try:
+            time.sleep(duration)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for engine in self.engines:
+                engine.stop()
+            self._file.close()
+        result = compare(self.baseline, self.candidate)
+        report = format_report(result, "baseline", self.candidate_name)
+        with open(os.path.join(self.output_dir, "report.txt"), "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print(report)
+        print(f"섀도 결과: {os.path.abspath(self.output_dir)}")
+        return result
+
+
+def build_candidate(kind, reservation_url, bot):
+    """--candidate 이름으로 후보 페이지 생성 (bot 의 브라우저 세션을 빌리거나 따로 로그인)"""
+    if kind == "http":
+        from conditional_fetch import HttpPage
+
+        page = HttpPage(reservation_url)
+        page.sync_cookies(bot.driver)
+        return page
+    if kind == "cdp":
+        from cdp_backend import CdpPage
+
+        page = CdpPage.launch()
+        page.login(reservation_url, bot.username, bot.password)
+        return page
+    raise ValueError(f"알 수 없는 후보 엔진: {kind}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from main import ReservationBot
+    from cdp_backend import SeleniumPage
+
+    parser = argparse.ArgumentParser(description='새 감시 엔진을 기존 경로와 나란히 돌려 비교 (예약하지 않음)')
+    parser.add_argument('--candidate', choices=['http', 'cdp'], default='http')
+    parser.add_argument('--duration', type=float, default=60, help='실행 시간(초)')
+    parser.add_argument('--interval', type=float, default=1.0, help='엔진별 폴링 주기(초)')
+    parser.add_argument('--dates', nargs='*', help='감시 날짜 (YYYYMMDD)')
+    parser.add_argument('--output', default='shadow')
+    parser.add_argument('--test', action='store_true', help='로컬 픽스처 서버에서 실행')
+    args = parser.parse_args()
+
+    server = None
+    reservation_url = None
+    dates = args.dates or []
+    if args.test:
+        from fixture_server import FixtureServer
+
+        server = FixtureServer().start()
+        reservation_url = server.reservation_url
+        dates = dates or server.dates()
+    # 기준 쪽은 ReservationBot 의 브라우저와 로그인을 그대로 쓰되, 예약 경로는 호출하지 않습니다.
+    bot = ReservationBot(dates, reservation_url=reservation_url)
+    if args.test:
+        bot.username = bot.username or "fixture"
+        bot.password = bot.password or "fixture"
+    candidate = None
+    try:
+        bot._login()
+        candidate = build_candidate(args.candidate, bot.reservation_url, bot)
+        ShadowRunner(SeleniumPage(bot.driver, bot.wait), candidate, bot.reservation_url, bot.user_dates,
+                     bot.start_hour, bot.end_hour, args.interval, args.output, args.candidate).run(args.duration)
+    finally:
+        if candidate is not None:
+            candidate.close()
+        bot.driver.quit()
+        if server is not None:
+            server.stop()
@@ -0,0 +1,296 @@
+import re
+from enum import IntEnum
+
+# 예약 시간표(reservation02_1.asp)와 달력(reservation02.asp)에서 읽어온 값을
+# 문자열 그대로 들고 다니지 않고 정수/열거형 레코드로 변환해 둡니다.
+# __slots__ 를 사용하므로 수천 개의 스냅샷을 메모리에 올려도 부담이 적습니다.
+
+
+class Course(IntEnum):
+    """
+    bookProsecc_join 의 paraBookCrs 값 (코스 구분).
+    여기 없는 코스는 UNKNOWN 이 되므로, 신청/식별에는 Slot.crs (원래 문자열)를 씁니다.
+    """
+    UNKNOWN = 0
+    A = 1
+    B = 2
+    C = 3
+
+    @classmethod
+    def parse(cls, text):
+        return cls.__members__.get((text or "").strip().upper(), cls.UNKNOWN)
+
+
+class Holes(IntEnum):
+    """홀수 컬럼(td.course) 값"""
+    UNKNOWN = 0
+    NINE = 9
+    EIGHTEEN = 18
+
+    @classmethod
+    def parse(cls, text):
+        m = _NUMBER_RE.search(text or "")
+        if not m:
+            return cls.UNKNOWN
+        try:
+            return cls(int(m.group()))
+        except ValueError:
+            return cls.UNKNOWN
+
+
+_NUMBER_RE = re.compile(r"\d+")
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+_BOOK_CALL_RE = re.compile(r"bookProsecc_join\(('[^)]*)\)")
+_QUOTED_RE = re.compile(r"'([^']*)'")
+_ROW_TIME_RE = re.compile(r'<td class="gray">\s*<span[^>]*>\s*([^<]+?)\s*</span>')
+_ROW_COURSE_RE = re.compile(r'<td class="course">\s*([^<]*?)\s*</td>')
+_ROW_SEATS_RE = re.compile(r'</td>\s*<td>\s*<span[^>]*>\s*([^<]*?)\s*</span>\s*</td>\s*<td class="price">')
+_ROW_OPTION_RE = re.compile(r'<option value="(\d+)"')
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+_ROW_SPLIT_RE = re.compile(r"<tr[\s>]")
+_CAL_CELL_RE = re.compile(r'<td class="on"((?:[^>"]|"[^"]*")*)>')
+_CAL_DATE_RE = re.compile(r"transDate_join\('(\d{8})'\)")
+_CAL_TOOLTIP_RE = re.compile(r"msgset_list\('([^']*)'\)")
+_CAL_TEAMS_RE = re.compile(r"(\d+)팀 예약가능")
+_CAL_18_RE = re.compile(r"18홀:\s*(\d+)팀")
+_CAL_9_RE = re.compile(r"9홀:\s*(\d+)팀")
+
+
+def parse_minutes(text):
+    """'HH:MM' 또는 'HHMM' 문자열을 자정 기준 분(int)으로 변환"""
+    text = (text or "").strip()
+    m = _TIME_RE.search(text)
+    if m:
+        return int(m.group(1)) * 60 + int(m.group(2))
+    if len(text) == 4 and text.isdigit():
+        return int(text[:2]) * 60 + int(text[2:])
+    raise ValueError(f"시간 형식을 해석할 수 없습니다: {text!r}")
+
+
+def format_minutes(minutes):
+    """자정 기준 분을 'HH:MM' 문자열로 변환"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_seats(text):
+    """'2명' 같은 예약가능인원 문자열을 정수로 변환 (없으면 0)"""
+    m = _NUMBER_RE.search(text or "")
+    return int(m.group()) if m else 0
+
+
+def parse_book_args(href):
+    """
+    신청하기 링크의 bookProsecc_join(...) 호출에서 인자 7개를 문자열 튜플로 추출.
+    (paraBookDate, paraBookTime, paraBookCrs, paraBookCname, j, paraRoundf, paraCartDiv)
+    """
+    m = _BOOK_CALL_RE.search(href or "")
+    if not m:
+        return None
+    args = _QUOTED_RE.findall(m.group(1))
+    if len(args) < 7:
+        args += [""] * (7 - len(args))
+    return tuple(args[:7])
+
+
+class Slot:
+    """
+    예약 시간표 한 행(tr)을 나타내는 레코드.
+    date 는 YYYYMMDD 정수, minutes 는 자정 기준 분입니다.
+    crs 는 onclick 에 있던 paraBookCrs 원래 값으로, 신청서에는 이 값을 그대로 보냅니다.
+    """
+    __slots__ = ("date", "minutes", "course", "holes", "open_seats", "max_party",
+                 "index", "cname", "roundf", "cart_div", "crs")
+
+    def __init__(self, date, minutes, course=Course.UNKNOWN, holes=Holes.UNKNOWN, open_seats=0,
+                 max_party=0, index=0, cname="", roundf="", cart_div="", crs=None):
+        self.date = int(date)
+        self.minutes = int(minutes)
+        self.course = Course(course)
+        if crs is None:
+            crs = self.course.name if self.course != Course.UNKNOWN else ""
+        self.crs = crs
+        self.holes = Holes(holes)
+        self.open_seats = int(open_seats)
+        self.max_party = int(max_party)
+        self.index = int(index)
+        self.cname = cname
+        self.roundf = roundf
+        self.cart_div = cart_div
+
+    @classmethod
+    def from_book_args(cls, args, holes=Holes.UNKNOWN, open_seats=0, max_party=0):
+        book_date, book_time, crs, cname, j, roundf, cart_div = args
+        return cls(
+            date=book_date,
+            minutes=parse_minutes(book_time),
+            course=Course.parse(crs),
+            holes=holes,
+            open_seats=open_seats,
+            max_party=max_party,
+            index=int(j or 0),
+            cname=cname,
+            roundf=roundf,
+            cart_div=cart_div,
+            crs=crs,
+        )
+
+    @classmethod
+    def from_row_html(cls, html):
+        """
+        시간표 tr 의 HTML 한 덩어리에서 Slot 을 생성.
+        WebElement 에서 outerHTML 을 한 번만 가져와 파싱하면
+        find_element 를 셀마다 호출하는 것보다 WebDriver 왕복이 훨씬 적습니다.
+        신청하기 링크가 없는 행이면 None 을 반환합니다.
+        """
+        html = _COMMENT_RE.sub("", html)
+        args = parse_book_args(html)
+        if not args:
+            return None
+        course_m = _ROW_COURSE_RE.search(html)
+        seats_m = _ROW_SEATS_RE.search(html)
+        options = [int(v) for v in _ROW_OPTION_RE.findall(html)]
+        slot = cls.from_book_args(
+            args,
+            holes=Holes.parse(course_m.group(1)) if course_m else Holes.UNKNOWN,
+            open_seats=parse_seats(seats_m.group(1)) if seats_m else 0,
+            max_party=max(options) if options else 0,
+        )
+        time_m = _ROW_TIME_RE.search(html)
+        if time_m:
+            try:
+                slot.minutes = parse_minutes(time_m.group(1))
+            except ValueError:
+                pass
+        return slot
+
+    @property
+    def course_key(self):
+        """코스 식별 값. 아는 코스는 Course 정수, 그 밖의 코스는 원래 paraBookCrs 문자열"""
+        return int(self.course) if self.course != Course.UNKNOWN else self.crs
+
+    @property
+    def course_name(self):
+        return self.course.name if self.course != Course.UNKNOWN else (self.crs or self.course.name)
+
+    @property
+    def key(self):
+        """같은 티타임을 식별하는 키 (날짜, 시간, 코스)"""
+        return (self.date, self.minutes, self.course_key)
+
+    @property
+    def time_text(self):
+        return format_minutes(self.minutes)
+
+    @property
+    def date_text(self):
+        return f"{self.date:08d}"
+
+    def book_args(self):
+        """bookProsecc_join 호출에 그대로 넘길 수 있는 인자 튜플"""
+        return (self.date_text, f"{self.minutes // 60:02d}{self.minutes % 60:02d}", self.crs,
+                self.cname, str(self.index), self.roundf, self.cart_div)
+
+    def as_tuple(self):
+        return (self.date, self.minutes, int(self.course), int(self.holes), self.open_seats,
+                self.max_party, self.index, self.cname, self.roundf, self.cart_div, self.crs)
+
+    def __eq__(self, other):
+        if not isinstance(other, Slot):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def __repr__(self):
+        return (f"Slot({self.date_text} {self.time_text} {self.course_name} "
+                f"{int(self.holes)}홀 {self.open_seats}명)")
+
+
+class CalendarDay:
+    """달력(reservation02.asp)에서 예약 가능(td.on)으로 표시된 하루"""
+    __slots__ = ("date", "open_teams", "teams_18", "teams_9")
+
+    def __init__(self, date, open_teams=0, teams_18=0, teams_9=0):
+        self.date = int(date)
+        self.open_teams = int(open_teams)
+        self.teams_18 = int(teams_18)
+        self.teams_9 = int(teams_9)
+
+    @classmethod
+    def from_tooltip(cls, date, tooltip):
+        """onmouseover 의 msgset_list('...7팀 예약가능<br>18홀: 0팀<br>&nbsp;9홀: 5팀') 문자열 파싱"""
+        tooltip = tooltip or ""
+        teams = _CAL_TEAMS_RE.search(tooltip)
+        t18 = _CAL_18_RE.search(tooltip)
+        t9 = _CAL_9_RE.search(tooltip)
+        return cls(
+            date,
+            open_teams=int(teams.group(1)) if teams else 0,
+            teams_18=int(t18.group(1)) if t18 else 0,
+            teams_9=int(t9.group(1)) if t9 else 0,
+        )
+
+    @property
+    def date_text(self):
+        return f"{self.date:08d}"
+
+    def as_tuple(self):
+        return (self.date, self.open_teams, self.teams_18, self.teams_9)
+
+    def __eq__(self, other):
+        if not isinstance(other, CalendarDay):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def __repr__(self):
+        return f"CalendarDay({self.date_text} {self.open_teams}팀, 18홀 {self.teams_18}, 9홀 {self.teams_9})"
+
+
+class SlotFilter:
+    """
+    시간 범위/홀수/예약가능인원 조건. 모든 비교는 정수 비교입니다.
+    end_hour 는 포함하지 않습니다 (start_hour <= 시 < end_hour).
+    """
+    __slots__ = ("start_minutes", "end_minutes", "holes", "min_seats", "max_seats")
+
+    def __init__(self, start_hour, end_hour, holes=Holes.NINE, min_seats=2, max_seats=3):
+        self.start_minutes = start_hour * 60
+        self.end_minutes = end_hour * 60
+        self.holes = Holes(holes) if holes is not None else None
+        self.min_seats = min_seats
+        self.max_seats = max_seats
+
+    def matches(self, slot):
+        return (self.start_minutes <= slot.minutes < self.end_minutes
+                and (self.holes is None or slot.holes == self.holes)
+                and self.min_seats <= slot.open_seats <= self.max_seats)
+
+
+def parse_tee_sheet_html(html):
+    """시간표 페이지 전체 HTML 에서 Slot 목록을 추출 (주석 처리된 행은 제외)"""
+    html = _COMMENT_RE.sub("", html or "")
+    slots = []
+    for chunk in _ROW_SPLIT_RE.split(html):
+        if "bookProsecc_join('" not in chunk:
+            continue
+        slot = Slot.from_row_html(chunk)
+        if slot is not None:
+            slots.append(slot)
+    return slots
+
+
+def parse_calendar_html(html):
+    """달력 페이지 HTML 에서 예약 가능한 CalendarDay 목록을 추출"""
+    html = _COMMENT_RE.sub("", html or "")
+    days = []
+    for attrs in _CAL_CELL_RE.findall(html):
+        date_m = _CAL_DATE_RE.search(attrs)
+        if not date_m:
+            continue
+        tooltip_m = _CAL_TOOLTIP_RE.search(attrs)
+        days.append(CalendarDay.from_tooltip(date_m.group(1), tooltip_m.group(1) if tooltip_m else ""))
+    return days
@@ -0,0 +1,183 @@
+import time
+import heapq
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from slots import SlotFilter, Holes, parse_tee_sheet_html
+from page_fetch import fetch_tee_sheet, open_tee_sheet
+from botlog import get_logger
+
+log = get_logger("sniper")
+
+
+class CancellationSniper:
+    """
+    이미 열린 날짜의 취소분을 노리는 모드.
+    달력 전체를 다시 읽지 않고, 지정한 날짜의 reservation02_1.asp 만
+    페이지 내 fetch 로 짧은 주기마다 확인합니다.
+    슬롯 집합이 바뀌어 조건에 맞는 새 슬롯이 보이면 즉시 예약을 시도합니다.
+
+    날짜별 폴링 주기는 이력 저장소(SnapshotStore)의 취소분 등장 횟수를 보고
+    min_interval~max_interval 사이에서 정합니다. 이력이 없으면 base_interval 을 사용합니다.
+    """
+
+    def __init__(self, bot, dates=None, base_interval=1.0, min_interval=0.3, max_interval=5.0, store=None):
+        self.bot = bot
+        self.dates = list(dates or bot.user_dates)
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.store = store if store is not None else bot.recorder
+        self.slot_filter = SlotFilter(bot.start_hour, bot.end_hour, holes=Holes.NINE, min_seats=2, max_seats=3)
+        self.intervals = self._tune_intervals()
+        self._previous = {}
+
+    def _tune_intervals(self):
+        intervals = {date: self.base_interval for date in self.dates}
+        if self.store is None:
+            return intervals
+        try:
+            by_date, _ = self.store.cancellation_counts()
+        except Exception as e:
+            log.warning(f"취소 이력 조회 중 오류 발생: {e}")
+            return intervals
+        counts = {date: by_date.get(int(date), 0) for date in self.dates}
+        peak = max(counts.values(), default=0)
+        if peak == 0:
+            return intervals
+        for date, count in counts.items():
+            # 취소가 잦았던 날짜일수록 짧은 주기로 확인
+            weight = count / peak
+            intervals[date] = self.max_interval - (self.max_interval - self.min_interval) * weight
+        return intervals
+
+    def _sync_settings(self):
+        """제어 API 로 들어온 변경(날짜/시간대) 반영. 일시정지 중이면 True"""
+        paused = self.bot._apply_control()
+        dates = list(self.bot.user_dates)
+        if dates != self.dates:
+            self.dates = dates
+            self.intervals = self._tune_intervals()
+            for date in list(self._previous):
+                if date not in dates:
+                    del self._previous[date]
+        self.slot_filter = SlotFilter(self.bot.start_hour, self.bot.end_hour, holes=Holes.NINE,
+                                      min_seats=2, max_seats=3)
+        return paused
+
+    def poll(self, date):
+        """
+        날짜 하나의 시간표를 가져와 이전 관측과 비교.
+        (새로 나타난 조건 만족 슬롯 목록, 현재 슬롯 목록) 을 반환합니다.
+        """
+        self.bot._throttle()
+        result = fetch_tee_sheet(self.bot.driver, self.bot.reservation_url, date)
+        if self.bot.rate_limiter is not None:
+            self.bot.rate_limiter.report(result.elapsed_ms / 1000, result.status, result.text)
+        if not result.ok:
+            log.warning(f"{date} 시간표 조회 실패: status={result.status} {result.error or ''}")
+            return [], None
+        if result.login_required:
+            log.warning("로그인이 만료되었습니다. 다시 로그인합니다.")
+            self.bot._login()
+            return [], None
+
+        slots = parse_tee_sheet_html(result.text)
+        if self.store is not None:
+            self.store.record_tee_sheet(date, slots)
+
+        current = {slot.key: slot for slot in slots}
+        before = self._previous.get(date)
+        self._previous[date] = current
+        # 첫 관측에서는 이미 있는 슬롯도 모두 후보로 봅니다.
+        new_keys = current.keys() if before is None else current.keys() - before.keys()
+        changed = [slot for key, slot in current.items()
+                   if key in new_keys or (before is not None and before[key].open_seats != slot.open_seats)]
+        return [slot for slot in changed if self.slot_filter.matches(slot)], slots
+
+    def _recover(self, date, error):
+        """
+        폴링 중 브라우저 오류(스크립트 타임아웃, 예상치 못한 팝업 등) 처리.
+        떠 있는 팝업은 닫고, 로그인 만료 팝업이면 다시 로그인합니다. 스나이핑은 계속합니다.
+        """
+        log.warning(f"{date} 시간표 조회 중 브라우저 오류: {getattr(error, 'msg', None) or error}")
+        try:
+            alert = EC.alert_is_present()(self.bot.driver)
+            if alert:
+                text = alert.text
+                alert.accept()
+                if "로그인" in text:
+                    log.warning("로그인이 만료되었습니다. 다시 로그인합니다.")
+                    self.bot._login()
+        except WebDriverException as e:
+            log.warning(f"브라우저 오류 복구 실패: {e}")
+
+    def book(self, date):
+        """시간표 페이지로 바로 이동해 기존 예약 절차(reserve_for_two_members)를 수행"""
+        from main import reserve_for_two_members
+
+        try:
+            with self.bot._booking():
+                self.bot._throttle("book")
+                open_tee_sheet(self.bot.driver, self.bot.reservation_url, date)
+                self.bot.wait.until(EC.presence_of_element_located((By.XPATH, "//table/tbody/tr[td[@class='gray']]")))
+                return reserve_for_two_members(self.bot.driver, self.bot.wait, self.bot.start_hour,
+                                               self.bot.end_hour, ledger=self.bot.ledger, account=self.bot.username)
+        except Exception as e:
+            log.warning(f"{date} 취소분 예약 중 오류 발생: {e}")
+            return False, None
+        finally:
+            self.bot.driver.get(self.bot.reservation_url)
+
+    def run(self, timeout=None):
+        """
+        예약에 성공하면 (날짜, 시간) 을, timeout 초가 지나면 None 을 반환.
+        날짜별 다음 확인 시각을 힙으로 관리해 주기가 짧은 날짜를 더 자주 확인합니다.
+        확인 사이마다 제어 API 변경을 반영합니다 (추가된 날짜는 바로 확인, 빠진 날짜는 일정에서 제외).
+        """
+        log.info(f"취소분 스나이핑 시작: {', '.join(f'{d}({self.intervals[d]:.1f}초)' for d in self.dates)}")
+        self.bot.driver.set_script_timeout(10)
+        deadline = time.monotonic() + timeout if timeout else None
+        schedule = [(time.monotonic(), date) for date in self.dates]
+        heapq.heapify(schedule)
+        scheduled = set(self.dates)
+
+        while deadline is None or time.monotonic() < deadline:
+            if self._sync_settings():
+                self.bot._sleep(self.base_interval)
+                continue
+            for date in self.dates:
+                if date not in scheduled:
+                    heapq.heappush(schedule, (time.monotonic(), date))
+                    scheduled.add(date)
+            if not schedule:
+                if self.bot.control is None:
+                    break
+                self.bot._sleep(self.base_interval)
+                continue
+            due, date = schedule[0]
+            now = time.monotonic()
+            if deadline and due > deadline:
+                break
+            if due > now:
+                # 변경 요청이 들어오면 일찍 깨어나 다시 반영
+                self.bot._sleep(due - now)
+                continue
+            heapq.heappop(schedule)
+            if date not in self.dates:
+                scheduled.discard(date)
+                continue
+
+            try:
+                matched, _ = self.poll(date)
+            except WebDriverException as e:
+                self._recover(date, e)
+                matched = []
+            if matched:
+                log.info(f"{date} 취소분 발견: {matched}. 즉시 예약을 시도합니다.")
+                ok, t = self.book(date)
+                if ok:
+                    log.info(f"{date} {t} 예약 성공!")
+                    return date, t
+            heapq.heappush(schedule, (time.monotonic() + self.intervals[date], date))
+        return None
@@ -0,0 +1,225 @@
+import time
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from slots import SlotFilter, Holes, parse_tee_sheet_html
+from page_fetch import open_tee_sheet, is_login_page
+from resources import driver_rss, format_bytes
+from botlog import get_logger
+
+log = get_logger("tab_pool")
+
+
+class TabWatcher:
+    """날짜 하나를 담당하는 탭"""
+    __slots__ = ("date", "handle", "slots", "checked_at", "previous_root")
+
+    def __init__(self, date, handle):
+        self.date = date
+        self.handle = handle
+        self.slots = []
+        self.checked_at = 0.0
+        # 이동을 걸기 전 문서의 <html> 요소 (이것이 stale 이 되어야 새 시간표가 로드된 것)
+        self.previous_root = None
+
+
+class TabMultiplexer:
+    """
+    Chrome 하나에 날짜별 탭을 열어 여러 날짜를 동시에 감시.
+
+    한 주기는 두 단계로 나뉩니다.
+    1) 모든 탭을 돌며 시간표 POST 이동만 걸어 둔다 (로딩은 탭마다 병렬로 진행)
+    2) 다시 돌며 로딩이 끝난 탭의 HTML 을 파싱하고, 조건에 맞으면 그 탭에서 바로 예약
+    감시 날짜가 늘어도 브라우저가 아니라 탭만 늘어나므로 메모리 증가가 작습니다.
+    """
+
+    def __init__(self, bot, dates=None, interval=1.0, load_timeout=10):
+        self.bot = bot
+        self.dates = list(dates or bot.user_dates)
+        self.interval = interval
+        self.load_timeout = load_timeout
+        self.slot_filter = SlotFilter(bot.start_hour, bot.end_hour, holes=Holes.NINE, min_seats=2, max_seats=3)
+        self.watchers = []
+        # 감시 날짜가 모두 빠졌을 때 닫지 않고 남겨 둔 탭 (다음에 추가되는 날짜가 재사용)
+        self.spare_handles = []
+        self.baseline_rss = 0
+
+    def open_tabs(self):
+        driver = self.bot.driver
+        # 탭을 열기 전 메모리 = 기존 방식(봇 하나당 드라이버 하나)의 감시자 1개 비용
+        self.baseline_rss = driver_rss(driver)
+        first = True
+        for date in self.dates:
+            if not first:
+                driver.switch_to.new_window("tab")
+                driver.get(self.bot.reservation_url)
+            first = False
+            self.watchers.append(TabWatcher(date, driver.current_window_handle))
+        log.info(f"{len(self.watchers)}개 탭으로 날짜 감시를 시작합니다.")
+
+    def report_rss(self):
+        """탭 방식의 감시자당 RSS 와 드라이버당 방식의 RSS 비교"""
+        total = driver_rss(self.bot.driver)
+        count = max(len(self.watchers), 1)
+        per_watcher = total / count
+        log.info(f"탭 {count}개 전체 RSS {format_bytes(total)}, 감시자당 {format_bytes(per_watcher)} "
+                 f"(드라이버당 방식 감시자 1개 {format_bytes(self.baseline_rss)}, "
+                 f"{count}개면 약 {format_bytes(self.baseline_rss * count)})")
+        return per_watcher, self.baseline_rss
+
+    def _sync_settings(self):
+        """
+        제어 API 로 들어온 변경 반영. 일시정지 중이면 True.
+        빠진 날짜의 탭은 새 날짜에 재사용하고, 남는 탭은 닫습니다 (마지막 창은 세션 유지를 위해 남김).
+        """
+        paused = self.bot._apply_control()
+        self.interval = self.bot.monitor_interval
+        self.slot_filter = SlotFilter(self.bot.start_hour, self.bot.end_hour, holes=Holes.NINE,
+                                      min_seats=2, max_seats=3)
+        dates = list(self.bot.user_dates)
+        if dates == self.dates:
+            return paused
+        driver = self.bot.driver
+        removed = [watcher for watcher in self.watchers if watcher.date not in dates]
+        watched = {watcher.date for watcher in self.watchers}
+        for date in dates:
+            if date in watched:
+                continue
+            if removed:
+                watcher = removed.pop()
+                watcher.date, watcher.slots, watcher.checked_at, watcher.previous_root = date, [], 0.0, None
+            elif self.spare_handles:
+                self.watchers.append(TabWatcher(date, self.spare_handles.pop()))
+            else:
+                driver.switch_to.new_window("tab")
+                driver.get(self.bot.reservation_url)
+                self.watchers.append(TabWatcher(date, driver.current_window_handle))
+        for watcher in removed:
+            self.watchers.remove(watcher)
+            if self.watchers or self.spare_handles:
+                driver.switch_to.window(watcher.handle)
+                driver.close()
+            else:
+                self.spare_handles.append(watcher.handle)
+        if self.watchers or self.spare_handles:
+            driver.switch_to.window(self.watchers[0].handle if self.watchers else self.spare_handles[0])
+        self.dates = dates
+        log.info(f"감시 날짜 변경: 탭 {len(self.watchers)}개 ({', '.join(self.dates)})")
+        return paused
+
+    def _recover(self, watcher, error=None):
+        """
+        탭에서 난 브라우저 오류 처리 (_attempt_reserve 와 같은 방식).
+        떠 있는 팝업은 닫고, 로그인 만료 팝업이면 다시 로그인한 뒤 모든 탭을 달력으로 되돌립니다.
+        error 없이 부르면 로그인 페이지를 받은 경우로 보고 바로 다시 로그인합니다. 다시 로그인했으면 True.
+        """
+        driver = self.bot.driver
+        expired = error is None
+        if error is not None:
+            log.warning(f"{watcher.date} 탭 오류: {getattr(error, 'msg', None) or error}")
+            try:
+                alert = EC.alert_is_present()(driver)
+                if alert:
+                    expired = "로그인" in alert.text
+                    alert.accept()
+            except WebDriverException as e:
+                log.warning(f"{watcher.date} 탭 팝업 확인 실패: {e}")
+        if not expired:
+            return False
+        log.warning("로그인이 만료되었습니다. 다시 로그인하고 탭을 다시 엽니다.")
+        self.bot._login()
+        self.reopen_tabs()
+        return True
+
+    def reopen_tabs(self):
+        """다시 로그인한 뒤 모든 탭을 달력 페이지로 (세션 쿠키는 탭끼리 공유합니다)"""
+        driver = self.bot.driver
+        for watcher in self.watchers:
+            watcher.previous_root = None
+            try:
+                driver.switch_to.window(watcher.handle)
+                alert = EC.alert_is_present()(driver)
+                if alert:
+                    alert.accept()
+                driver.get(self.bot.reservation_url)
+            except WebDriverException as e:
+                log.warning(f"{watcher.date} 탭을 다시 열지 못했습니다: {e}")
+
+    def _page_ready(self, driver):
+        return driver.execute_script("return document.readyState") == "complete"
+
+    def cycle(self):
+        """한 주기 실행. 예약에 성공하면 (날짜, 시간) 을 반환합니다."""
+        from main import reserve_for_two_members
+
+        driver = self.bot.driver
+        for watcher in self.watchers:
+            watcher.previous_root = None
+            try:
+                driver.switch_to.window(watcher.handle)
+                self.bot._throttle()
+                watcher.previous_root = driver.find_element(By.TAG_NAME, "html")
+                open_tee_sheet(driver, self.bot.reservation_url, watcher.date)
+            except WebDriverException as e:
+                watcher.previous_root = None
+                if self._recover(watcher, e):
+                    return None
+
+        for watcher in self.watchers:
+            if watcher.previous_root is None:
+                continue
+            try:
+                driver.switch_to.window(watcher.handle)
+                # 폼 제출은 비동기라 직전 문서도 이미 "complete" 입니다. 이전 문서가 사라진 뒤의 readyState 를 봅니다.
+                wait = WebDriverWait(driver, self.load_timeout)
+                wait.until(EC.staleness_of(watcher.previous_root))
+                wait.until(self._page_ready)
+                source = driver.page_source
+            except TimeoutException as e:
+                log.warning(f"{watcher.date} 탭 로딩 지연: {e}")
+                continue
+            except WebDriverException as e:
+                if self._recover(watcher, e):
+                    return None
+                continue
+            if is_login_page(source):
+                self._recover(watcher)
+                return None
+            watcher.slots = parse_tee_sheet_html(source)
+            watcher.checked_at = time.time()
+            if self.bot.recorder is not None:
+                self.bot.recorder.record_tee_sheet(watcher.date, watcher.slots)
+            if not any(self.slot_filter.matches(slot) for slot in watcher.slots):
+                continue
+
+            log.info(f"{watcher.date} 탭에서 조건에 맞는 슬롯 발견. 예약을 시도합니다.")
+            try:
+                with self.bot._booking():
+                    ok, t = reserve_for_two_members(driver, self.bot.wait, self.bot.start_hour, self.bot.end_hour,
+                                                    ledger=self.bot.ledger, account=self.bot.username)
+            except WebDriverException as e:
+                if self._recover(watcher, e):
+                    return None
+                continue
+            if ok:
+                return watcher.date, t
+        return None
+
+    def run(self, timeout=None):
+        self.open_tabs()
+        deadline = time.monotonic() + timeout if timeout else None
+        cycles = 0
+        while deadline is None or time.monotonic() < deadline:
+            if self._sync_settings():
+                self.bot._sleep(self.interval)
+                continue
+            result = self.cycle()
+            cycles += 1
+            if result:
+                log.info(f"{result[0]} {result[1]} 예약 성공!")
+                return result
+            if cycles % 60 == 1:
+                self.report_rss()
+            self.bot._sleep(self.interval)
+        return None
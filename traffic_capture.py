@@ -0,0 +1,408 @@
+import re
+import json
+import time
+import base64
+import threading
+from datetime import datetime, timezone
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from slots import parse_calendar_html
+from botlog import get_logger
+
+log = get_logger("traffic_capture")
+
+# 실제 실행 중 오간 요청/응답을 타이밍과 함께 HAR 형식으로 기록하고, 기록한 순서대로 다시 돌려주는 도구.
+# 저장해 둔 HTML 세 개로는 상태 변화(날짜가 열리는 순간, 로그인 만료 등), EUC-KR 응답, 느린 응답을 재현할 수 없어
+# 실제 페이지 크기/지연으로 오프라인 벤치마크를 하려고 만들었습니다.
+#
+# 기록: Chrome performance 로그(Network.* 이벤트)를 읽고 본문은 CDP Network.getResponseBody 로 가져옵니다.
+#       드라이버는 build_chrome_options(performance_log=True) 로 띄워야 합니다.
+#       CDP 는 본문을 디코딩된 문자열로 주므로 Content-Type 의 charset(euc-kr 등)으로 다시 인코딩해 원래 바이트로 저장합니다.
+# 재생: ReplayServer 가 (메서드, 경로) 별로 기록된 순서대로 응답하고, 마지막 응답은 이후에도 반복합니다.
+#       time_scale=1.0 이면 원래 TTFB/전송 시간대로, 0 이면 지연 없이 응답합니다.
+
+# 기록할 리소스 종류 (이미지/CSS 등은 제외)
+DEFAULT_RESOURCE_TYPES = ("Document", "XHR", "Fetch")
+
+# 재생 시 그대로 돌려주지 않는 헤더 (본문을 디코딩해 저장하므로 길이/인코딩은 다시 계산)
+_SKIP_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive"}
+
+_CHARSET_RE = re.compile(r"charset=([\w-]+)", re.I)
+
+# 실제 세션을 기록하므로 로그인 비밀번호와 세션 값은 파일에 남기지 않습니다 (재생에는 필요 없음).
+REDACTED = "[REDACTED]"
+_SECRET_HEADERS = {"cookie", "set-cookie", "authorization"}
+_SECRET_FIELD_RE = re.compile(r"((?:^|&)(?:password|passwd|pw)=)[^&]*", re.I)
+
+
+def _charset(headers):
+    for key, value in headers.items():
+        if key.lower() == "content-type":
+            match = _CHARSET_RE.search(value)
+            if match:
+                return match.group(1)
+    return None
+
+
+def _header_list(headers):
+    return [{"name": k, "value": REDACTED if k.lower() in _SECRET_HEADERS else v}
+            for k, v in (headers or {}).items()]
+
+
+def redact_form(text):
+    """application/x-www-form-urlencoded 본문의 비밀번호 필드 값을 가림"""
+    return _SECRET_FIELD_RE.sub(lambda m: m.group(1) + REDACTED, text or "")
+
+
+class TrafficRecorder:
+    """
+    드라이버의 performance 로그를 모아 HAR 항목으로 변환.
+    페이지를 이동하면 이전 본문을 가져오지 못할 수 있으므로 페이지 이동 전후로 collect() 를 불러 줍니다.
+    """
+
+    def __init__(self, path="capture.har", resource_types=DEFAULT_RESOURCE_TYPES):
+        self.path = path
+        self.resource_types = set(resource_types)
+        self.entries = []
+        self._pending = {}
+        self._started = time.time()
+
+    def attach(self, driver):
+        # 본문 버퍼를 넉넉하게 잡아 둬야 collect() 전에 지워지지 않습니다.
+        driver.execute_cdp_cmd("Network.enable", {"maxTotalBufferSize": 64 * 1024 * 1024,
+                                                  "maxResourceBufferSize": 8 * 1024 * 1024})
+
+    def collect(self, driver):
+        """쌓인 performance 로그를 읽어 완료된 요청을 entries 에 추가. 추가된 개수 반환"""
+        try:
+            records = driver.get_log("performance")
+        except Exception as e:
+            log.warning(f"performance 로그를 읽을 수 없습니다: {e}")
+            return 0
+        added = 0
+        for record in records:
+            message = json.loads(record["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                self._on_request(params)
+            elif method == "Network.responseReceived":
+                entry = self._pending.get(params["requestId"])
+                if entry is not None:
+                    entry["response"] = params["response"]
+                    entry["type"] = params.get("type", entry["type"])
+            elif method == "Network.loadingFinished":
+                entry = self._pending.pop(params["requestId"], None)
+                if entry is not None and entry.get("response") and entry["type"] in self.resource_types:
+                    entry["finished"] = params["timestamp"]
+                    self.entries.append(self._to_har(driver, params["requestId"], entry))
+                    added += 1
+            elif method == "Network.loadingFailed":
+                self._pending.pop(params["requestId"], None)
+        return added
+
+    def _on_request(self, params):
+        request_id = params["requestId"]
+        redirect = params.get("redirectResponse")
+        previous = self._pending.pop(request_id, None)
+        if redirect and previous is not None and previous["type"] in self.resource_types:
+            # 리다이렉트 응답은 본문 없이 한 항목으로 기록 (같은 requestId 로 다음 요청이 이어짐)
+            previous["response"] = redirect
+            previous["finished"] = params["timestamp"]
+            self.entries.append(self._to_har(None, request_id, previous))
+        self._pending[request_id] = {
+            "request": params["request"],
+            "type": params.get("type", "Other"),
+            "wall_time": params.get("wallTime", time.time()),
+            "timestamp": params["timestamp"],
+        }
+
+    def _body(self, driver, request_id, response):
+        if driver is None:
+            return b""
+        try:
+            result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except Exception as e:
+            log.debug("본문을 가져올 수 없습니다 (%s): %s", response.get("url"), e)
+            return b""
+        if result.get("base64Encoded"):
+            return base64.b64decode(result["body"])
+        charset = _charset(response.get("headers", {})) or "utf-8"
+        try:
+            return result["body"].encode(charset)
+        except (LookupError, UnicodeEncodeError):
+            return result["body"].encode("utf-8")
+
+    def _to_har(self, driver, request_id, entry):
+        request, response = entry["request"], entry["response"]
+        body = self._body(driver, request_id, response)
+        timing = response.get("timing") or {}
+        total_ms = (entry["finished"] - entry["timestamp"]) * 1000
+        if timing:
+            send_end = timing.get("sendEnd", 0)
+            headers_end = timing.get("receiveHeadersEnd", send_end)
+            blocked = max(timing.get("requestTime", entry["timestamp"]) - entry["timestamp"], 0) * 1000
+            timings = {
+                "blocked": blocked,
+                "dns": max(timing.get("dnsEnd", -1) - timing.get("dnsStart", -1), -1),
+                "connect": max(timing.get("connectEnd", -1) - timing.get("connectStart", -1), -1),
+                "ssl": max(timing.get("sslEnd", -1) - timing.get("sslStart", -1), -1),
+                "send": max(send_end - timing.get("sendStart", 0), 0),
+                "wait": max(headers_end - send_end, 0),
+                "receive": max(total_ms - blocked - headers_end, 0),
+            }
+        else:
+            timings = {"blocked": -1, "dns": -1, "connect": -1, "ssl": -1, "send": 0, "wait": total_ms, "receive": 0}
+        har_request = {
+            "method": request["method"],
+            "url": request["url"],
+            "httpVersion": response.get("protocol", "http/1.1"),
+            "headers": _header_list(request.get("headers")),
+            "queryString": [],
+            "cookies": [],
+            "headersSize": -1,
+            "bodySize": len(request.get("postData", "")),
+        }
+        if "postData" in request:
+            har_request["postData"] = {"mimeType": request.get("headers", {}).get("Content-Type", ""),
+                                       "text": redact_form(request["postData"])}
+        return {
+            "startedDateTime": datetime.fromtimestamp(entry["wall_time"], timezone.utc).isoformat(),
+            "time": total_ms,
+            "request": har_request,
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", "http/1.1"),
+                "headers": _header_list(response.get("headers")),
+                "cookies": [],
+                "content": {"size": len(body), "mimeType": response.get("mimeType", ""),
+                            "encoding": "base64", "text": base64.b64encode(body).decode("ascii")},
+                "redirectURL": response.get("headers", {}).get("Location", ""),
+                "headersSize": -1,
+                "bodySize": len(body),
+            },
+            "cache": {},
+            "timings": timings,
+            "_resourceType": entry["type"],
+            "_offset": entry["wall_time"] - self._started,
+        }
+
+    def save(self, path=None):
+        path = path or self.path
+        har = {"log": {"version": "1.2", "creator": {"name": "golf-traffic-capture", "version": "1"},
+                       "pages": [], "entries": self.entries}}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(har, f, ensure_ascii=False)
+        log.info(f"요청 {len(self.entries)}건을 {path} 에 저장했습니다.")
+        return path
+
+
+def load_har(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["log"]["entries"]
+
+
+def entry_body(entry):
+    content = entry["response"]["content"]
+    text = content.get("text", "")
+    if content.get("encoding") == "base64":
+        return base64.b64decode(text)
+    return text.encode(_charset({"content-type": content.get("mimeType", "")}) or "utf-8")
+
+
+# 같은 주소로 가는 POST 라도 이 폼 필드 값이 다르면 다른 요청으로 봅니다 (시간표 날짜, 신청한 슬롯).
+KEY_FORM_FIELDS = ("submitDate", "book_date", "book_time", "book_crs")
+
+
+def _request_body(entry):
+    return entry["request"].get("postData", {}).get("text", "")
+
+
+def _entry_key(method, url, body=None):
+    parts = urlsplit(url)
+    form = parse_qs(body or "", keep_blank_values=True)
+    fields = tuple((name, form[name][0]) for name in KEY_FORM_FIELDS if name in form)
+    return method.upper(), parts.path + (f"?{parts.query}" if parts.query else ""), fields
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server_version = "ReplayServer"
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.address_string(), format % args)
+
+    def _replay(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8", "replace") if length else ""
+        entry = self.server.replay.next_entry(self.command, self.path, body)
+        if entry is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        scale = self.server.replay.time_scale
+        timings = entry.get("timings", {})
+        if scale:
+            time.sleep(max(timings.get("wait", 0), 0) / 1000 * scale)
+
+        response = entry["response"]
+        body = entry_body(entry)
+        self.send_response(response["status"], response.get("statusText") or None)
+        for header in response.get("headers", []):
+            name, value = header["name"], header["value"]
+            if name.lower() in _SKIP_HEADERS or value == REDACTED:
+                continue
+            if name.lower() == "location":
+                value = self.server.replay.rewrite(value)
+            # CDP 는 같은 이름의 헤더(Set-Cookie 등)를 줄바꿈으로 합쳐 줍니다.
+            for line in value.split("\n"):
+                self.send_header(name, line)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+
+        # 원래 전송 시간(receive)에 걸쳐 나눠 보냄
+        receive = max(timings.get("receive", 0), 0) / 1000 * scale
+        chunks = 8 if receive > 0 and len(body) > 8 else 1
+        size = -(-len(body) // chunks) if body else 0
+        for i in range(chunks):
+            self.wfile.write(body[i * size:(i + 1) * size])
+            if chunks > 1:
+                self.wfile.flush()
+                time.sleep(receive / chunks)
+
+    do_GET = _replay
+    do_POST = _replay
+    do_HEAD = _replay
+
+
+class ReplayServer:
+    """
+    HAR 파일을 기록된 순서대로 재생하는 서버 (FixtureServer 와 같은 사용법).
+    (메서드, 경로, 폼의 날짜/슬롯 필드) 마다 커서를 두고 요청이 올 때마다 다음 기록을 돌려줍니다. 다 쓰면 마지막 기록을 반복합니다.
+    """
+
+    def __init__(self, har_path, port=0, host="127.0.0.1", time_scale=1.0):
+        self.entries = load_har(har_path)
+        self.time_scale = time_scale
+        self._queues = defaultdict(list)
+        self._cursor = defaultdict(int)
+        self._lock = threading.Lock()
+        self.origins = set()
+        for entry in self.entries:
+            url = entry["request"]["url"]
+            parts = urlsplit(url)
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+            self._queues[_entry_key(entry["request"]["method"], url, _request_body(entry))].append(entry)
+        self.httpd = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.replay = self
+        self._thread = None
+
+    def next_entry(self, method, path, body=None):
+        key = _entry_key(method, path, body)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                return None
+            index = min(self._cursor[key], len(queue) - 1)
+            self._cursor[key] += 1
+            return queue[index]
+
+    def rewrite(self, url):
+        """기록된 원래 주소를 재생 서버 주소로 변경"""
+        for origin in self.origins:
+            if url.startswith(origin):
+                return self.base_url + url[len(origin):]
+        return url
+
+    def reset(self):
+        with self._lock:
+            self._cursor.clear()
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def reservation_url(self):
+        for entry in self.entries:
+            path = urlsplit(entry["request"]["url"]).path
+            if path.endswith("reservation02.asp"):
+                return self.base_url + path
+        return self.base_url + "/03reservation/reservation02.asp"
+
+    def dates(self):
+        """기록된 달력 응답들에서 한 번이라도 예약 가능했던 날짜 목록"""
+        found = []
+        for entry in self.entries:
+            if not urlsplit(entry["request"]["url"]).path.endswith("reservation02.asp"):
+                continue
+            html = entry_body(entry).decode(_charset({h["name"]: h["value"] for h in entry["response"]["headers"]})
+                                            or "utf-8", "replace")
+            for day in parse_calendar_html(html):
+                if day.date_text not in found:
+                    found.append(day.date_text)
+        return found
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def summary(path):
+    """기록 파일 요약: 경로별 요청 수, 평균 크기, 평균 시간"""
+    grouped = defaultdict(list)
+    for entry in load_har(path):
+        grouped[_entry_key(entry["request"]["method"], entry["request"]["url"], _request_body(entry))].append(entry)
+    print(f"{'요청':<70} {'건수':>5} {'평균크기':>9} {'평균ms':>8}")
+    for (method, target, fields), entries in sorted(grouped.items()):
+        if fields:
+            target += " " + "&".join(f"{name}={value}" for name, value in fields)
+        n = len(entries)
+        size = sum(e["response"]["content"]["size"] for e in entries) / n
+        elapsed = sum(e["time"] for e in entries) / n
+        print(f"{method + ' ' + target:<70.70} {n:>5} {size:>9.0f} {elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='요청/응답 기록 재생')
+    sub = parser.add_subparsers(dest='command', required=True)
+    replay_parser = sub.add_parser('replay', help='기록 파일을 재생하는 서버 실행')
+    replay_parser.add_argument('har')
+    replay_parser.add_argument('--port', type=int, default=8000)
+    replay_parser.add_argument('--time-scale', type=float, default=1.0, help='1.0=원래 속도, 0=지연 없음')
+    summary_parser = sub.add_parser('summary', help='기록 파일 요약')
+    summary_parser.add_argument('har')
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        summary(args.har)
+    else:
+        server = ReplayServer(args.har, port=args.port, time_scale=args.time_scale)
+        print(f"재생 서버: {server.reservation_url} (요청 {len(server.entries)}건)")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
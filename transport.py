@@ -0,0 +1,269 @@
+import time
+import socket
+import threading
+from collections import deque, defaultdict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from botlog import get_logger
+
+log = get_logger("transport")
+
+# 호스트별로 커넥션 풀을 유지하는 공용 HTTP 전송 계층.
+# 모듈 함수 requests.post 는 호출마다 새 TCP/TLS 연결을 맺지만,
+# 여기서는 keep-alive 세션을 재사용하고 DNS 결과도 잠시 캐시합니다.
+# DNS 캐시는 이 Transport 가 맺는 연결에만 쓰입니다 (socket.getaddrinfo 를 바꾸지 않으므로
+# chromedriver 등 다른 연결에는 영향이 없습니다).
+# 요청마다 연결 시간 / TTFB / 전체 시간을 기록해 오버헤드를 확인할 수 있습니다.
+
+_timing = threading.local()
+
+
+class _TimedConnectMixin:
+    # _adapter_pool_classes() 가 Transport 마다 만든 하위 클래스에서 DnsCache 로 바꿉니다.
+    dns_cache = None
+
+    def connect(self):
+        started = time.perf_counter()
+        host = self._dns_host
+        if self.dns_cache is not None:
+            # 소켓 연결에만 캐시된 IP 를 쓰고, SNI/인증서 확인은 그대로 self.host 로
+            self._dns_host = self.dns_cache.resolve(host, self.port)
+        try:
+            super().connect()
+        except OSError:
+            if self.dns_cache is not None:
+                self.dns_cache.invalidate(host)
+            raise
+        finally:
+            self._dns_host = host
+        # TCP 연결 + (https 라면) TLS 핸드셰이크 시간
+        _timing.connect_ms = (time.perf_counter() - started) * 1000
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def _adapter_pool_classes(dns_cache):
+    """dns_cache 를 쓰는 연결 클래스로 만든 (http, https) 풀 클래스"""
+    if dns_cache is None:
+        return _TimedHTTPConnectionPool, _TimedHTTPSConnectionPool
+    http_conn = type("_CachedHTTPConnection", (_TimedHTTPConnection,), {"dns_cache": dns_cache})
+    https_conn = type("_CachedHTTPSConnection", (_TimedHTTPSConnection,), {"dns_cache": dns_cache})
+    return (type("_CachedHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http_conn}),
+            type("_CachedHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https_conn}))
+
+
+class _TimedAdapter(HTTPAdapter):
+    def __init__(self, dns_cache=None, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        http_pool, https_pool = _adapter_pool_classes(self.dns_cache)
+        self.poolmanager.pool_classes_by_scheme = {"http": http_pool, "https": https_pool}
+
+
+class DnsCache:
+    """
+    호스트 이름 → IP 를 ttl 초 동안 캐시.
+    getaddrinfo 는 실제 DNS TTL 을 알려 주지 않으므로 ttl 을 짧게 두고, 연결에 실패하면 바로 버립니다.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry and entry[0] > now:
+                return entry[1]
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        address = infos[0][4][0]
+        with self._lock:
+            self._entries[host] = (now + self.ttl, address)
+        return address
+
+    def invalidate(self, host):
+        with self._lock:
+            self._entries.pop(host, None)
+
+
+class RequestMetrics:
+    """요청 한 건의 타이밍 (밀리초)"""
+    __slots__ = ("method", "host", "status", "connect_ms", "ttfb_ms", "total_ms", "bytes", "reused", "ts")
+
+    def __init__(self, method, host, status, connect_ms, ttfb_ms, total_ms, bytes, reused, ts):
+        self.method = method
+        self.host = host
+        self.status = status
+        self.connect_ms = connect_ms
+        self.ttfb_ms = ttfb_ms
+        self.total_ms = total_ms
+        self.bytes = bytes
+        self.reused = reused
+        self.ts = ts
+
+    def __repr__(self):
+        return (f"{self.method} {self.host} {self.status} connect={self.connect_ms:.1f}ms "
+                f"ttfb={self.ttfb_ms:.1f}ms total={self.total_ms:.1f}ms {'재사용' if self.reused else '새 연결'}")
+
+
+class Transport:
+    """
+    호스트별 requests.Session 풀.
+    pool_maxsize 는 호스트 하나에 유지할 keep-alive 연결 수입니다.
+    on_metrics 에 콜백을 추가하면 요청마다 RequestMetrics 를 받아볼 수 있습니다.
+    """
+
+    def __init__(self, pool_maxsize=4, dns_ttl=60, timeout=10, max_history=1000, user_agent=None):
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.history = deque(maxlen=max_history)
+        self.on_metrics = []
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.dns_cache = DnsCache(dns_ttl) if dns_ttl else None
+
+    def session(self, host):
+        """호스트(scheme://netloc) 전용 세션. 없으면 만들어 둡니다."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = _TimedAdapter(dns_cache=self.dns_cache, pool_connections=1,
+                                        pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["Connection"] = "keep-alive"
+                if self.user_agent:
+                    session.headers["User-Agent"] = self.user_agent
+                self._sessions[host] = session
+            return session
+
+    def request(self, method, url, **kwargs):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        kwargs.setdefault("timeout", self.timeout)
+        _timing.connect_ms = None
+
+        started = time.perf_counter()
+        response = self.session(host).request(method, url, **kwargs)
+        if not kwargs.get("stream"):
+            size = len(response.content)
+        else:
+            size = 0
+        total_ms = (time.perf_counter() - started) * 1000
+
+        connect_ms = _timing.connect_ms
+        metrics = RequestMetrics(
+            method=method.upper(),
+            host=parts.netloc,
+            status=response.status_code,
+            connect_ms=connect_ms or 0.0,
+            ttfb_ms=response.elapsed.total_seconds() * 1000,
+            total_ms=total_ms,
+            bytes=size,
+            reused=connect_ms is None,
+            ts=time.time(),
+        )
+        response.metrics = metrics
+        self.history.append(metrics)
+        for callback in list(self.on_metrics):
+            try:
+                callback(metrics)
+            except Exception as e:
+                log.warning(f"HTTP 메트릭 콜백 오류: {e}")
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def summary(self):
+        """호스트별 평균 타이밍과 연결 재사용 비율"""
+        grouped = defaultdict(list)
+        for m in list(self.history):
+            grouped[m.host].append(m)
+        result = {}
+        for host, items in grouped.items():
+            n = len(items)
+            result[host] = {
+                "requests": n,
+                "reuse_ratio": sum(1 for m in items if m.reused) / n,
+                "avg_connect_ms": sum(m.connect_ms for m in items) / n,
+                "avg_ttfb_ms": sum(m.ttfb_ms for m in items) / n,
+                "avg_total_ms": sum(m.total_ms for m in items) / n,
+            }
+        return result
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_transport():
+    """프로세스 전체에서 공유하는 Transport"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Transport()
+        return _shared
+
+
+def benchmark(url, count=10):
+    """
+    매번 새 연결을 맺는 requests.get 과 공용 Transport 를 비교.
+    (평균 전체 시간 ms, 평균 전체 시간 ms) 튜플을 반환합니다.
+    """
+    cold = []
+    for _ in range(count):
+        started = time.perf_counter()
+        requests.get(url, timeout=10)
+        cold.append((time.perf_counter() - started) * 1000)
+
+    transport = Transport()
+    pooled = [transport.get(url).metrics for _ in range(count)]
+    transport.close()
+
+    cold_avg = sum(cold) / count
+    pooled_avg = sum(m.total_ms for m in pooled) / count
+    print(f"requests.get (매번 새 연결): 평균 {cold_avg:.1f}ms")
+    print(f"Transport (keep-alive 풀): 평균 {pooled_avg:.1f}ms, "
+          f"연결 {sum(m.connect_ms for m in pooled) / count:.1f}ms, TTFB {sum(m.ttfb_ms for m in pooled) / count:.1f}ms")
+    return cold_avg, pooled_avg
+
+
+if __name__ == "__main__":
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "https://kauth.kakao.com"
+    benchmark(target)